@@ -8,13 +8,29 @@ Odgovornosti:
 """
 import asyncio
 import logging
+import os
+import time
 from typing import Optional
-from .services.queue_service import QueueService
+from .services.queue_service import QueueService, DEFAULT_LEASE_SECONDS
 from .services.scoring_service import FatigueScoringService
+from .services.write_buffer import PredictionWriteBuffer, ScoredSessionWriteBuffer
+from .services.replay_service import ReplayService
+from .services.prediction_cache import PredictionCache
+from .services.loop_controller import AdaptiveLoopController
+from .services.inline_scoring import InlineScoringService, DEFAULT_SCORE_P99_TARGET_MS
+from .services.player_load_service import PlayerLoadService
+from .services.cluster_coordinator import (
+    ClusterCoordinator, DEFAULT_HEARTBEAT_INTERVAL, DEFAULT_LEADER_LEASE_SECONDS
+)
 from .runners.scoring_runner import ScoringAgentRunner
 from .runners.retrain_runner import RetrainAgentRunner
 from infrastructure.ml.classifier import FatigueClassifier
 from infrastructure.ml.risk_classifier import RiskClassifier
+from infrastructure.ml.inference_batcher import InferenceBatcher
+from infrastructure.ml.retrain_executor import RetrainExecutor
+from core.metrics import render_prometheus
+from core.profiler import SamplingProfiler, ProfileReport, DEFAULT_INTERVAL
+from core.logging_setup import get_logging_runtime
 
 logger = logging.getLogger(__name__)
 
@@ -34,45 +50,170 @@ class AgentManager:
         # Servisi
         self.queue_service: Optional[QueueService] = None
         self.scoring_service: Optional[FatigueScoringService] = None
+        self.write_buffer: Optional[PredictionWriteBuffer] = None
+        self.replay_service: Optional[ReplayService] = None
+        # POST /score: sinhroni scoring mimo reda
+        self.inline_scorer: Optional[InlineScoringService] = None
+        # Player load agregati (samo ako MLP ima player load feature-e)
+        self.player_load: Optional[PlayerLoadService] = None
         
         # Runneri
         self.scoring_runner: Optional[ScoringAgentRunner] = None
+        self.loop_controller: Optional[AdaptiveLoopController] = None
         self.retrain_runner: Optional[RetrainAgentRunner] = None
+        self.retrain_executor: Optional[RetrainExecutor] = None
         
         # Background tasks
         self._scoring_task: Optional[asyncio.Task] = None
+        # Batch koji scoring petlja trenutno obrađuje (thread se ne može prekinuti - stop ga sačeka)
+        self._scoring_batch: Optional[asyncio.Future] = None
         self._retrain_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._replay_task: Optional[asyncio.Task] = None
+        self._cluster_task: Optional[asyncio.Task] = None
         self._agents_running = False
+        
+        # Cluster mod (više procesa nad istim redom) - None = jedan proces
+        self.coordinator: Optional[ClusterCoordinator] = None
+        
+        # Reaper metrike
+        self.reaper_interval = 30.0
+        self.reaper_runs = 0
+        self.reaped_requeued = 0
+        self.reaped_dead_lettered = 0
+        self.last_reap_at: Optional[float] = None
+        
+        # Sampling profiler (POST /admin/profile) - najviše jedan u isto vrijeme
+        self._profiler: Optional[SamplingProfiler] = None
     
     def initialize_services(self, exploration_rate: float = 0.05, 
-                           gold_threshold: int = 10):
+                           gold_threshold: int = 10,
+                           retrain_workers: int = 3,
+                           write_batch_size: int = 50,
+                           write_flush_ms: float = 250.0,
+                           lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                           reaper_interval: float = 30.0,
+                           prediction_cache_size: int = 4096,
+                           lookup_tables: bool = False,
+                           max_scoring_batch: int = 64,
+                           target_batch_ms: float = 100.0,
+                           cluster_mode: bool = False,
+                           heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+                           leader_lease_seconds: int = DEFAULT_LEADER_LEASE_SECONDS,
+                           inline_max_batch: int = 32,
+                           inline_max_wait_ms: float = 0.0,
+                           score_p99_target_ms: float = DEFAULT_SCORE_P99_TARGET_MS,
+                           inference_batching: bool = False,
+                           inference_max_batch: int = 32,
+                           inference_max_delay_ms: float = 2.0,
+                           player_load_save_every: int = 500):
         """
         Inicijalizuj servise i runnere.
         
         Args:
             exploration_rate: Stopa eksploracije za scoring (0.0-1.0)
             gold_threshold: Broj feedback-a potrebnih za retrain
+            retrain_workers: Broj procesa za retrain (0 = treniraj u ovom procesu)
+            write_batch_size: Max rezultata po flush-u (1 = upis odmah, bez buffera)
+            write_flush_ms: Max čekanje rezultata u bufferu prije flush-a
+            lease_seconds: Trajanje claim-a sesije prije nego je reaper vrati u red
+            reaper_interval: Koliko često (s) reaper provjerava istekle lease-ove
+            prediction_cache_size: Max unosa u LRU cache-u izlaza modela (0 = bez cache-a)
+            lookup_tables: Risk i injury LR iz predračunatih tabela umjesto sklearn pipeline-a
+            max_scoring_batch: Gornja granica adaptivnog batch-a scoring petlje
+            target_batch_ms: Koliko dugo jedan batch smije blokirati event loop
+            cluster_mode: Više procesa dijeli red - retrain samo u izabranom lideru,
+                ostali preuzimaju model sa diska (vidi ClusterCoordinator)
+            heartbeat_interval: Koliko često (s) proces obnavlja lease/heartbeat i provjerava model
+            leader_lease_seconds: Koliko dugo lider drži retrain lease bez obnove
+            inline_max_batch: Max zahtjeva POST /score u jednom micro-batch-u
+            inline_max_wait_ms: Koliko prvi zahtjev čeka ostale (0 = samo oni koji su već stigli)
+            score_p99_target_ms: Ciljani p99 POST /score (prikazuje se u statusu)
+            inference_batching: Micro-batcher ispred modela - scoring petlja boduje batch
+                sesija istovremeno, a modeli rade jedan forward pass za sve
+            inference_max_batch: Max redova u jednom forward pass-u
+            inference_max_delay_ms: Koliko najstariji red čeka da se batch popuni
+            player_load_save_every: Snapshot player load agregata nakon toliko novih sesija
+                (agregati postoje samo ako je klasifikator kreiran sa player_load=True)
         """
         logger.info("⚙️ Kreiranje servisa i runnera...")
         
         # Kreiraj servise
-        self.queue_service = QueueService()
-        self.risk_classifier = RiskClassifier()
+        self.queue_service = QueueService(lease_seconds=lease_seconds)
+        self.reaper_interval = reaper_interval
+        self.risk_classifier = RiskClassifier(lookup_table=lookup_tables)
+        if not self.risk_classifier.is_trained:
+            self.risk_classifier.train()
+        if lookup_tables:
+            self.classifier.set_lookup_table(True)
+        if getattr(self.classifier, "player_load", False):
+            self.player_load = PlayerLoadService(
+                self.queue_service,
+                snapshot_path=os.path.splitext(self.classifier.model_file)[0] + ".player_load.npz",
+                save_every=player_load_save_every
+            )
         self.scoring_service = FatigueScoringService(
             self.classifier,
             exploration_rate=exploration_rate,
-            risk_classifier=self.risk_classifier
+            risk_classifier=self.risk_classifier,
+            prediction_cache=PredictionCache(prediction_cache_size) if prediction_cache_size > 0 else None,
+            player_load=self.player_load
+        )
+        
+        if inference_batching:
+            self.scoring_service.enable_inference_batching(
+                max_batch=inference_max_batch,
+                max_delay_ms=inference_max_delay_ms
+            )
+        
+        self.replay_service = ReplayService(self.scoring_service)
+        
+        if write_batch_size > 1:
+            self.write_buffer = PredictionWriteBuffer(
+                self.queue_service,
+                max_rows=write_batch_size,
+                max_delay_ms=write_flush_ms
+            )
+        
+        self.inline_scorer = InlineScoringService(
+            self.scoring_service,
+            write_buffer=ScoredSessionWriteBuffer(
+                self.queue_service,
+                max_rows=max(write_batch_size, 1),
+                max_delay_ms=write_flush_ms,
+                auto_flush=False
+            ),
+            max_batch=inline_max_batch,
+            max_wait_ms=inline_max_wait_ms,
+            p99_target_ms=score_p99_target_ms
         )
         
         # Kreiraj runnere
         self.scoring_runner = ScoringAgentRunner(
             self.queue_service,
-            self.scoring_service
+            self.scoring_service,
+            write_buffer=self.write_buffer
+        )
+        self.loop_controller = AdaptiveLoopController(
+            max_batch=max_scoring_batch,
+            target_batch_ms=target_batch_ms,
+            depth_probe=self.queue_service.queued_count
         )
+        if cluster_mode:
+            self.coordinator = ClusterCoordinator(
+                self.queue_service.worker_id,
+                lease_seconds=leader_lease_seconds,
+                heartbeat_interval=heartbeat_interval
+            )
+        if retrain_workers > 0:
+            self.retrain_executor = RetrainExecutor(max_workers=retrain_workers)
         self.retrain_runner = RetrainAgentRunner(
             self.classifier,
             risk_classifier=self.risk_classifier,
-            gold_threshold=gold_threshold
+            gold_threshold=gold_threshold,
+            retrain_executor=self.retrain_executor,
+            commit_guard=self.coordinator.still_leader if self.coordinator else None,
+            player_load=self.player_load
         )
         
         logger.info("✅ Servisi i runneri spremni")
@@ -89,13 +230,28 @@ class AgentManager:
         logger.info("🤖 Pokretanje background agenata...")
         self._agents_running = True
         
+        # Player load agregati: snapshot + sesije upisane poslije njega, prije prvog bodovanja
+        if self.player_load:
+            await asyncio.to_thread(self.player_load.start)
+        
         # Pokreni scoring loop
         self._scoring_task = asyncio.create_task(self._run_scoring_loop())
         
         # Pokreni retrain loop
         self._retrain_task = asyncio.create_task(self._run_retrain_loop())
         
-        logger.info("✅ Oba agenta pokrenuta (Scoring + Retrain)")
+        # Pokreni reaper (vraća sesije sa isteklim lease-om u red)
+        self._reaper_task = asyncio.create_task(self._run_reaper_loop())
+        
+        # Cluster mod: leader election, heartbeat i preuzimanje novih modela
+        if self.coordinator:
+            self._cluster_task = asyncio.create_task(self._run_cluster_loop())
+        
+        # Naknadni upis POST /score rezultata
+        if self.inline_scorer:
+            self.inline_scorer.start()
+        
+        logger.info("✅ Oba agenta pokrenuta (Scoring + Retrain) + lease reaper")
     
     async def stop_agents(self):
         """Zaustavi oba agenta"""
@@ -113,6 +269,40 @@ class AgentManager:
                 await self._scoring_task
             except asyncio.CancelledError:
                 logger.info("🤖 Scoring agent zaustavljen")
+        # Batch koji je bio u toku završava u svom threadu (_agents_running ga skraćuje)
+        if self._scoring_batch is not None:
+            try:
+                await self._scoring_batch
+            except Exception as e:
+                logger.error(f"❌ Posljednji scoring batch nije uspio: {e}")
+            self._scoring_batch = None
+        
+        # Zaustavi reaper
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                logger.info("♻️ Lease reaper zaustavljen")
+        
+        # Pauziraj replay (checkpoint ostaje, nastavlja se sljedećim startom)
+        if self._replay_task and not self._replay_task.done():
+            self.replay_service.cancel()
+            try:
+                await self._replay_task
+            except Exception:
+                pass
+        
+        # Upiši rezultate koji još čekaju u bufferu
+        if self.scoring_runner:
+            await asyncio.to_thread(self.scoring_runner.flush_pending)
+        if self.inline_scorer:
+            try:
+                await self.inline_scorer.stop()
+            except Exception as e:
+                logger.error(f"❌ Upis /score rezultata nije uspio: {e}")
+        if self.player_load:
+            await asyncio.to_thread(self.player_load.save)
         
         # Zaustavi retrain agent
         if self._retrain_task:
@@ -122,6 +312,23 @@ class AgentManager:
             except asyncio.CancelledError:
                 logger.info("🎓 Retrain agent zaustavljen")
         
+        # Oslobodi retrain lease (drugi proces preuzima odmah) i odjavi heartbeat
+        if self._cluster_task:
+            self._cluster_task.cancel()
+            try:
+                await self._cluster_task
+            except asyncio.CancelledError:
+                pass
+            try:
+                await asyncio.to_thread(self.coordinator.release)
+                await asyncio.to_thread(self.coordinator.remove_heartbeat)
+            except Exception as e:
+                logger.error(f"❌ Greška pri odjavi iz clustera: {e}")
+        
+        # Ugasi retrain worker procese
+        if self.retrain_executor:
+            self.retrain_executor.shutdown(wait=False)
+        
         logger.info("✅ Svi agenti zaustavljeni")
     
     async def _run_scoring_loop(self):
@@ -129,20 +336,35 @@ class AgentManager:
         logger.info("🤖 Scoring agent loop pokrenut")
         
         try:
+            controller = self.loop_controller or AdaptiveLoopController()
+            self.loop_controller = controller
             while self._agents_running and self.scoring_runner:
                 try:
-                    result = self.scoring_runner.step()
-                    
-                    if result:
-                        # Ima posla, kratka pauza
-                        await asyncio.sleep(0.05)
+                    # Batch i pauzu bira kontroler (dubina reda + vrijeme obrade)
+                    started = time.perf_counter()
+                    if self.scoring_service and self.scoring_service.inference_batcher:
+                        # Cijeli batch istovremeno: modeli rade jedan forward pass za sve sesije
+                        # (preuzimanje i upis idu u thread, na loop-u se čeka samo forward pass)
+                        batch = self.scoring_runner.step_batch_async(controller.batch_size)
                     else:
-                        # Nema posla, duža pauza
-                        await asyncio.sleep(2)
+                        # step() blokira (pyodbc + inferencija) - cijeli batch ide u thread
+                        batch = asyncio.to_thread(self._run_scoring_batch, controller.batch_size)
+                    # shield: cancel petlje ne napušta batch usred upisa - stop_agents ga sačeka
+                    self._scoring_batch = asyncio.ensure_future(batch)
+                    result = await asyncio.shield(self._scoring_batch)
+                    self._scoring_batch = None
+                    processed = result if isinstance(result, int) else len(result)
+                    if processed:
+                        # Dubina reda je COUNT upit - čita se u threadu, ne na event loop-u
+                        await asyncio.to_thread(controller.refresh_depth)
+                    delay = controller.on_batch(processed, time.perf_counter() - started)
+                    await asyncio.sleep(delay)
                         
                 except Exception as e:
-                    logger.error(f"🤖 Greška u scoring loopu: {e}")
-                    await asyncio.sleep(5)
+                    self._scoring_batch = None
+                    delay = controller.on_error()
+                    logger.error(f"🤖 Greška u scoring loopu: {e} (backoff {delay:.1f}s)")
+                    await asyncio.sleep(delay)
                     
         except asyncio.CancelledError:
             logger.info("🤖 Scoring agent loop prekinut")
@@ -151,6 +373,15 @@ class AgentManager:
         finally:
             logger.info("🤖 Scoring agent loop završen")
     
+    def _run_scoring_batch(self, limit: int) -> int:
+        """Do ``limit`` scoring step-ova zaredom (van event loop-a); vraća broj obrađenih sesija"""
+        processed = 0
+        while processed < limit and self._agents_running:
+            if self.scoring_runner.step() is None:
+                break
+            processed += 1
+        return processed
+    
     async def _run_retrain_loop(self):
         """Background loop za retrain agenta"""
         logger.info("🎓 Retrain agent loop pokrenut")
@@ -158,7 +389,17 @@ class AgentManager:
         try:
             while self._agents_running and self.retrain_runner:
                 try:
-                    result = self.retrain_runner.step()
+                    # Cluster mod: retrain radi samo lider
+                    if self.coordinator and not self.coordinator.is_leader:
+                        await asyncio.sleep(self.coordinator.heartbeat_interval)
+                        continue
+                    
+                    # Fit ide u retrain executor - ne blokira scoring ni HTTP
+                    result = await self.retrain_runner.step_async()
+                    
+                    if result and result.retrained and self.coordinator:
+                        # Novi bundle je na disku - ostali procesi ga učitavaju na heartbeat-u
+                        await asyncio.to_thread(self.coordinator.publish_model)
                     
                     if result:
                         logger.info(f"✅ Retrain completed: {result.message}")
@@ -179,6 +420,142 @@ class AgentManager:
         finally:
             logger.info("🎓 Retrain agent loop završen")
     
+    def reload_models(self) -> str:
+        """Učitaj fatigue/injury/risk bundle sa diska (upisao ga je retrain lider)"""
+        version = self.classifier.reload_from_disk()
+        if getattr(self, "risk_classifier", None) is not None:
+            self.risk_classifier.reload_from_disk()
+        return version
+    
+    def _heartbeat_status(self) -> dict:
+        """Kratki status ovog procesa koji ide u AgentHeartbeats"""
+        runner = self.scoring_runner
+        cache = self.scoring_service.get_cache_status() if self.scoring_service else None
+        return {
+            "agents_running": self._agents_running,
+            "avg_processing_time_ms": (runner.total_processing_time / runner.processed_count
+                                       if runner and runner.processed_count else 0.0),
+            "retrain_count": self.retrain_runner.retrain_count if self.retrain_runner else 0,
+            "write_buffer_pending": self.write_buffer.pending_count() if self.write_buffer else 0,
+            "prediction_cache_hit_rate": cache["hit_rate"] if cache else None,
+            "scoring_loop": ({k: v for k, v in self.loop_controller.get_status().items()
+                              if k in ("mode", "batch_size", "poll_interval_s", "queue_depth")}
+                             if self.loop_controller else None),
+        }
+    
+    def cluster_tick(self):
+        """Jedan heartbeat (sinhrono): preuzmi novi model, obnovi/uzmi lease, upiši heartbeat"""
+        coordinator = self.coordinator
+        
+        # 1. Model: nova generacija na disku -> ponovo učitaj (prije eventualnog preuzimanja liderstva)
+        generation = coordinator.read_model_generation()
+        if coordinator.model_generation is not None and generation != coordinator.model_generation:
+            version = self.reload_models()
+            coordinator.model_reloads += 1
+            logger.info(f"📦 Učitana generacija modela {generation} (verzija {version})")
+        coordinator.model_generation = generation
+        
+        # 2. Leader election / obnova lease-a
+        coordinator.acquire_or_renew()
+        
+        # 3. Heartbeat
+        coordinator.heartbeat(
+            processed_count=self.scoring_runner.processed_count if self.scoring_runner else 0,
+            model_version=self.scoring_service.model_version() if self.scoring_service else None,
+            status=self._heartbeat_status()
+        )
+        coordinator.last_heartbeat_at = time.time()
+    
+    async def _run_cluster_loop(self):
+        """Background loop za cluster koordinaciju (lease + heartbeat + hot reload modela)"""
+        logger.info(f"🌐 Cluster loop pokrenut ({self.coordinator.worker_id})")
+        
+        try:
+            while self._agents_running and self.coordinator:
+                try:
+                    await asyncio.to_thread(self.cluster_tick)
+                except Exception as e:
+                    self.coordinator.errors += 1
+                    logger.error(f"🌐 Greška u cluster loopu: {e}")
+                await asyncio.sleep(self.coordinator.heartbeat_interval)
+        except asyncio.CancelledError:
+            logger.info("🌐 Cluster loop prekinut")
+    
+    def get_cluster_status(self) -> dict:
+        """Agregirani status svih procesa (cluster mod) ili samo ovog procesa"""
+        if self.coordinator:
+            status = self.coordinator.cluster_status()
+            status["cluster_mode"] = True
+            status["this_worker"] = self.coordinator.get_status()
+            return status
+        heartbeat = self._heartbeat_status()
+        return {
+            "cluster_mode": False,
+            "workers_alive": 1,
+            "processed_count": self.scoring_runner.processed_count if self.scoring_runner else 0,
+            "retrain_count": heartbeat["retrain_count"],
+            "write_buffer_pending": heartbeat["write_buffer_pending"],
+            "model_versions": [self.scoring_service.model_version()] if self.scoring_service else [],
+            "leader": None,
+            "workers": [],
+        }
+    
+    def reap_once(self) -> dict:
+        """Jedan prolaz reaper-a (sinhrono)"""
+        result = self.queue_service.reap_expired_leases()
+        self.reaper_runs += 1
+        self.reaped_requeued += result.get("requeued", 0)
+        self.reaped_dead_lettered += result.get("dead_lettered", 0)
+        self.last_reap_at = time.time()
+        return result
+    
+    async def _run_reaper_loop(self):
+        """Background loop koji periodično vraća istekle lease-ove u red"""
+        logger.info("♻️ Lease reaper loop pokrenut")
+        
+        try:
+            while self._agents_running and self.queue_service:
+                try:
+                    await asyncio.to_thread(self.reap_once)
+                except Exception as e:
+                    logger.error(f"♻️ Greška u reaper loopu: {e}")
+                await asyncio.sleep(self.reaper_interval)
+                
+        except asyncio.CancelledError:
+            logger.info("♻️ Lease reaper loop prekinut")
+        finally:
+            logger.info("♻️ Lease reaper loop završen")
+    
+    def start_replay(self, replay_id: Optional[str] = None, chunk_size: Optional[int] = None,
+                     from_id: Optional[int] = None, to_id: Optional[int] = None,
+                     max_rows: Optional[int] = None) -> str:
+        """Pokreni replay historijskih sesija u pozadini; vraća replay_id"""
+        if not self.replay_service:
+            raise RuntimeError("Servisi nisu inicijalizovani! Pozovi initialize_services() prvo.")
+        if self._replay_task and not self._replay_task.done():
+            raise RuntimeError("Replay je već u toku")
+        
+        if chunk_size:
+            self.replay_service.chunk_size = chunk_size
+        replay_id = replay_id or self.replay_service.default_replay_id()
+        self._replay_task = asyncio.create_task(asyncio.to_thread(
+            self.replay_service.run,
+            replay_id=replay_id, from_id=from_id, to_id=to_id, max_rows=max_rows
+        ))
+        logger.info(f"🔁 Replay {replay_id} pokrenut")
+        return replay_id
+    
+    def get_replay_status(self, replay_id: str) -> Optional[dict]:
+        """Checkpoint iz baze + živi izvještaj ako je to tekući replay"""
+        if not self.replay_service:
+            return None
+        status = self.replay_service.get_checkpoint(replay_id)
+        current = self.replay_service.current
+        if current is not None and current.replay_id == replay_id:
+            status = dict(status or {})
+            status["run"] = current.to_dict()
+        return status
+    
     def is_running(self) -> bool:
         """Provjeri da li su agenti aktivni"""
         return self._agents_running
@@ -197,10 +574,123 @@ class AgentManager:
         return {
             "agents_running": self._agents_running,
             "scoring_agent": scoring_status,
-            "retrain_agent": retrain_status
+            "retrain_agent": retrain_status,
+            "lanes": self.queue_service.get_lane_stats() if self.queue_service else None,
+            "scoring_loop": self.loop_controller.get_status() if self.loop_controller else None,
+            "inline_scoring": self.inline_scorer.get_status() if self.inline_scorer else None,
+            "player_load": self.player_load.get_status() if self.player_load else None,
+            "cluster": self.coordinator.get_status() if self.coordinator else None,
+            "lease_reaper": {
+                "worker_id": self.queue_service.worker_id if self.queue_service else None,
+                "lease_seconds": self.queue_service.lease_seconds if self.queue_service else None,
+                "interval_seconds": self.reaper_interval,
+                "runs": self.reaper_runs,
+                "requeued": self.reaped_requeued,
+                "dead_lettered": self.reaped_dead_lettered,
+                "last_run_at": self.last_reap_at,
+            }
         }
 
 
+    def _profile_focus(self) -> tuple:
+        """Korijeni agent petlji: coroutine loop-ovi, funkcije koje se izvršavaju u to_thread i batcher thread"""
+        return (
+            AgentManager._run_scoring_loop,
+            AgentManager._run_retrain_loop,
+            AgentManager._run_reaper_loop,
+            AgentManager.reap_once,
+            AgentManager.cluster_tick,
+            AgentManager._run_scoring_batch,
+            ScoringAgentRunner.step,
+            ScoringAgentRunner._sense_batch,
+            ScoringAgentRunner._act_and_learn_batch,
+            InferenceBatcher._run,
+            PredictionWriteBuffer.flush,
+            RetrainAgentRunner._sense_and_think,
+            RetrainAgentRunner._collect_feedback_batch,
+            RetrainAgentRunner._fit_inline,
+            RetrainAgentRunner._commit_retrain,
+            ReplayService.run,
+        )
+
+    async def profile(self, seconds: float, interval: float = DEFAULT_INTERVAL,
+                      agents_only: bool = True, line_numbers: bool = False) -> ProfileReport:
+        """Uzorkuj stack-ove ``seconds`` sekundi dok agenti normalno rade.
+
+        ``agents_only`` zadržava samo stack-ove koji prolaze kroz agent petlje
+        (bez HTTP handlera i idle event loop-a).
+        """
+        if self._profiler is not None:
+            raise RuntimeError("Profiler je već pokrenut")
+        self._profiler = SamplingProfiler(
+            interval=interval,
+            focus=self._profile_focus() if agents_only else None,
+            line_numbers=line_numbers
+        )
+        logger.info(f"🔬 Profiler pokrenut na {seconds:.0f}s (interval {interval * 1000:.1f} ms)")
+        try:
+            self._profiler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                report = await asyncio.to_thread(self._profiler.stop)
+        finally:
+            self._profiler = None
+        logger.info(f"🔬 Profiler završen: {report.matched_samples}/{report.samples} uzoraka")
+        return report
+
+    def get_metrics_text(self) -> str:
+        """Latencije po fazi + osnovni brojači u Prometheus text formatu (za /metrics)"""
+        registries = {}
+        gauges = [("agents_running", "1 ako su agenti pokrenuti.", 1.0 if self._agents_running else 0.0)]
+        if self.scoring_runner:
+            registries["runner"] = self.scoring_runner.latency
+            gauges.append(("processed_sessions", "Broj procesiranih sesija od starta.",
+                           self.scoring_runner.processed_count))
+        if self.scoring_service:
+            registries["scoring"] = self.scoring_service.latency
+            cache = self.scoring_service.get_cache_status()
+            if cache is not None:
+                gauges.append(("prediction_cache_hit_rate", "Udio cache pogodaka.", cache["hit_rate"]))
+        if self.write_buffer:
+            gauges.append(("write_buffer_pending", "Rezultati koji čekaju batch upis.",
+                           self.write_buffer.pending_count()))
+        batcher = self.scoring_service.get_batcher_status() if self.scoring_service else None
+        if batcher is not None:
+            gauges.append(("inference_batch_size_avg", "Prosječna veličina batch-a micro-batcher-a modela.",
+                           batcher["avg_batch_size"]))
+            gauges.append(("inference_batches", "Broj forward pass-ova micro-batcher-a od starta.",
+                           batcher["batches"]))
+            gauges.append(("inference_rows", "Broj redova bodovanih kroz micro-batcher od starta.",
+                           batcher["rows"]))
+        if self.inline_scorer:
+            registries["inline"] = self.inline_scorer.latency
+            gauges.append(("inline_score_batch_size", "Prosječan micro-batch POST /score.",
+                           self.inline_scorer.get_status()["avg_batch_size"]))
+            if self.inline_scorer.write_buffer:
+                gauges.append(("inline_score_pending_writes", "POST /score rezultati koji čekaju upis.",
+                               self.inline_scorer.write_buffer.pending_count()))
+        if self.player_load:
+            gauges.append(("player_load_players", "Igrači sa player load agregatima u memoriji.",
+                           len(self.player_load.store)))
+            gauges.append(("player_load_last_session_id", "Zadnja sesija uključena u player load agregate.",
+                           self.player_load.store.last_session_id))
+        if self.loop_controller:
+            loop = self.loop_controller.get_status()
+            gauges.append(("scoring_batch_size", "Trenutni adaptivni batch scoring petlje.", loop["batch_size"]))
+            gauges.append(("scoring_poll_interval_seconds", "Trenutna pauza scoring petlje kad je red prazan.",
+                           loop["poll_interval_s"]))
+        logging_runtime = get_logging_runtime()
+        if logging_runtime is not None:
+            log_stats = logging_runtime.get_stats()
+            gauges.append(("log_records_dropped", "Log zapisi odbačeni sampling-om/rate limitom.",
+                           log_stats["dropped"]))
+        return render_prometheus(registries, gauges)
+
     def get_queue_service(self):
         """Vrati queue service (za web layer dependency)"""
         return self.queue_service
+
+    def get_inline_scorer(self):
+        """Vrati inline scorer (za POST /score)"""
+        return self.inline_scorer
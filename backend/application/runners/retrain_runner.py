@@ -1,7 +1,9 @@
 # backend/application/runners/retrain_runner.py
-from typing import Optional
-from dataclasses import dataclass
+from typing import Callable, Optional
+from dataclasses import dataclass, field
+import asyncio
 import logging
+import time
 from datetime import datetime
 from infrastructure.database import get_connection
 
@@ -41,26 +43,85 @@ class RetrainTickResult:
     message: str
     last_retrain_date: Optional[datetime] = None
 
+@dataclass
+class _RetrainBatch:
+    """Feedback pokupljen za jedan retrain (između SENSE/ACT i upisa u bazu)"""
+    retrain_date: datetime
+    feedback_ids: list
+    total_rows: int
+    fatigue_matrix: Optional[tuple] = None
+    risk_frame: Optional[tuple] = None
+    # Istrenirani bundle-i ("fatigue", "risk") - instaliraju se tek poslije fencing provjere
+    bundles: dict = field(default_factory=dict)
+
 class RetrainAgentRunner:
     """
     Runner za periodični retrain modela
     SENSE → THINK → ACT → LEARN
     """
     
-    def __init__(self, classifier, risk_classifier=None, gold_threshold: int = 10):
+    def __init__(self, classifier, risk_classifier=None, gold_threshold: int = 10,
+                 retrain_executor=None, commit_guard: Optional[Callable[[], bool]] = None,
+                 player_load=None):
         self.classifier = classifier
         self.risk_classifier = risk_classifier
         self.gold_threshold = gold_threshold
+        self.retrain_executor = retrain_executor
+        # Cluster mod: provjera da je ovaj proces još retrain lider (fencing prije commit-a)
+        self.commit_guard = commit_guard
+        # PlayerLoadService (ako MLP koristi player load feature-e) - feedback dobija agregate na dan sesije
+        self.player_load = player_load
         self.last_retrain_count = 0
         self.retrain_count = 0
         self._last_retrain_date = None
+        self.last_fit_seconds: Optional[float] = None
         
     def step(self) -> Optional[RetrainTickResult]:
         """
         SENSE → THINK → ACT → LEARN
-        Jedan tick - provjeri da li treba retrain
+        Jedan tick - provjeri da li treba retrain (fit u ovom procesu)
         """
+        new_feedback_count = self._sense_and_think()
+        if new_feedback_count is None:
+            return None
         
+        # ===== ACT =====
+        # Izvuci sve feedback podatke i treniraj model
+        logger.info(f"🔄 RETRAINING MODEL - {new_feedback_count} new feedback items")
+        batch = self._collect_feedback_batch()
+        fitted = False
+        if batch is not None:
+            started = time.perf_counter()
+            fitted = self._fit_inline(batch)
+            self.last_fit_seconds = time.perf_counter() - started
+        retrain_date, success = self._commit_retrain(batch, fitted)
+        return self._finish_tick(new_feedback_count, retrain_date, success)
+
+    async def step_async(self) -> Optional[RetrainTickResult]:
+        """
+        Isto kao step(), ali DB rad ide u thread, a fit u retrain executor
+        (poseban proces) - scoring i HTTP nisu blokirani dok traje trening.
+        """
+        new_feedback_count = await asyncio.to_thread(self._sense_and_think)
+        if new_feedback_count is None:
+            return None
+        
+        # ===== ACT =====
+        logger.info(f"🔄 RETRAINING MODEL - {new_feedback_count} new feedback items")
+        batch = await asyncio.to_thread(self._collect_feedback_batch)
+        fitted = False
+        if batch is not None:
+            started = time.perf_counter()
+            if self.retrain_executor is not None:
+                fitted = await self._fit_in_executor(batch)
+            else:
+                fitted = await asyncio.to_thread(self._fit_inline, batch)
+            self.last_fit_seconds = time.perf_counter() - started
+        retrain_date, success = await asyncio.to_thread(self._commit_retrain, batch, fitted)
+        return self._finish_tick(new_feedback_count, retrain_date, success)
+
+    def _sense_and_think(self) -> Optional[int]:
+        """SENSE + THINK: vrati broj novih feedback-a ako treba retrain, inače None"""
         # ===== SENSE =====
         # Koliko NOVOG feedbacka imamo od zadnjeg treninga?
         new_feedback_count = self._sense_new_feedback()
@@ -77,11 +138,10 @@ class RetrainAgentRunner:
                        f"(need {self.gold_threshold - new_feedback_count} more)")
             return None
         
-        # ===== ACT =====
-        # Izvuci sve feedback podatke i treniraj model
-        logger.info(f"🔄 RETRAINING MODEL - {new_feedback_count} new feedback items")
-        retrain_date, success = self._retrain_with_feedback()
-        
+        return new_feedback_count
+
+    def _finish_tick(self, new_feedback_count: int, retrain_date: Optional[datetime],
+                     success: bool) -> RetrainTickResult:
         if not success:
             logger.error("❌ Retrain failed!")
             return RetrainTickResult(
@@ -140,13 +200,12 @@ class RetrainAgentRunner:
             if conn:
                 conn.close()
     
-    def _retrain_with_feedback(self) -> tuple[Optional[datetime], bool]:
+    def _collect_feedback_batch(self) -> Optional[_RetrainBatch]:
         """
-        ACT: Treniraj model sa svim incorrect feedback-om
-        Vraća: (retrain_datetime, success)
+        ACT (1/3): Pokupi sav incorrect feedback, memoriši ga u modelima
+        i pripremi matrice za trening. Ne trenira ništa.
         """
         conn = None
-        retrain_date = None
         try:
             conn = get_connection()
             cursor = conn.cursor()
@@ -161,77 +220,206 @@ class RetrainAgentRunner:
                     f.UserLabel,
                     ts.Position, ts.ActivityType, ts.SleepHours, 
                     ts.StressLevel, ts.DistanceKm, ts.SprintCount,
-                    ts.Soreness, ts.RPE, ts.InjuryIllness
+                    ts.Soreness, ts.RPE, ts.InjuryIllness,
+                    ts.PlayerName, ts.Id, ts.Timestamp
                 FROM Feedback f
                 JOIN TrainingSessions ts ON f.SessionId = ts.Id
                 WHERE f.Correct = 0 AND f.Processed = 0
             """)
             
             rows = cursor.fetchall()
-            
-            if len(rows) == 0:
-                logger.warning("⚠️ No incorrect feedback to train on")
-                return retrain_date, False
-            
-            logger.info(f"📚 Training on {len(rows)} feedback examples")
-            
-            # Treniraj model sa svakim feedback-om
-            trained_count = 0
-            for row in rows:
-                try:
-                    feedback_id = row[0]
-                    fatigue_label, raw_label = _parse_feedback_labels(row[1])
-                    
-                    features = [
-                        row[2],  # Position
-                        row[3],  # ActivityType
-                        float(row[4]),  # SleepHours
-                        float(row[5]),  # StressLevel
-                        float(row[6]),  # DistanceKm
-                        float(row[7]),  # SprintCount
-                        float(row[8]) if row[8] is not None else 5.0,  # Soreness
-                        float(row[9]) if row[9] is not None else 5.0,  # RPE
-                        float(row[10]) if row[10] is not None else 0.0  # InjuryIllness
-                    ]
-                    
-                    success = self.classifier.train_single(features, fatigue_label)
-                    
-                    if self.risk_classifier is not None:
-                        self.risk_classifier.add_feedback_example(features, raw_label)
+        except Exception as e:
+            logger.error(f"❌ Retrain error: {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+        
+        if len(rows) == 0:
+            logger.warning("⚠️ No incorrect feedback to train on")
+            return None
+        
+        logger.info(f"📚 Training on {len(rows)} feedback examples")
+        
+        load_features = None
+        if self.player_load is not None:
+            # Agregati igrača na dan sesije (kao u treningu), ne trenutni
+            try:
+                load_features = self.player_load.features_as_of([(row[12], row[11], row[13]) for row in rows])
+            except Exception as e:
+                logger.error(f"❌ Player load agregati za feedback nisu pročitani: {e}")
+                return None
+        
+        feedback_ids = []
+        for index, row in enumerate(rows):
+            try:
+                feedback_id = row[0]
+                fatigue_label, raw_label = _parse_feedback_labels(row[1])
+                
+                features = [
+                    row[2],  # Position
+                    row[3],  # ActivityType
+                    float(row[4]),  # SleepHours
+                    float(row[5]),  # StressLevel
+                    float(row[6]),  # DistanceKm
+                    float(row[7]),  # SprintCount
+                    float(row[8]) if row[8] is not None else 5.0,  # Soreness
+                    float(row[9]) if row[9] is not None else 5.0,  # RPE
+                    float(row[10]) if row[10] is not None else 0.0  # InjuryIllness
+                ]
+                if load_features is not None:
+                    features += load_features[index]
+                
+                # Samo u memoriju - history se upisuje u _commit_retrain, poslije fencing provjere
+                self.classifier.remember_feedback(features, fatigue_label, persist=False)
+                
+                if self.risk_classifier is not None:
+                    self.risk_classifier.add_feedback_example(features, raw_label, persist=False)
+                
+                feedback_ids.append(feedback_id)
                     
-                    if success:
-                        trained_count += 1
-                        
-                        # Označi feedback kao processed
-                        cursor.execute(
-                            "UPDATE Feedback SET Processed = 1 WHERE Id = ?",
-                            (feedback_id,)
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"❌ Failed to train on feedback ID {row[0]}: {e}")
+            except Exception as e:
+                logger.error(f"❌ Failed to train on feedback ID {row[0]}: {e}")
+                continue
+        
+        batch = _RetrainBatch(
+            retrain_date=retrain_date,
+            feedback_ids=feedback_ids,
+            total_rows=len(rows)
+        )
+        if feedback_ids and self.classifier.ready_for_retrain():
+            batch.fatigue_matrix = self.classifier.build_retrain_matrix()
+        if self.risk_classifier is not None:
+            batch.risk_frame = self.risk_classifier.build_retrain_frame()
+        return batch
+    
+    def _fit_inline(self, batch: _RetrainBatch) -> bool:
+        """ACT (2/3): Treniraj modele u ovom procesu (bez executora), samo u memoriju.
+        Vraća False ako neki od potrebnih fit-ova nije uspio."""
+        success = True
+        if batch.fatigue_matrix is not None:
+            try:
+                batch.bundles["fatigue"] = self.classifier.fit_retrain_bundle(*batch.fatigue_matrix)
+            except Exception as e:
+                logger.error(f"❌ fatigue retrain failed: {e}")
+                success = False
+        
+        if batch.risk_frame is not None:
+            try:
+                bundle = self.risk_classifier.fit_bundle(*batch.risk_frame)
+                if bundle is not None:
+                    batch.bundles["risk"] = bundle
+            except Exception as e:
+                logger.error(f"❌ risk retrain failed: {e}")
+                success = False
+        return success
+    
+    async def _fit_in_executor(self, batch: _RetrainBatch) -> bool:
+        """ACT (2/3): Fatigue MLP i risk LR se treniraju paralelno u worker procesima;
+        gotovi bundle-i se instaliraju tek u _commit_retrain.
+        Vraća False ako neki od potrebnih fit-ova nije uspio."""
+        jobs = {}
+        if batch.fatigue_matrix is not None:
+            X_encoded, y = batch.fatigue_matrix
+            jobs["fatigue"] = (self.classifier.model, X_encoded, y, self.classifier.scaler)
+        if batch.risk_frame is not None:
+            jobs["risk"] = batch.risk_frame
+        
+        # Svi poslovi idu u pool odjednom, pa se treniraju paralelno
+        futures = {name: self.retrain_executor.submit(name, *args) for name, args in jobs.items()}
+        
+        success = True
+        for name, future in futures.items():
+            try:
+                payload = await asyncio.wrap_future(future)
+            except Exception as e:
+                logger.warning(f"⚠️ {name} retrain worker failed ({e}) - fitting inline")
+                self.retrain_executor.discard_pool()
+                try:
+                    payload = await asyncio.to_thread(self.retrain_executor.run_inline, name, *jobs[name])
+                except Exception as inline_error:
+                    logger.error(f"❌ {name} retrain failed: {inline_error}")
+                    success = False
                     continue
+            batch.bundles[name] = self.retrain_executor.load_bundle(payload)
+        return success
+    
+    def _discard_feedback(self):
+        """Odbaci feedback memorisan u _collect_feedback_batch (nije upisan na disk)"""
+        self.classifier.discard_unsaved_feedback()
+        if self.risk_classifier is not None:
+            self.risk_classifier.discard_unsaved_feedback()
+    
+    def _install_bundles(self, batch: _RetrainBatch):
+        """Zamijeni žive modele i upiši bundle-e + feedback history na disk"""
+        bundle = batch.bundles.get("fatigue")
+        if bundle is not None:
+            self.classifier.install_fatigue_model(bundle["model"], bundle["X_encoded"], bundle["y"])
+            logger.info("✅ Fatigue model swapped in")
+        bundle = batch.bundles.get("risk")
+        if bundle is not None:
+            self.risk_classifier.install_bundle(bundle)
+            logger.info("✅ Risk classifier updated with feedback examples")
+        
+        self.classifier.save_feedback_history()
+        if self.risk_classifier is not None:
+            self.risk_classifier.save_feedback()
+    
+    def _commit_retrain(self, batch: Optional[_RetrainBatch],
+                        fitted: bool = True) -> tuple[Optional[datetime], bool]:
+        """
+        ACT (3/3): Fencing provjera, instaliraj i sačuvaj modele, pa označi
+        feedback kao processed i ažuriraj SystemSettings.
+        Vraća: (retrain_datetime, success)
+        """
+        if batch is None:
+            return None, False
+        
+        if not fitted:
+            # Feedback ostaje Processed = 0 - sljedeći tick ga ponovo pokupi
+            logger.warning("⚠️ Retrain fit nije uspio - feedback ostaje neobrađen")
+            self._discard_feedback()
+            return batch.retrain_date, False
+        
+        conn = None
+        try:
+            if self.commit_guard is not None and not self.commit_guard():
+                # Drugi proces je u međuvremenu postao lider - on će obraditi isti feedback.
+                # Ništa nije upisano na disk: dijeljeni bundle i history ostaju njegovi.
+                logger.warning("⚠️ Retrain lease izgubljen prije commit-a - feedback ostaje neobrađen")
+                self._discard_feedback()
+                return batch.retrain_date, False
+            
+            self._install_bundles(batch)
+            
+            conn = get_connection()
+            cursor = conn.cursor()
             
-            if self.risk_classifier is not None and self.risk_classifier.retrain_on_feedback():
-                logger.info("✅ Risk classifier updated with feedback examples")
+            for feedback_id in batch.feedback_ids:
+                # Označi feedback kao processed
+                cursor.execute(
+                    "UPDATE Feedback SET Processed = 1 WHERE Id = ?",
+                    (feedback_id,)
+                )
             
             # 🌟 AŽURIRAJ LASTRETAINDATE U SystemSettings 🌟
             cursor.execute("""
                 UPDATE SystemSettings 
                 SET LastRetrainDate = ?, NewGoldSinceLastTrain = 0
                 WHERE Id = 1
-            """, (retrain_date,))
+            """, (batch.retrain_date,))
             
             conn.commit()
             
-            logger.info(f"✅ Successfully trained on {trained_count}/{len(rows)} examples")
-            logger.info(f"✅ SystemSettings ažuriran (LastRetrainDate = {retrain_date})")
+            trained_count = len(batch.feedback_ids)
+            logger.info(f"✅ Successfully trained on {trained_count}/{batch.total_rows} examples")
+            logger.info(f"✅ SystemSettings ažuriran (LastRetrainDate = {batch.retrain_date})")
             
-            return retrain_date, trained_count > 0
+            return batch.retrain_date, trained_count > 0
             
         except Exception as e:
             logger.error(f"❌ Retrain error: {e}")
-            return retrain_date, False
+            return batch.retrain_date, False
         finally:
             if conn:
                 conn.close()
@@ -309,6 +497,8 @@ class RetrainAgentRunner:
             "db_last_retrain_date": db_retrain_date,
             "is_active": True,
             "feedback_awaiting": self._sense_new_feedback(),
+            "last_fit_seconds": self.last_fit_seconds,
+            "retrain_executor": self.retrain_executor.get_status() if self.retrain_executor else None,
             "time_since_last_retrain": self._get_time_since_last_retrain()
         }
     
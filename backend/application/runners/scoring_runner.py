@@ -1,9 +1,12 @@
 # backend/application/runners/scoring_runner.py
-from typing import Optional
+from typing import List, Optional
 from dataclasses import dataclass
 from domain.entities import SessionStatus
 from application.services.queue_service import QueueService
 from application.services.scoring_service import FatigueScoringService
+from application.services.write_buffer import PredictionWriteBuffer, PendingResult
+from core.metrics import LatencyRegistry
+import asyncio
 import time
 import logging
 
@@ -43,9 +46,12 @@ class ScoringAgentRunner:
     """
     
     def __init__(self, queue_service: QueueService, 
-                 scoring_service: FatigueScoringService):
+                 scoring_service: FatigueScoringService,
+                 write_buffer: Optional[PredictionWriteBuffer] = None):
         self.queue_service = queue_service
         self.scoring_service = scoring_service
+        # Ako postoji, rezultati se upisuju batch-evima (write-behind)
+        self.write_buffer = write_buffer
         
         # Metrics za LEARN fazu
         self.processed_count = 0
@@ -58,36 +64,135 @@ class ScoringAgentRunner:
         self.avg_fatigue_score = 0
         self.avg_confidence = 0
         
+        # Latencija po fazi tick-a: claim (SENSE), think, act, learn, log i cijeli tick
+        self.latency = LatencyRegistry()
+        
     def step(self) -> Optional[ScoringTickResult]:
         """
         Izvrši JEDAN tick agentičkog ciklusa
         Vraća: ScoringTickResult ako ima posla, None ako nema
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # ===== SENSE =====
-        session = self.queue_service.dequeue_next()
+        session = self._sense(start_time)
         if not session:
             return None  # Nema posla
+        t_sensed = time.perf_counter()
         
         # ===== THINK =====
         prediction = self.scoring_service.score_session(session)
         
-        # ===== ACT =====
-        self.queue_service.mark_as_processed(
-            session_id=session.id,
-            action=prediction.action.value,
-            fatigue_score=prediction.fatigue_score,
-            risk_level=prediction.risk_level.value,
-            confidence=prediction.confidence,
-            injury_prob=prediction.injury_prob
+        return self._act_and_learn(session, prediction, start_time, t_sensed)
+    
+    async def step_batch_async(self, limit: int) -> List[ScoringTickResult]:
+        """
+        Do ``limit`` tick-ova odjednom, za scoring petlju sa micro-batcher-om.
+        SENSE (preuzimanje + feature-i) i ACT/LEARN (upis) blokiraju na bazi, pa
+        idu u thread; na event loop-u se čeka samo forward pass modela, koji
+        sve sesije batch-a dijele.
+        """
+        start_time = time.perf_counter()
+        
+        # ===== SENSE =====
+        claimed = await asyncio.to_thread(self._sense_batch, limit, start_time)
+        if not claimed:
+            return []
+        sessions, features = claimed
+        t_sensed = time.perf_counter()
+        
+        # ===== THINK =====
+        predictions = await asyncio.gather(
+            *(self.scoring_service.score_features_async(session, row)
+              for session, row in zip(sessions, features)),
+            return_exceptions=True
         )
         
-        processing_time = (time.time() - start_time) * 1000  # u ms
+        # ===== ACT + LEARN =====
+        return await asyncio.to_thread(self._act_and_learn_batch, sessions, predictions,
+                                       start_time, t_sensed)
+    
+    def _sense_batch(self, limit: int, start_time: float):
+        """SENSE za batch: preuzmi do ``limit`` sesija i pripremi im feature-e (None = nema posla)"""
+        sessions = []
+        while len(sessions) < limit:
+            session = self.queue_service.dequeue_next()
+            if not session:
+                break
+            self.latency.observe("claim", (time.perf_counter() - start_time) * 1000)
+            sessions.append(session)
+        if not sessions:
+            # Nema posla - upiši sve što čeka u bufferu
+            self.flush_pending()
+            return None
+        return sessions, self.scoring_service.prepare_features(sessions)
+    
+    def _act_and_learn_batch(self, sessions, predictions, start_time: float,
+                             t_sensed: float) -> List[ScoringTickResult]:
+        """
+        ACT + LEARN za bodovani batch. Sesija čija predikcija nije uspjela ostaje
+        preuzeta do isteka lease-a; uspješne se upišu, pa se prva greška baci dalje
+        (petlja prelazi na backoff).
+        """
+        results = []
+        errors = []
+        for session, prediction in zip(sessions, predictions):
+            if isinstance(prediction, BaseException):
+                logger.error("❌ Scoring sesije %s nije uspio: %s", session.id, prediction,
+                             extra={"event": "scoring.error", "session_id": session.id})
+                errors.append(prediction)
+                continue
+            results.append(self._act_and_learn(session, prediction, start_time, t_sensed))
+        if errors:
+            raise errors[0]
+        return results
+    
+    def _sense(self, start_time: float):
+        """SENSE: uzmi sljedeću sesiju iz reda (None = nema posla)"""
+        session = self.queue_service.dequeue_next()
+        if not session:
+            # Nema posla - upiši sve što čeka u bufferu
+            self.flush_pending()
+            return None
+        self.latency.observe("claim", (time.perf_counter() - start_time) * 1000)
+        return session
+    
+    def _act_and_learn(self, session, prediction, start_time: float, t_sensed: float) -> ScoringTickResult:
+        """ACT + LEARN za već bodovanu sesiju"""
+        latency = self.latency
+        t_thought = time.perf_counter()
+        latency.observe("think", (t_thought - t_sensed) * 1000)
+        
+        # ===== ACT =====
+        if self.write_buffer is not None:
+            self.write_buffer.add(PendingResult(
+                session_id=session.id,
+                action=prediction.action.value,
+                fatigue_score=prediction.fatigue_score,
+                risk_level=prediction.risk_level.value,
+                confidence=prediction.confidence,
+                injury_prob=prediction.injury_prob
+            ))
+            self.write_buffer.flush_if_due()
+        else:
+            self.queue_service.mark_as_processed(
+                session_id=session.id,
+                action=prediction.action.value,
+                fatigue_score=prediction.fatigue_score,
+                risk_level=prediction.risk_level.value,
+                confidence=prediction.confidence,
+                injury_prob=prediction.injury_prob
+            )
+        
+        t_acted = time.perf_counter()
+        latency.observe("act", (t_acted - t_thought) * 1000)
+        processing_time = (t_acted - start_time) * 1000  # u ms
         
         # ===== LEARN =====
         # OVO JE KLJUČNO! Profesor TRAŽI LEARN FAZU!
         self._learn_from_prediction(prediction, processing_time)
+        t_learned = time.perf_counter()
+        latency.observe("learn", (t_learned - t_acted) * 1000)
         
         result = ScoringTickResult(
             session_id=session.id,
@@ -101,11 +206,21 @@ class ScoringAgentRunner:
             processing_time_ms=processing_time
         )
         
-        logger.info(f"✅ Agent procesirao: {result.player_name} - {result.action} "
-                   f"(fatigue: {result.fatigue_score:.1f}, conf: {result.confidence:.2f})")
+        logger.info("✅ Agent procesirao: %s - %s (fatigue: %.1f, conf: %.2f)",
+                    result.player_name, result.action, result.fatigue_score, result.confidence,
+                    extra={"event": "scoring.tick", "session_id": result.session_id})
+        t_logged = time.perf_counter()
+        latency.observe("log", (t_logged - t_learned) * 1000)
+        latency.observe("tick", (t_logged - start_time) * 1000)
         
         return result
     
+    def flush_pending(self) -> int:
+        """Upiši rezultate koji čekaju u write bufferu (ako ga ima)"""
+        if self.write_buffer is None:
+            return 0
+        return self.write_buffer.flush()
+    
     def _learn_from_prediction(self, prediction, processing_time: float):
         """
         LEARN FAZA - Ažuriraj metrike i uči iz predikcije
@@ -124,18 +239,21 @@ class ScoringAgentRunner:
         # Prati exploration
         if prediction.is_exploring:
             self.exploration_count += 1
-            logger.info(f"🔬 Exploration #{self.exploration_count}: "
-                       f"Tried {prediction.action.value} instead of ML prediction")
+            logger.info("🔬 Exploration #%s: Tried %s instead of ML prediction",
+                        self.exploration_count, prediction.action.value,
+                        extra={"event": "scoring.exploration"})
         
         # Prati low confidence cases
         if prediction.confidence < 0.7:
             self.low_confidence_count += 1
-            logger.warning(f"⚠️ Low confidence prediction: {prediction.confidence:.2f}")
+            logger.warning("⚠️ Low confidence prediction: %.2f", prediction.confidence,
+                           extra={"event": "scoring.low_confidence"})
         
         # Prati review cases
         if prediction.requires_review:
             self.review_needed_count += 1
-            logger.info(f"👁️ Case requires human review (total: {self.review_needed_count})")
+            logger.info("👁️ Case requires human review (total: %s)", self.review_needed_count,
+                        extra={"event": "scoring.review_needed"})
         
         # Log learning insights every 10 sessions
         if self.processed_count % 10 == 0:
@@ -150,11 +268,11 @@ class ScoringAgentRunner:
         
         logger.info("="*70)
         logger.info("📚 LEARNING INSIGHTS:")
-        logger.info(f"   Processed: {self.processed_count} sessions")
-        logger.info(f"   Avg Fatigue: {self.avg_fatigue_score:.1f}")
-        logger.info(f"   Avg Confidence: {self.avg_confidence:.2f}")
-        logger.info(f"   Exploration Rate: {exploration_rate:.1f}%")
-        logger.info(f"   Review Rate: {review_rate:.1f}%")
+        logger.info("   Processed: %s sessions", self.processed_count)
+        logger.info("   Avg Fatigue: %.1f", self.avg_fatigue_score)
+        logger.info("   Avg Confidence: %.2f", self.avg_confidence)
+        logger.info("   Exploration Rate: %.1f%%", exploration_rate)
+        logger.info("   Review Rate: %.1f%%", review_rate)
         logger.info("="*70)
     
     def get_status(self):
@@ -172,5 +290,12 @@ class ScoringAgentRunner:
             "avg_confidence": self.avg_confidence,
             "exploration_count": self.exploration_count,
             "low_confidence_count": self.low_confidence_count,
-            "review_needed_count": self.review_needed_count
+            "review_needed_count": self.review_needed_count,
+            "write_buffer": self.write_buffer.get_status() if self.write_buffer else None,
+            "prediction_cache": self.scoring_service.get_cache_status(),
+            "inference_batcher": self.scoring_service.get_batcher_status(),
+            "latency": {
+                "runner": self.latency.snapshot(),
+                "scoring": self.scoring_service.get_latency_status(),
+            }
         }
\ No newline at end of file
@@ -0,0 +1,305 @@
+# backend/application/services/cluster_coordinator.py
+"""
+Koordinacija više API/agent procesa nad istim redom (npr. ``uvicorn --workers N``).
+
+- **Scoring** radi u svakom procesu: claim je lease (``QueueService``), pa se
+  sesija nikad ne boduje dva puta.
+- **Retrain** radi samo lider. Liderstvo je lease red u ``AgentLeases``
+  (Role = 'retrain'): proces ga uzme ili obnovi jednim atomskim UPDATE-om ako
+  je red slobodan, istekao ili već njegov. ``Epoch`` se povećava pri svakoj
+  promjeni lidera i služi kao fencing token - commit retrain-a i objava
+  modela prolaze samo ako proces još drži lease sa istim epoch-om.
+- **Distribucija modela**: lider upisuje bundle na disk (``atomic_dump``) i
+  poveća ``SystemSettings.ModelGeneration``; ostali procesi na heartbeat-u
+  vide novu generaciju i ponovo učitaju bundle (``reload_from_disk``).
+- **Status**: svaki proces periodično upisuje heartbeat (brojači + kratki
+  JSON status) u ``AgentHeartbeats``; ``cluster_status`` ih agregira.
+
+Sva vremena su iz baze (GETDATE()), pa razlika satova između procesa ne utiče
+na istek lease-a.
+"""
+import json
+import logging
+from typing import Any, Dict, Optional
+from infrastructure.database import get_connection
+
+logger = logging.getLogger(__name__)
+
+RETRAIN_ROLE = "retrain"
+DEFAULT_LEADER_LEASE_SECONDS = 30
+DEFAULT_HEARTBEAT_INTERVAL = 5.0
+
+
+class ClusterCoordinator:
+    """Leader election (DB lease red), generacija modela i heartbeat jednog procesa"""
+
+    def __init__(self, worker_id: str,
+                 lease_seconds: int = DEFAULT_LEADER_LEASE_SECONDS,
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+                 role: str = RETRAIN_ROLE):
+        self.worker_id = worker_id
+        self.lease_seconds = int(lease_seconds)
+        self.heartbeat_interval = heartbeat_interval
+        self.role = role
+
+        # Stanje ovog procesa
+        self.is_leader = False
+        self.epoch: Optional[int] = None
+        self.model_generation: Optional[int] = None
+
+        # Metrike
+        self.elections_won = 0
+        self.leadership_lost = 0
+        self.model_reloads = 0
+        self.models_published = 0
+        self.errors = 0
+        self.last_heartbeat_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Leader election
+    # ------------------------------------------------------------------
+
+    def acquire_or_renew(self) -> bool:
+        """Uzmi lease ako je slobodan/istekao ili ga obnovi ako je naš; vraća da li smo lider"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            # SET izrazi vide stare vrijednosti reda, pa CASE zna da li se lider mijenja
+            cursor.execute("""
+                UPDATE AgentLeases
+                SET Epoch = CASE WHEN HolderId = ? THEN Epoch ELSE Epoch + 1 END,
+                    AcquiredAt = CASE WHEN HolderId = ? THEN AcquiredAt ELSE GETDATE() END,
+                    HolderId = ?,
+                    ExpiresAt = DATEADD(SECOND, ?, GETDATE())
+                OUTPUT inserted.Epoch
+                WHERE Role = ?
+                  AND (HolderId = ? OR HolderId IS NULL OR ExpiresAt < GETDATE())
+            """, (self.worker_id, self.worker_id, self.worker_id, self.lease_seconds,
+                  self.role, self.worker_id))
+            row = cursor.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self._lose_leadership("lease nije obnovljen")
+            raise
+        finally:
+            conn.close()
+
+        if row is None:
+            self._lose_leadership("lease drži drugi proces")
+            return False
+
+        epoch = int(row[0])
+        if not self.is_leader or epoch != self.epoch:
+            self.elections_won += 1
+            logger.info(f"👑 {self.worker_id} je retrain lider (epoch {epoch})")
+        self.is_leader = True
+        self.epoch = epoch
+        return True
+
+    def _lose_leadership(self, reason: str):
+        if self.is_leader:
+            self.leadership_lost += 1
+            logger.warning(f"⚠️ {self.worker_id} više nije retrain lider: {reason}")
+        self.is_leader = False
+
+    def still_leader(self) -> bool:
+        """Fencing provjera prije commit-a retrain-a: lease je naš, sa istim epoch-om, i nije istekao"""
+        if not self.is_leader or self.epoch is None:
+            return False
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT 1 FROM AgentLeases
+                WHERE Role = ? AND HolderId = ? AND Epoch = ? AND ExpiresAt > GETDATE()
+            """, (self.role, self.worker_id, self.epoch))
+            held = cursor.fetchone() is not None
+        finally:
+            conn.close()
+        if not held:
+            self._lose_leadership("lease istekao ili preuzet")
+        return held
+
+    def release(self):
+        """Oslobodi lease (gašenje procesa) - sljedeći proces ga preuzima odmah, bez čekanja isteka"""
+        if not self.is_leader:
+            return
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE AgentLeases SET HolderId = NULL, ExpiresAt = NULL
+                WHERE Role = ? AND HolderId = ? AND Epoch = ?
+            """, (self.role, self.worker_id, self.epoch))
+            conn.commit()
+        finally:
+            conn.close()
+        self.is_leader = False
+        logger.info(f"👑 {self.worker_id} oslobodio retrain lease")
+
+    # ------------------------------------------------------------------
+    # Distribucija modela
+    # ------------------------------------------------------------------
+
+    def read_model_generation(self) -> int:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ModelGeneration FROM SystemSettings WHERE Id = 1")
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] is not None else 0
+        finally:
+            conn.close()
+
+    def publish_model(self) -> Optional[int]:
+        """Lider: objavi da je novi bundle na disku. Vraća novu generaciju (None ako nismo lider)."""
+        if not self.is_leader or self.epoch is None:
+            return None
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE SystemSettings
+                SET ModelGeneration = ModelGeneration + 1
+                OUTPUT inserted.ModelGeneration
+                WHERE Id = 1 AND EXISTS (
+                    SELECT 1 FROM AgentLeases
+                    WHERE Role = ? AND HolderId = ? AND Epoch = ? AND ExpiresAt > GETDATE()
+                )
+            """, (self.role, self.worker_id, self.epoch))
+            row = cursor.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if row is None:
+            self._lose_leadership("objava modela odbijena (fencing)")
+            return None
+        self.model_generation = int(row[0])
+        self.models_published += 1
+        logger.info(f"📦 Objavljena generacija modela {self.model_generation}")
+        return self.model_generation
+
+    # ------------------------------------------------------------------
+    # Heartbeat + agregirani status
+    # ------------------------------------------------------------------
+
+    def heartbeat(self, processed_count: int, model_version: Optional[str], status: Dict[str, Any]):
+        """Upiši (upsert) heartbeat ovog procesa"""
+        payload = json.dumps(status, default=str)
+        role = "leader" if self.is_leader else "worker"
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                MERGE AgentHeartbeats WITH (HOLDLOCK) AS t
+                USING (SELECT ? AS WorkerId) AS s ON t.WorkerId = s.WorkerId
+                WHEN MATCHED THEN UPDATE SET
+                    Role = ?, LastSeenAt = GETDATE(), ProcessedCount = ?,
+                    ModelVersion = ?, ModelGeneration = ?, StatusJson = ?
+                WHEN NOT MATCHED THEN INSERT
+                    (WorkerId, Role, StartedAt, LastSeenAt, ProcessedCount, ModelVersion, ModelGeneration, StatusJson)
+                    VALUES (?, ?, GETDATE(), GETDATE(), ?, ?, ?, ?);
+            """, (self.worker_id,
+                  role, processed_count, model_version, self.model_generation, payload,
+                  self.worker_id, role, processed_count, model_version, self.model_generation, payload))
+            if self.is_leader:
+                # Lider čisti procese koji se odavno nisu javili
+                cursor.execute("""
+                    DELETE FROM AgentHeartbeats
+                    WHERE LastSeenAt < DATEADD(SECOND, ?, GETDATE())
+                """, (-int(self.heartbeat_interval * 100),))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def remove_heartbeat(self):
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM AgentHeartbeats WHERE WorkerId = ?", (self.worker_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def cluster_status(self) -> Dict[str, Any]:
+        """Agregat svih živih procesa (heartbeat mlađi od 3 intervala) + stanje lease-a"""
+        stale_after = max(int(self.heartbeat_interval * 3), 1)
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT WorkerId, Role, StartedAt, LastSeenAt, ProcessedCount,
+                       ModelVersion, ModelGeneration, StatusJson,
+                       DATEDIFF(SECOND, LastSeenAt, GETDATE())
+                FROM AgentHeartbeats
+                WHERE LastSeenAt >= DATEADD(SECOND, ?, GETDATE())
+                ORDER BY WorkerId
+            """, (-stale_after,))
+            rows = cursor.fetchall()
+            cursor.execute("""
+                SELECT HolderId, Epoch, AcquiredAt, ExpiresAt,
+                       CASE WHEN ExpiresAt > GETDATE() THEN 1 ELSE 0 END
+                FROM AgentLeases WHERE Role = ?
+            """, (self.role,))
+            lease = cursor.fetchone()
+        finally:
+            conn.close()
+
+        workers = []
+        for worker_id, role, started_at, last_seen_at, processed, version, generation, payload, age_s in rows:
+            try:
+                status = json.loads(payload) if payload else {}
+            except ValueError:
+                status = {}
+            workers.append({
+                "worker_id": worker_id,
+                "role": role,
+                "started_at": started_at,
+                "last_seen_at": last_seen_at,
+                "seconds_since_heartbeat": age_s,
+                "processed_count": int(processed or 0),
+                "model_version": version,
+                "model_generation": generation,
+                "status": status,
+            })
+
+        return {
+            "workers_alive": len(workers),
+            "processed_count": sum(w["processed_count"] for w in workers),
+            "retrain_count": sum(int(w["status"].get("retrain_count") or 0) for w in workers),
+            "write_buffer_pending": sum(int(w["status"].get("write_buffer_pending") or 0) for w in workers),
+            "model_versions": sorted({w["model_version"] for w in workers if w["model_version"]}),
+            "model_generations": sorted({w["model_generation"] for w in workers if w["model_generation"] is not None}),
+            "leader": {
+                "worker_id": lease[0] if lease else None,
+                "epoch": int(lease[1]) if lease else None,
+                "acquired_at": lease[2] if lease else None,
+                "expires_at": lease[3] if lease else None,
+                "valid": bool(lease[4]) if lease else False,
+            },
+            "workers": workers,
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """Status ovog procesa u clusteru (bez upita u bazu)"""
+        return {
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "epoch": self.epoch,
+            "model_generation": self.model_generation,
+            "lease_seconds": self.lease_seconds,
+            "heartbeat_interval_s": self.heartbeat_interval,
+            "elections_won": self.elections_won,
+            "leadership_lost": self.leadership_lost,
+            "model_reloads": self.model_reloads,
+            "models_published": self.models_published,
+            "errors": self.errors,
+            "last_heartbeat_at": self.last_heartbeat_at,
+        }
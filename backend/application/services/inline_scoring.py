@@ -0,0 +1,210 @@
+# backend/application/services/inline_scoring.py
+"""
+Sinhroni scoring za ``POST /score`` - odgovor odmah, bez reda i scoring petlje.
+
+Zahtjevi koji stignu istovremeno se skupljaju u micro-batch: prvi zahtjev
+zakaže izvršavanje batch-a za ``max_wait_ms`` (0 = na sljedećoj iteraciji
+event loop-a, bez dodatnog čekanja), a pun batch (``max_batch``) se izvršava
+odmah. Batch ide kroz ``FatigueScoringService.score_batch`` - svaki model se
+pozove jednom za cijeli batch, a cache izlaza modela važi i ovdje.
+
+Bez eksploracije: trener na klupi dobija odluku modela, ne nasumičnu akciju.
+
+Upis u bazu je naknadan (``ScoredSessionWriteBuffer``, batch INSERT kao
+``processed`` sa RequestId); flush radi u threadu, van event loop-a. Klijent
+dobija ``request_id`` i preko ``GET /score/{request_id}`` kasnije saznaje Id
+sesije (npr. za feedback).
+"""
+import asyncio
+import time
+import uuid
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from domain.entities import TrainingSession, FatiguePrediction
+from application.services.queue_service import LANE_PRIORITY
+from application.services.scoring_service import FatigueScoringService
+from application.services.write_buffer import ScoredSessionWriteBuffer, PendingScoredSession
+from core.metrics import LatencyRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCORE_P99_TARGET_MS = 25.0
+
+
+@dataclass
+class InlineScoreResult:
+    """Predikcija za jedan POST /score zahtjev"""
+    request_id: str
+    prediction: FatiguePrediction
+    model_version: str
+    batch_size: int
+    queued_ms: float
+
+
+class InlineScoringService:
+    """Micro-batcher nad FatigueScoringService + write-behind upis rezultata"""
+
+    def __init__(self, scoring_service: FatigueScoringService,
+                 write_buffer: Optional[ScoredSessionWriteBuffer] = None,
+                 max_batch: int = 32, max_wait_ms: float = 0.0,
+                 p99_target_ms: float = DEFAULT_SCORE_P99_TARGET_MS):
+        self.scoring_service = scoring_service
+        self.write_buffer = write_buffer
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait_ms = max(float(max_wait_ms), 0.0)
+        self.p99_target_ms = p99_target_ms
+
+        # (sesija, future, vrijeme prijave) - pristup samo iz event loop-a
+        self._pending: List[Tuple[TrainingSession, asyncio.Future, float]] = []
+        self._scheduled: Optional[asyncio.Handle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_loop_task: Optional[asyncio.Task] = None
+
+        # Latencija: wait (u micro-batch-u), batch (score_batch), total (prijava -> odgovor)
+        self.latency = LatencyRegistry()
+
+        # Metrike
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.errors = 0
+
+    async def score(self, session: TrainingSession) -> InlineScoreResult:
+        """Boduj sesiju (zajedno sa istovremenim zahtjevima) i vrati rezultat odmah"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((session, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._run_batch()
+        elif self._scheduled is None:
+            if self.max_wait_ms > 0:
+                self._scheduled = loop.call_later(self.max_wait_ms / 1000.0, self._run_batch)
+            else:
+                self._scheduled = loop.call_soon(self._run_batch)
+        return await future
+
+    def _run_batch(self):
+        """Izvrši sve što čeka u jednom score_batch pozivu i razriješi future-e"""
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            predictions = self.scoring_service.score_batch([session for session, _, _ in batch])
+            version = self.scoring_service.model_version()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Greška u /score batch-u ({len(batch)} sesija): {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        latency = self.latency
+        latency.observe("batch", (finished - started) * 1000.0)
+        self.batches += 1
+        self.requests += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+        for (session, future, queued_at), prediction in zip(batch, predictions):
+            request_id = str(uuid.uuid4())
+            if self.write_buffer is not None:
+                self.write_buffer.add(self._pending_row(session, prediction, request_id))
+            queued_ms = (started - queued_at) * 1000.0
+            latency.observe("wait", queued_ms)
+            latency.observe("total", (finished - queued_at) * 1000.0)
+            if not future.done():
+                future.set_result(InlineScoreResult(request_id, prediction, version, len(batch), queued_ms))
+
+        if self.write_buffer is not None and self.write_buffer.is_due():
+            self._schedule_flush()
+
+    @staticmethod
+    def _pending_row(session: TrainingSession, prediction: FatiguePrediction,
+                     request_id: str) -> PendingScoredSession:
+        return PendingScoredSession(
+            timestamp=session.timestamp,
+            player_name=session.player_name,
+            position=session.position.value,
+            activity_type=session.activity_type.value,
+            sleep_hours=session.sleep_hours,
+            stress_level=session.stress_level,
+            distance_km=session.distance_km,
+            sprint_count=session.sprint_count,
+            soreness=session.soreness,
+            rpe=session.rpe,
+            injury_illness=session.injury_illness,
+            priority=LANE_PRIORITY[session.priority],
+            action=prediction.action.value,
+            fatigue_score=prediction.fatigue_score,
+            risk_level=prediction.risk_level.value,
+            confidence=prediction.confidence,
+            injury_prob=prediction.injury_prob,
+            request_id=request_id,
+        )
+
+    # ------------------------------------------------------------------
+    # Upis u pozadini
+    # ------------------------------------------------------------------
+
+    def _schedule_flush(self):
+        """Flush u threadu (DB I/O ne blokira event loop); najviše jedan u isto vrijeme"""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._flush_task = asyncio.ensure_future(asyncio.to_thread(self.write_buffer.flush))
+
+    async def _run_flush_loop(self):
+        """Upiši rezultate koji čekaju duže od max_delay_ms i kad nema novih zahtjeva"""
+        interval = max(self.write_buffer.max_delay_ms / 1000.0, 0.01)
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                if self.write_buffer.is_due():
+                    self._schedule_flush()
+        except asyncio.CancelledError:
+            pass
+
+    def start(self):
+        if self.write_buffer is not None and self._flush_loop_task is None:
+            self._flush_loop_task = asyncio.create_task(self._run_flush_loop())
+
+    async def stop(self):
+        """Zaustavi flush petlju i upiši sve što još čeka"""
+        if self._flush_loop_task is not None:
+            self._flush_loop_task.cancel()
+            try:
+                await self._flush_loop_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_loop_task = None
+        if self._flush_task is not None:
+            try:
+                await self._flush_task
+            except Exception:
+                pass
+        if self.write_buffer is not None:
+            await asyncio.to_thread(self.write_buffer.flush)
+
+    def get_status(self) -> dict:
+        total = self.latency.histogram("total").snapshot()
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_ms,
+            "errors": self.errors,
+            "p99_ms": total["p99_ms"],
+            "p99_target_ms": self.p99_target_ms,
+            "within_target": total["p99_ms"] <= self.p99_target_ms,
+            "write_buffer": self.write_buffer.get_status() if self.write_buffer else None,
+            "latency": self.latency.snapshot(),
+        }
@@ -0,0 +1,182 @@
+# backend/application/services/loop_controller.py
+"""
+Adaptivni kontroler scoring petlje (batch size + pauza između batch-eva).
+
+Umjesto fiksnih pauza (0.05 s poslije posla, 2 s kad nema posla, 5 s poslije
+greške) petlja nakon svakog batch-a pita kontroler koliko sesija da uzme
+sljedeći put i koliko da čeka:
+
+- **Backlog** (batch je bio pun ili je red dublji od batch-a): batch raste
+  aditivno (+``additive_step``) dok batch traje kraće od ``target_batch_ms``;
+  kad ga pređe, batch se prepolovi (AIMD). Gornja granica je i procjena
+  ``target_batch_ms / ms_po_sesiji``, pa skok u vremenu obrade odmah smanjuje
+  batch. Između batch-eva nema pauze (samo yield event loop-u).
+- **Red ispražnjen** (batch nije bio pun): kratka pauza ``min_poll_s``.
+- **Prazan red**: pauza se udvostručuje do ``max_poll_s``, batch se polovi;
+  prva sesija poslije mirovanja vraća pauzu na minimum.
+- **Greška**: eksponencijalni backoff sa jitter-om
+  (``error_base_s * 2^(n-1)``, najviše ``error_max_s``, nasumično u
+  [pola, cijelo]), batch se vraća na minimum.
+
+Batch se izvršava van event loop-a (worker thread, a sa micro-batcher-om se na
+loop-u čeka samo forward pass), pa ``target_batch_ms`` ograničava koliko dugo
+rezultati čekaju upis i koliko brzo petlja reaguje na stop. Dubina reda
+(``depth_probe``, COUNT upit nad bazom) se čita preko ``refresh_depth`` iz
+threada; ``on_batch`` samo koristi zadnju pročitanu vrijednost.
+"""
+import random
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveLoopController:
+    """AIMD batch size + eksponencijalni idle/error backoff za scoring petlju"""
+
+    def __init__(self, min_batch: int = 1, max_batch: int = 64,
+                 additive_step: int = 2, decrease_factor: float = 0.5,
+                 target_batch_ms: float = 100.0,
+                 min_poll_s: float = 0.01, max_poll_s: float = 2.0,
+                 error_base_s: float = 0.5, error_max_s: float = 30.0,
+                 depth_probe: Optional[Callable[[], int]] = None,
+                 depth_refresh_s: float = 2.0,
+                 rng: Optional[random.Random] = None):
+        self.min_batch = max(int(min_batch), 1)
+        self.max_batch = max(int(max_batch), self.min_batch)
+        self.additive_step = max(int(additive_step), 1)
+        self.decrease_factor = decrease_factor
+        self.target_batch_ms = target_batch_ms
+        self.min_poll_s = min_poll_s
+        self.max_poll_s = max_poll_s
+        self.error_base_s = error_base_s
+        self.error_max_s = error_max_s
+        self.depth_probe = depth_probe
+        self.depth_refresh_s = depth_refresh_s
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+        # Trenutne postavke
+        self.batch_size = self.min_batch
+        self.poll_interval_s = self.min_poll_s
+        self.last_delay_s = 0.0
+        self.mode = "idle"
+        self.error_streak = 0
+
+        # Opažanja
+        self.queue_depth: Optional[int] = None
+        self._depth_at = 0.0
+        self.ms_per_session: Optional[float] = None  # EWMA
+        self.last_batch_ms = 0.0
+        self.last_processed = 0
+
+        # Metrike
+        self.batches = 0
+        self.increases = 0
+        self.decreases = 0
+        self.errors = 0
+
+    def refresh_depth(self):
+        """Dubina reda iz depth_probe, najviše jednom u depth_refresh_s.
+
+        depth_probe blokira (upit nad bazom) - zvati iz threada, ne sa event loop-a.
+        """
+        if self.depth_probe is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._depth_at < self.depth_refresh_s:
+                return
+            self._depth_at = now
+        try:
+            depth = int(self.depth_probe())
+        except Exception as e:
+            logger.warning(f"⚠️ Dubina reda nedostupna: {e}")
+            return
+        with self._lock:
+            self.queue_depth = depth
+
+    def _decrease(self):
+        shrunk = max(self.min_batch, int(self.batch_size * self.decrease_factor))
+        if shrunk < self.batch_size:
+            self.batch_size = shrunk
+            self.decreases += 1
+
+    def on_batch(self, processed: int, elapsed_s: float) -> float:
+        """Zabilježi završen batch; vraća pauzu (s) prije sljedećeg"""
+        with self._lock:
+            self.batches += 1
+            self.error_streak = 0
+            self.last_processed = processed
+            self.last_batch_ms = elapsed_s * 1000.0
+
+            if processed == 0:
+                # Prazan red: rijeđe provjeravaj, manji batch
+                if self.mode == "idle":
+                    self.poll_interval_s = min(self.max_poll_s, self.poll_interval_s * 2)
+                else:
+                    self.poll_interval_s = self.min_poll_s
+                self.mode = "idle"
+                self._decrease()
+                self.queue_depth = 0
+                self.last_delay_s = self.poll_interval_s
+                return self.last_delay_s
+
+            per_session = self.last_batch_ms / processed
+            self.ms_per_session = (per_session if self.ms_per_session is None
+                                   else 0.8 * self.ms_per_session + 0.2 * per_session)
+            self.poll_interval_s = self.min_poll_s
+
+            backlog = processed >= self.batch_size or (self.queue_depth or 0) > self.batch_size
+            if self.last_batch_ms > self.target_batch_ms:
+                # Batch traje predugo -> multiplikativno smanjenje
+                self._decrease()
+            elif backlog:
+                budget = max(self.min_batch, int(self.target_batch_ms / max(self.ms_per_session, 1e-3)))
+                grown = min(self.batch_size + self.additive_step, self.max_batch, budget)
+                if grown > self.batch_size:
+                    self.batch_size = grown
+                    self.increases += 1
+
+            self.mode = "backlog" if backlog else "draining"
+            self.last_delay_s = 0.0 if backlog else self.poll_interval_s
+            return self.last_delay_s
+
+    def on_error(self) -> float:
+        """Zabilježi grešku; vraća backoff (s) sa jitter-om"""
+        with self._lock:
+            self.errors += 1
+            self.error_streak += 1
+            self.batch_size = self.min_batch
+            self.mode = "error_backoff"
+            delay = min(self.error_max_s, self.error_base_s * 2 ** (self.error_streak - 1))
+            self.last_delay_s = self._rng.uniform(delay / 2, delay)
+            return self.last_delay_s
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "batch_size": self.batch_size,
+                "poll_interval_s": self.poll_interval_s,
+                "last_delay_s": self.last_delay_s,
+                "last_batch_ms": self.last_batch_ms,
+                "last_processed": self.last_processed,
+                "ms_per_session": self.ms_per_session,
+                "queue_depth": self.queue_depth,
+                "error_streak": self.error_streak,
+                "batches": self.batches,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "errors": self.errors,
+                "limits": {
+                    "min_batch": self.min_batch,
+                    "max_batch": self.max_batch,
+                    "target_batch_ms": self.target_batch_ms,
+                    "min_poll_s": self.min_poll_s,
+                    "max_poll_s": self.max_poll_s,
+                    "error_max_s": self.error_max_s,
+                },
+            }
@@ -0,0 +1,214 @@
+# backend/application/services/player_load_service.py
+"""
+Player load feature-i (ACWR, monotonija, strain) za scoring i retrain.
+
+Agregati žive u memoriji (``PlayerLoadStore``, O(1) po sesiji). Izvor istine
+je tabela TrainingSessions: servis čita samo nove redove (Id > zadnji viđeni),
+pa svaki proces u cluster modu vidi sve sesije - i one koje su bodovali drugi
+procesi ili POST /score.
+
+Agregati sesije su uvijek oni na dan te sesije, odmah poslije nje - isto kao
+u treningu (``player_load_feature_frame``), bez sesija upisanih poslije nje:
+
+* Pri dočitavanju se za svaki red zapamte agregati odmah poslije njega
+  (zadnjih ``recent_sessions`` Id-eva). Sesija iz reda je već u bazi kad se
+  boduje: ako je njen Id iza zadnjeg pročitanog, prvo se dočitaju novi redovi
+  (jedan upit pokrije i sesije koje čekaju iza nje), pa se uzmu njeni agregati.
+* Sesija bez Id-a (POST /score, /predict) dobija ``preview`` - agregate sa
+  tom sesijom, bez upisa u store; u store ulazi iz baze kad je write buffer upiše.
+* Starije sesije (feedback, replay, sesije pročitane prije restarta) dobijaju
+  ``features_as_of``: sesije igrača do njenog Id-a i dana iz baze, odigrane
+  kroz novi store (jedan upit za cijeli batch).
+
+Snapshot (.npz pored modela) se čuva svakih ``save_every`` pročitanih
+sesija i pri gašenju agenata; pri startu se učita, pa se dočitaju samo redovi
+upisani poslije njega. Bez snapshot-a se čita zadnjih 56 dana (LOOKBACK_DAYS).
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+from domain.entities import TrainingSession
+from infrastructure.ml.player_load import PlayerLoadStore, LOOKBACK_DAYS, player_load_as_of, session_day
+
+logger = logging.getLogger(__name__)
+
+
+class PlayerLoadService:
+    """Inkrementalni player load agregati, dopunjavani iz TrainingSessions"""
+
+    def __init__(self, queue_service, snapshot_path: Optional[str] = None,
+                 save_every: int = 500, read_chunk: int = 5000, recent_sessions: int = 20000):
+        self.queue_service = queue_service
+        self.snapshot_path = snapshot_path
+        self.save_every = max(int(save_every), 1)
+        self.read_chunk = max(int(read_chunk), 1)
+        self.recent_sessions = max(int(recent_sessions), 1)
+        self.store = PlayerLoadStore()
+        # Id sesije -> agregati odmah poslije nje (zapamćeni pri dočitavanju)
+        self._recent: "OrderedDict[int, List[float]]" = OrderedDict()
+        self._catch_up_lock = threading.Lock()
+        self._unsaved = 0
+
+        # Metrike
+        self.catch_ups = 0
+        self.rows_read = 0
+        self.previews = 0
+        self.as_of_sessions = 0
+        self.errors = 0
+        self.last_catch_up_ms = 0.0
+        self.snapshots_saved = 0
+
+    def start(self):
+        """Učitaj snapshot (ako postoji) i dočitaj sesije upisane poslije njega"""
+        self.load_snapshot()
+        try:
+            rows = self.catch_up()
+            logger.info(f"🏃 Player load: {len(self.store)} igrača, dočitano {rows} sesija")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Player load agregati nisu dočitani iz baze: {e}")
+
+    def load_snapshot(self) -> bool:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            store = PlayerLoadStore.load(self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Player load snapshot nije učitan: {e}")
+            return False
+        with self._catch_up_lock:
+            self.store = store
+            self._recent.clear()
+            self._unsaved = 0
+        logger.info(f"✓ Player load snapshot učitan ({len(store)} igrača, do sesije #{store.last_session_id})")
+        return True
+
+    def save(self) -> bool:
+        """Sačuvaj snapshot (atomski; u cluster modu bilo koji proces ima ispravno stanje)"""
+        if not self.snapshot_path:
+            return False
+        try:
+            self.store.save(self.snapshot_path)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Player load snapshot nije sačuvan: {e}")
+            return False
+        self._unsaved = 0
+        self.snapshots_saved += 1
+        return True
+
+    def catch_up(self, until_id: Optional[int] = None) -> int:
+        """Dočitaj nove sesije iz baze u store; vraća broj pročitanih redova.
+
+        ``until_id``: ništa se ne čita ako je sesija sa tim Id-om već viđena
+        (npr. dočitao ju je drugi thread dok je ovaj čekao lock).
+        """
+        with self._catch_up_lock:
+            store = self.store
+            if until_id is not None and until_id <= store.last_session_id:
+                return 0
+            started = time.perf_counter()
+            since = datetime.now() - timedelta(days=LOOKBACK_DAYS)
+            if store.last_session_id == 0 and len(store) == 0:
+                # Prazan store: agregati su tačni tek za sesije sa LOOKBACK_DAYS istorije iza sebe
+                store.history_start = session_day(since)
+            total = 0
+            while True:
+                rows = self.queue_service.read_load_rows(store.last_session_id, since, self.read_chunk)
+                for session_id, player_name, timestamp, distance_km, rpe in rows:
+                    if player_name:
+                        features = store.observe_features(player_name, timestamp, distance_km, rpe)
+                        if features is not None:
+                            self._recent[int(session_id)] = features
+                    store.last_session_id = max(store.last_session_id, int(session_id))
+                while len(self._recent) > self.recent_sessions:
+                    self._recent.popitem(last=False)
+                total += len(rows)
+                if len(rows) < self.read_chunk:
+                    break
+            self.catch_ups += 1
+            self.rows_read += total
+            self.last_catch_up_ms = (time.perf_counter() - started) * 1000.0
+            self._unsaved += total
+        if self._unsaved >= self.save_every:
+            self.save()
+        return total
+
+    def features_for(self, session: TrainingSession) -> List[float]:
+        """PLAYER_LOAD_FEATURES za sesiju koja se boduje (uključujući nju)"""
+        return self.features_for_sessions([session])[0]
+
+    def features_for_sessions(self, sessions: Sequence[TrainingSession]) -> List[List[float]]:
+        """PLAYER_LOAD_FEATURES za batch sesija - na dan svake sesije, odmah poslije nje"""
+        newest = max((s.id for s in sessions if s.id is not None), default=None)
+        if newest is not None and newest > self.store.last_session_id:
+            try:
+                self.catch_up(until_id=newest)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Player load: nove sesije nisu dočitane ({e}) - koristim preview")
+        
+        results: List[Optional[List[float]]] = [None] * len(sessions)
+        older = []
+        for i, session in enumerate(sessions):
+            if session.id is None or session.id > self.store.last_session_id:
+                self.previews += 1
+                results[i] = self.store.preview(session.player_name, session.timestamp,
+                                                session.distance_km, session.rpe)
+            else:
+                results[i] = self._recent.get(session.id)
+                if results[i] is None:
+                    older.append(i)
+        
+        if older:
+            keys = [(sessions[i].id, sessions[i].player_name, sessions[i].timestamp) for i in older]
+            try:
+                as_of = self.features_as_of(keys)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Player load: agregati na dan sesije nisu pročitani ({e}) - koristim trenutne")
+                as_of = [self.store.features(sessions[i].player_name) for i in older]
+            for i, features in zip(older, as_of):
+                results[i] = features
+        return results
+
+    def features_as_of(self, sessions: Sequence[tuple]) -> List[List[float]]:
+        """Agregati za (session_id, player_name, timestamp) kao u treningu: sesije igrača
+        sa Id <= session_id do kraja dana sesije, iz baze, odigrane po datumu."""
+        if not sessions:
+            return []
+        days = [session_day(timestamp) for _, _, timestamp in sessions]
+        since = datetime.fromordinal(min(days) - LOOKBACK_DAYS + 1)
+        until = datetime.fromordinal(max(days) + 1)
+        rows = self.queue_service.read_player_load_rows(
+            [player for _, player, _ in sessions], since, until,
+            max(session_id for session_id, _, _ in sessions)
+        )
+        by_player = defaultdict(list)
+        for session_id, player_name, timestamp, distance_km, rpe in rows:
+            by_player[player_name].append((int(session_id), timestamp, distance_km, rpe))
+        
+        results = []
+        for session_id, player_name, timestamp in sessions:
+            history = [row[1:] for row in by_player.get(player_name, ()) if row[0] <= session_id]
+            results.append(player_load_as_of(history, timestamp))
+        self.as_of_sessions += len(sessions)
+        return results
+
+    def get_status(self) -> dict:
+        return {
+            **self.store.get_status(),
+            "catch_ups": self.catch_ups,
+            "rows_read": self.rows_read,
+            "previews": self.previews,
+            "as_of_sessions": self.as_of_sessions,
+            "recent_sessions": len(self._recent),
+            "errors": self.errors,
+            "last_catch_up_ms": self.last_catch_up_ms,
+            "snapshot_path": self.snapshot_path,
+            "snapshots_saved": self.snapshots_saved,
+        }
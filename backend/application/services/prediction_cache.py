@@ -0,0 +1,112 @@
+# backend/application/services/prediction_cache.py
+"""
+LRU cache izlaza modela za ponovljene feature vektore.
+
+Wellness ulazi su grubi (stress/soreness/RPE 1-10, san u četvrtinama sata,
+4 pozicije), pa se isti vektor često ponavlja kroz tim i kroz dane. Ključ je
+(verzija modela, kvantizovani enkodirani vektor); vrijednost su izlazi sva tri
+modela (fatigue, confidence, injury_prob, risk_level), pa pogodak preskače
+MLP, injury LR i risk LR.
+
+Kad se verzija modela promijeni (retrain, hot reload) cache se briše.
+"""
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from domain.entities import RiskLevel
+
+logger = logging.getLogger(__name__)
+
+# Korak kvantizacije po koloni enkodiranog vektora:
+# position, activity, sleep, stress, distance_km, sprint_count, soreness, rpe
+# (+ player load: acute_distance_km, acwr_distance, acwr_load, monotony, strain)
+DEFAULT_QUANT_STEPS = (1.0, 1.0, 0.25, 1.0, 0.01, 1.0, 1.0, 1.0,
+                       0.1, 0.01, 0.01, 0.01, 1.0)
+
+
+@dataclass(frozen=True)
+class CachedOutputs:
+    """Izlazi modela za jedan feature vektor"""
+    fatigue_score: float
+    confidence: float
+    injury_prob: float
+    risk_level: RiskLevel
+
+
+class PredictionCache:
+    """Ograničeni LRU cache sa hit/miss metrikama"""
+
+    def __init__(self, max_size: int = 4096, quant_steps: Sequence[float] = DEFAULT_QUANT_STEPS):
+        self.max_size = max(int(max_size), 1)
+        self.quant_steps = np.asarray(quant_steps, dtype=float)
+        self._entries: "OrderedDict[tuple, CachedOutputs]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        # Metrike
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, encoded: np.ndarray) -> Tuple[int, ...]:
+        """Kvantizuj enkodirani vektor u hashable ključ (cijeli brojevi koraka)"""
+        encoded = np.asarray(encoded, dtype=float)
+        steps = self.quant_steps[:len(encoded)]
+        return tuple(np.rint(encoded / steps).astype(np.int64).tolist())
+
+    def ensure_version(self, model_version: str):
+        """Obriši cache ako se model promijenio od zadnjeg poziva"""
+        with self._lock:
+            if self._version == model_version:
+                return
+            if self._version is not None:
+                self.invalidations += 1
+                logger.info(f"🧹 Prediction cache obrisan (model {self._version} → {model_version}, "
+                            f"{len(self._entries)} unosa)")
+            self._entries.clear()
+            self._version = model_version
+
+    def get(self, key: tuple) -> Optional[CachedOutputs]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: CachedOutputs, model_version: Optional[str] = None):
+        """Upiši izlaze; sa ``model_version`` samo ako cache još pripada toj verziji modela"""
+        with self._lock:
+            if model_version is not None and model_version != self._version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self.invalidations += 1
+
+    def get_status(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "model_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -1,13 +1,84 @@
 # backend/application/services/queue_service.py - FIXED FOR SQL SERVER + NEW FIELDS
-from typing import Optional
-from domain.entities import TrainingSession, SessionStatus
+from datetime import datetime
+from typing import List, Optional, Sequence, Dict, Any
+from domain.entities import TrainingSession, SessionStatus, SessionPriority
 from infrastructure.database import get_connection
+import os
+import socket
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_RETRIES = 3
+
+# Lane -> vrijednost u koloni Priority (manje = važnije)
+LANE_PRIORITY = {
+    SessionPriority.LIVE: 0,
+    SessionPriority.NORMAL: 1,
+    SessionPriority.BACKFILL: 2,
+}
+PRIORITY_LANE = {value: lane for lane, value in LANE_PRIORITY.items()}
+
+# Od 10 claim-ova (kad su svi lane-ovi puni): 6 live, 3 normal, 1 backfill
+DEFAULT_LANE_WEIGHTS = {
+    SessionPriority.LIVE: 6,
+    SessionPriority.NORMAL: 3,
+    SessionPriority.BACKFILL: 1,
+}
+
+
+def default_worker_id() -> str:
+    """ID workera koji drži lease: host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
 class QueueService:
-    """Servis za upravljanje redom (queue) trening sesija"""
+    """Servis za upravljanje redom (queue) trening sesija
+
+    Claim je lease: ``dequeue_next`` upisuje ClaimedAt/ClaimedBy, a
+    ``reap_expired_leases`` vraća sesije čiji je lease istekao nazad u red
+    (ili u ``dead_letter`` nakon ``max_retries`` pokušaja).
+
+    Red ima tri lane-a (live/normal/backfill). Dequeue bira lane weighted
+    round-robin-om, pa ni backfill ne gladuje dok stižu live sesije; ako je
+    izabrani lane prazan, uzima se sljedeća sesija po prioritetu.
+    """
+    
+    def __init__(self, worker_id: Optional[str] = None,
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 lane_weights: Optional[Dict[SessionPriority, int]] = None):
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_retries = max_retries
+        
+        # Smooth weighted round-robin stanje
+        self.lane_weights = dict(lane_weights or DEFAULT_LANE_WEIGHTS)
+        self._lane_credit = {lane: 0 for lane in self.lane_weights}
+        self._lane_lock = threading.Lock()
+        
+        # Lane metrike (ovaj proces)
+        self.lane_dequeued = {lane: 0 for lane in LANE_PRIORITY}
+        self.lane_wait_ms_total = {lane: 0.0 for lane in LANE_PRIORITY}
+        self.lane_wait_ms_max = {lane: 0.0 for lane in LANE_PRIORITY}
+    
+    def _next_lane(self) -> SessionPriority:
+        """Smooth weighted round-robin: live, normal, live, live, backfill, ..."""
+        with self._lane_lock:
+            total = 0
+            for lane, weight in self.lane_weights.items():
+                self._lane_credit[lane] += weight
+                total += weight
+            lane = max(self._lane_credit, key=self._lane_credit.get)
+            self._lane_credit[lane] -= total
+            return lane
+    
+    def _record_dequeue(self, lane: SessionPriority, wait_ms: float):
+        self.lane_dequeued[lane] += 1
+        self.lane_wait_ms_total[lane] += wait_ms
+        self.lane_wait_ms_max[lane] = max(self.lane_wait_ms_max[lane], wait_ms)
     
     def enqueue(self, session: TrainingSession) -> TrainingSession:
         """Stavi sesiju u red za obradu - UPDATED sa novim fields"""
@@ -18,22 +89,25 @@ class QueueService:
             cursor.execute("""
                 INSERT INTO TrainingSessions 
                 (Timestamp, PlayerName, Position, ActivityType, SleepHours, 
-                 StressLevel, DistanceKm, SprintCount, Soreness, RPE, InjuryIllness, Status)
+                 StressLevel, DistanceKm, SprintCount, Soreness, RPE, InjuryIllness, Status,
+                 Priority)
                 OUTPUT INSERTED.Id
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 session.timestamp, session.player_name,
                 session.position.value, session.activity_type.value,
                 session.sleep_hours, session.stress_level,
                 session.distance_km, session.sprint_count,
                 session.soreness, session.rpe, session.injury_illness,
-                SessionStatus.QUEUED.value
+                SessionStatus.QUEUED.value,
+                LANE_PRIORITY[session.priority]
             ))
             
             session.id = cursor.fetchone()[0]
             conn.commit()
             
-            logger.info(f"✅ Sesija #{session.id} ({session.player_name}) stavljena u queue")
+            logger.info("✅ Sesija #%s (%s) stavljena u queue [%s]", session.id, session.player_name,
+                        session.priority.value, extra={"event": "queue.enqueued", "session_id": session.id})
             return session
             
         except Exception as e:
@@ -50,12 +124,14 @@ class QueueService:
         
         try:
             # FIXED: Prvo SELECT TOP 1 sa lock hint
+            # Izabrani lane prvi, pa ostali po prioritetu; unutar lane-a FIFO po redoslijedu prijave
+            lane = self._next_lane()
             cursor.execute("""
                 SELECT TOP 1 Id 
                 FROM TrainingSessions WITH (UPDLOCK, READPAST)
                 WHERE Status = 'queued'
-                ORDER BY Timestamp ASC
-            """)
+                ORDER BY CASE WHEN Priority = ? THEN 0 ELSE 1 END, Priority, Id
+            """, LANE_PRIORITY[lane])
             
             id_row = cursor.fetchone()
             if not id_row:
@@ -67,14 +143,18 @@ class QueueService:
             # Onda UPDATE i OUTPUT - UPDATED sa novim fields
             cursor.execute("""
                 UPDATE TrainingSessions
-                SET Status = 'processing'
+                SET Status = 'processing',
+                    ClaimedAt = GETDATE(),
+                    ClaimedBy = ?
                 OUTPUT INSERTED.Id, INSERTED.Timestamp, INSERTED.PlayerName,
                        INSERTED.Position, INSERTED.ActivityType, 
                        INSERTED.SleepHours, INSERTED.StressLevel,
                        INSERTED.DistanceKm, INSERTED.SprintCount,
-                       INSERTED.Soreness, INSERTED.RPE, INSERTED.InjuryIllness
+                       INSERTED.Soreness, INSERTED.RPE, INSERTED.InjuryIllness,
+                       INSERTED.Priority,
+                       DATEDIFF(MILLISECOND, INSERTED.EnqueuedAt, GETDATE())
                 WHERE Id = ?
-            """, session_id)
+            """, (self.worker_id, session_id))
             
             row = cursor.fetchone()
             conn.commit()
@@ -84,6 +164,9 @@ class QueueService:
             
             from domain.entities import Position, ActivityType
             
+            claimed_lane = PRIORITY_LANE.get(row[12], SessionPriority.NORMAL)
+            self._record_dequeue(claimed_lane, float(row[13] or 0))
+            
             return TrainingSession(
                 id=row[0],
                 timestamp=row[1],
@@ -97,7 +180,8 @@ class QueueService:
                 soreness=row[9],
                 rpe=row[10],
                 injury_illness=bool(row[11]) if row[11] is not None else None,
-                status=SessionStatus.PROCESSING
+                status=SessionStatus.PROCESSING,
+                priority=claimed_lane
             )
             
         except Exception as e:
@@ -108,8 +192,12 @@ class QueueService:
             conn.close()
     
     def mark_as_processed(self, session_id: int, action: str, 
-                         fatigue_score: float, risk_level: str, confidence: float, injury_prob: float = None):
-        """Označi sesiju kao obrađenu"""
+                         fatigue_score: float, risk_level: str, confidence: float, injury_prob: float = None) -> bool:
+        """Označi sesiju kao obrađenu.
+
+        Upis prolazi samo dok ovaj worker drži lease; ako ne uspije, sesija
+        ostaje 'processing' i reaper je vraća u red kad lease istekne.
+        """
         conn = get_connection()
         cursor = conn.cursor()
         
@@ -121,16 +209,269 @@ class QueueService:
                     RiskLevel = ?,
                     Confidence = ?,
                     InjuryProb = ?,
-                    Status = 'processed'
-                WHERE Id = ?
-            """, (action, fatigue_score, risk_level, confidence, injury_prob, session_id))
+                    Status = 'processed',
+                    ClaimedAt = NULL
+                WHERE Id = ? AND ClaimedBy = ?
+            """, (action, fatigue_score, risk_level, confidence, injury_prob, session_id, self.worker_id))
             
+            updated = cursor.rowcount
             conn.commit()
-            logger.info(f"✅ Sesija #{session_id} processed: {action} (fatigue: {fatigue_score:.1f}, injury_prob: {injury_prob:.2f})")
+            if updated == 0:
+                logger.warning("⚠️ Sesija #%s: lease više nije naš - rezultat odbačen", session_id,
+                               extra={"event": "queue.lease_lost", "session_id": session_id})
+                return False
+            logger.info("✅ Sesija #%s processed: %s (fatigue: %.1f, injury_prob: %.2f)",
+                        session_id, action, fatigue_score, injury_prob,
+                        extra={"event": "queue.processed", "session_id": session_id})
+            return True
             
         except Exception as e:
             conn.rollback()
-            logger.error(f"❌ Greška pri mark_as_processed: {e}")
+            logger.error(f"❌ Greška pri mark_as_processed (reaper će vratiti sesiju u red): {e}")
+            return False
+            
+        finally:
+            conn.close()
+    
+    def mark_many_as_processed(self, rows: Sequence[tuple]) -> int:
+        """Označi više sesija kao obrađene u JEDNOJ transakciji.
+
+        rows: (action, fatigue_score, risk_level, confidence, injury_prob, session_id)
+        Upisuju se samo sesije čiji lease i dalje drži ovaj worker; vraća broj
+        stvarno upisanih (ostale je reaper vratio u red ili ih drži drugi worker).
+        Greška se propagira da bi pozivalac (write buffer) zadržao redove.
+        """
+        if not rows:
+            return 0
+        
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Rezultati idu u temp tabelu (pyodbc šalje sve parametre u jednom
+            # round-tripu), pa jedan UPDATE sa OUTPUT vrati Id-eve koji su upisani
+            cursor.execute("""
+                CREATE TABLE #ScoredResults (
+                    PredictedAction NVARCHAR(50) NULL,
+                    FatigueScore FLOAT NULL,
+                    RiskLevel NVARCHAR(20) NULL,
+                    Confidence FLOAT NULL,
+                    InjuryProb FLOAT NULL,
+                    Id INT NOT NULL
+                )
+            """)
+            cursor.fast_executemany = True
+            cursor.executemany("INSERT INTO #ScoredResults VALUES (?, ?, ?, ?, ?, ?)",
+                               [tuple(row) for row in rows])
+            cursor.execute("""
+                UPDATE ts
+                SET PredictedAction = r.PredictedAction,
+                    FatigueScore = r.FatigueScore,
+                    RiskLevel = r.RiskLevel,
+                    Confidence = r.Confidence,
+                    InjuryProb = r.InjuryProb,
+                    Status = 'processed',
+                    ClaimedAt = NULL
+                OUTPUT inserted.Id
+                FROM TrainingSessions ts
+                JOIN #ScoredResults r ON r.Id = ts.Id
+                WHERE ts.ClaimedBy = ?
+            """, (self.worker_id,))
+            updated = {int(row[0]) for row in cursor.fetchall()}
             
+            conn.commit()
+            
+        except Exception:
+            conn.rollback()
+            raise
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+        
+        dropped = [row[5] for row in rows if row[5] not in updated]
+        if dropped:
+            logger.warning("⚠️ %s rezultata odbačeno - lease više nije naš (sesije %s)", len(dropped), dropped[:20],
+                           extra={"event": "queue.lease_lost", "rows": len(dropped)})
+        return len(updated)
+    
+    def insert_scored_many(self, rows: Sequence[tuple]) -> int:
+        """Upiši sesije koje su već bodovane (POST /score, bez reda) direktno kao 'processed'.
+
+        Red: (Timestamp, PlayerName, Position, ActivityType, SleepHours, StressLevel,
+        DistanceKm, SprintCount, Soreness, RPE, InjuryIllness, Priority,
+        PredictedAction, FatigueScore, RiskLevel, Confidence, InjuryProb, RequestId)
+        Greška se propagira da bi pozivalac (write buffer) zadržao redove.
+        """
+        if not rows:
+            return 0
+        
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.fast_executemany = True
+            cursor.executemany("""
+                INSERT INTO TrainingSessions 
+                (Timestamp, PlayerName, Position, ActivityType, SleepHours, 
+                 StressLevel, DistanceKm, SprintCount, Soreness, RPE, InjuryIllness, Priority,
+                 PredictedAction, FatigueScore, RiskLevel, Confidence, InjuryProb, RequestId,
+                 Status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'processed')
+            """, [tuple(row) for row in rows])
+            
+            conn.commit()
+            return len(rows)
+            
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def read_load_rows(self, after_id: int, since: datetime, limit: int = 5000) -> List[tuple]:
+        """Sesije sa Id > after_id i Timestamp >= since, po Id-u (za player load agregate).
+
+        Red: (Id, PlayerName, Timestamp, DistanceKm, RPE). Uključuje i sesije
+        koje još čekaju u redu - opterećenje je nastalo kad je sesija odrađena.
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT TOP (?) Id, PlayerName, Timestamp, DistanceKm, RPE
+                FROM TrainingSessions
+                WHERE Id > ? AND Timestamp >= ?
+                ORDER BY Id
+            """, (limit, after_id, since))
+            return [tuple(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def read_player_load_rows(self, player_names: Sequence[str], since: datetime, until: datetime,
+                              until_id: int) -> List[tuple]:
+        """Sesije datih igrača sa since <= Timestamp < until i Id <= until_id, po Id-u.
+
+        Isti red kao read_load_rows; za player load agregate na dan starijih
+        sesija (feedback, replay, sesije pročitane prije restarta).
+        """
+        names = sorted({name for name in player_names if name})
+        rows: List[tuple] = []
+        if not names:
+            return rows
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            # SQL Server prima najviše 2100 parametara po upitu
+            for start in range(0, len(names), 1000):
+                chunk = names[start:start + 1000]
+                cursor.execute(f"""
+                    SELECT Id, PlayerName, Timestamp, DistanceKm, RPE
+                    FROM TrainingSessions
+                    WHERE PlayerName IN ({", ".join("?" * len(chunk))})
+                      AND Timestamp >= ? AND Timestamp < ? AND Id <= ?
+                    ORDER BY Id
+                """, (*chunk, since, until, until_id))
+                rows.extend(tuple(row) for row in cursor.fetchall())
+        finally:
+            conn.close()
+        if len(names) > 1000:
+            rows.sort(key=lambda row: row[0])
+        return rows
+
+    def find_by_request_id(self, request_id: str) -> Optional[int]:
+        """Id sesije upisane za POST /score zahtjev (None dok write buffer ne flush-a)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT TOP 1 Id FROM TrainingSessions WHERE RequestId = ?", (request_id,))
+            row = cursor.fetchone()
+            return int(row[0]) if row else None
+        finally:
+            conn.close()
+    
+    def reap_expired_leases(self) -> Dict[str, Any]:
+        """Vrati sesije sa isteklim lease-om u red (RetryCount + 1).
+
+        Nakon ``max_retries`` isteklih lease-ova sesija ide u 'dead_letter'
+        da jedna "otrovna" sesija ne bi vječno rušila workere.
+        Redovi u 'processing' bez ClaimedAt (stari format) se tretiraju kao istekli.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE TrainingSessions
+                SET RetryCount = RetryCount + 1,
+                    Status = CASE WHEN RetryCount + 1 >= ? THEN 'dead_letter' ELSE 'queued' END,
+                    ClaimedAt = NULL,
+                    ClaimedBy = NULL
+                OUTPUT INSERTED.Id, INSERTED.Status
+                WHERE Status = 'processing'
+                  AND (ClaimedAt IS NULL OR ClaimedAt < DATEADD(SECOND, -?, GETDATE()))
+            """, (self.max_retries, self.lease_seconds))
+            
+            rows = cursor.fetchall()
+            conn.commit()
+            
+            dead = [row[0] for row in rows if row[1] == SessionStatus.DEAD_LETTER.value]
+            requeued = len(rows) - len(dead)
+            if requeued:
+                logger.warning("♻️ %s sesija sa isteklim lease-om vraćeno u red", requeued,
+                               extra={"event": "queue.reaped"})
+            if dead:
+                logger.error(f"☠️ Sesije prebačene u dead_letter: {dead}")
+            return {"requeued": requeued, "dead_lettered": len(dead), "dead_letter_ids": dead}
+            
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"❌ Greška pri reap_expired_leases: {e}")
+            return {"requeued": 0, "dead_lettered": 0, "dead_letter_ids": [], "error": str(e)}
+        finally:
+            conn.close()
+    
+    def queued_count(self) -> int:
+        """Broj sesija koje čekaju u redu (svi lane-ovi)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM TrainingSessions WHERE Status = 'queued'")
+            return int(cursor.fetchone()[0])
+        finally:
+            conn.close()
+
+    def get_lane_stats(self) -> Dict[str, Any]:
+        """Dubina i čekanje po lane-u (iz baze) + claim metrike ovog procesa"""
+        depth = {lane: 0 for lane in LANE_PRIORITY}
+        oldest_wait_s = {lane: 0.0 for lane in LANE_PRIORITY}
+        
+        try:
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT Priority, COUNT(*), DATEDIFF(SECOND, MIN(EnqueuedAt), GETDATE())
+                    FROM TrainingSessions
+                    WHERE Status = 'queued'
+                    GROUP BY Priority
+                """)
+                for priority, count, wait_s in cursor.fetchall():
+                    lane = PRIORITY_LANE.get(priority, SessionPriority.NORMAL)
+                    depth[lane] += int(count)
+                    oldest_wait_s[lane] = max(oldest_wait_s[lane], float(wait_s or 0))
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"❌ Greška pri dohvatanju lane statistike: {e}")
+        
+        stats = {}
+        for lane in LANE_PRIORITY:
+            dequeued = self.lane_dequeued[lane]
+            stats[lane.value] = {
+                "weight": self.lane_weights.get(lane, 0),
+                "depth": depth[lane],
+                "oldest_wait_s": oldest_wait_s[lane],
+                "dequeued": dequeued,
+                "avg_wait_ms": self.lane_wait_ms_total[lane] / dequeued if dequeued else 0.0,
+                "max_wait_ms": self.lane_wait_ms_max[lane],
+            }
+        return stats
@@ -0,0 +1,300 @@
+# backend/application/services/replay_service.py
+"""
+Replay (backfill) servis - ponovo boduje historijske sesije trenutnim modelom.
+
+- Sesije se čitaju u ID-range chunk-ovima (``Id > last AND Id <= ToId``).
+- Svaki chunk ide kroz ``FatigueScoringService.score_batch`` (jedan poziv
+  po modelu za cijeli chunk).
+- Rezultati idu u ``PredictionReplays`` označeni verzijom modela; originalne
+  predikcije u ``TrainingSessions`` se ne diraju.
+- Upis rezultata i pomjeranje checkpoint-a su u ISTOJ transakciji, pa se
+  prekinut replay nastavlja tačno od zadnjeg commit-anog chunk-a.
+"""
+import threading
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional, Dict, Any
+from domain.entities import TrainingSession, SessionStatus, Position, ActivityType
+from application.services.scoring_service import FatigueScoringService
+from infrastructure.database import get_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLAY_CHUNK_SIZE = 1000
+
+
+@dataclass
+class ReplayReport:
+    """Napredak i throughput jednog replay pokretanja"""
+    replay_id: str
+    model_version: str
+    status: str = "running"
+    from_id: int = 0
+    to_id: int = 0
+    last_session_id: int = 0
+    rows_done_total: int = 0
+    rows_this_run: int = 0
+    rows_skipped: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self):
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (f"{self.replay_id} [{self.status}] {self.rows_this_run} rows in {self.seconds:.1f}s "
+                f"({self.rows_per_sec:.0f} rows/s), last Id={self.last_session_id}/{self.to_id}, "
+                f"total={self.rows_done_total}")
+
+
+class ReplayService:
+    """Re-scoring processed sesija u chunk-ovima sa checkpoint-om"""
+
+    def __init__(self, scoring_service: FatigueScoringService,
+                 chunk_size: int = DEFAULT_REPLAY_CHUNK_SIZE):
+        self.scoring_service = scoring_service
+        self.chunk_size = chunk_size
+        self.current: Optional[ReplayReport] = None
+        self._cancel = threading.Event()
+
+    def default_replay_id(self) -> str:
+        """Replay ID vezan za verziju modela - ponovni start istog modela nastavlja"""
+        return f"replay-{self.scoring_service.model_version()}"[:64]
+
+    def cancel(self):
+        """Zaustavi replay nakon tekućeg chunk-a (checkpoint ostaje za nastavak)"""
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self.current is not None and self.current.status == "running"
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+
+    def get_checkpoint(self, replay_id: str) -> Optional[Dict[str, Any]]:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT ReplayId, ModelVersion, FromId, ToId, LastSessionId,
+                       RowsDone, Status, StartedAt, UpdatedAt
+                FROM ReplayCheckpoints
+                WHERE ReplayId = ?
+            """, replay_id)
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return {
+                "replay_id": row[0],
+                "model_version": row[1],
+                "from_id": row[2],
+                "to_id": row[3],
+                "last_session_id": row[4],
+                "rows_done": row[5],
+                "status": row[6],
+                "started_at": row[7].isoformat() if row[7] else None,
+                "updated_at": row[8].isoformat() if row[8] else None,
+            }
+        finally:
+            conn.close()
+
+    def _create_checkpoint(self, replay_id: str, model_version: str,
+                           from_id: Optional[int], to_id: Optional[int]) -> Dict[str, Any]:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            if to_id is None:
+                # Gornja granica se zamrzava na startu - nove sesije nisu dio ovog replay-a
+                cursor.execute("SELECT MAX(Id) FROM TrainingSessions WHERE Status = 'processed'")
+                to_id = int(cursor.fetchone()[0] or 0)
+            from_id = int(from_id or 0)
+            cursor.execute("""
+                INSERT INTO ReplayCheckpoints (ReplayId, ModelVersion, FromId, ToId, LastSessionId, Status)
+                VALUES (?, ?, ?, ?, ?, 'running')
+            """, (replay_id, model_version, from_id, to_id, from_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return {"from_id": from_id, "to_id": to_id, "last_session_id": from_id, "rows_done": 0}
+
+    def _set_status(self, replay_id: str, status: str):
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE ReplayCheckpoints SET Status = ?, UpdatedAt = GETDATE()
+                WHERE ReplayId = ?
+            """, (status, replay_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Chunk I/O
+    # ------------------------------------------------------------------
+
+    def _read_chunk(self, after_id: int, to_id: int) -> List[tuple]:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT TOP (?) Id, Timestamp, PlayerName, Position, ActivityType,
+                       SleepHours, StressLevel, DistanceKm, SprintCount,
+                       Soreness, RPE, InjuryIllness
+                FROM TrainingSessions
+                WHERE Status = 'processed' AND Id > ? AND Id <= ?
+                ORDER BY Id
+            """, (self.chunk_size, after_id, to_id))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_session(row) -> TrainingSession:
+        return TrainingSession(
+            id=row[0],
+            timestamp=row[1],
+            player_name=row[2],
+            position=Position(row[3]),
+            activity_type=ActivityType(row[4]),
+            sleep_hours=row[5],
+            stress_level=row[6],
+            distance_km=row[7],
+            sprint_count=row[8],
+            soreness=row[9],
+            rpe=row[10],
+            injury_illness=bool(row[11]) if row[11] is not None else None,
+            status=SessionStatus.PROCESSED
+        )
+
+    def _write_chunk(self, replay_id: str, model_version: str, predictions, last_id: int):
+        """Rezultati + checkpoint u jednoj transakciji"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            if predictions:
+                cursor.fast_executemany = True
+                cursor.executemany("""
+                    INSERT INTO PredictionReplays
+                    (ReplayId, SessionId, ModelVersion, PredictedAction, FatigueScore,
+                     RiskLevel, Confidence, InjuryProb, RequiresReview)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (replay_id, p.session_id, model_version, p.action.value, p.fatigue_score,
+                     p.risk_level.value, p.confidence, p.injury_prob, int(p.requires_review))
+                    for p in predictions
+                ])
+            cursor.execute("""
+                UPDATE ReplayCheckpoints
+                SET LastSessionId = ?, RowsDone = RowsDone + ?, UpdatedAt = GETDATE()
+                WHERE ReplayId = ?
+            """, (last_id, len(predictions), replay_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+
+    def run(self, replay_id: Optional[str] = None, from_id: Optional[int] = None,
+            to_id: Optional[int] = None, max_rows: Optional[int] = None,
+            progress: Optional[Callable[[ReplayReport], None]] = None) -> ReplayReport:
+        """Pokreni (ili nastavi) replay. Vraća ReplayReport sa rows/sec."""
+        self._cancel.clear()
+        model_version = self.scoring_service.model_version()
+        replay_id = replay_id or self.default_replay_id()
+
+        checkpoint = self.get_checkpoint(replay_id)
+        if checkpoint is None:
+            checkpoint = self._create_checkpoint(replay_id, model_version, from_id, to_id)
+            logger.info(f"🔁 Novi replay {replay_id}: Id {checkpoint['from_id']}..{checkpoint['to_id']}")
+        elif checkpoint["model_version"] != model_version:
+            raise ValueError(
+                f"Replay {replay_id} je započet modelom {checkpoint['model_version']}, "
+                f"trenutni model je {model_version} - koristi novi replay_id"
+            )
+        else:
+            logger.info(f"🔁 Nastavljam replay {replay_id} od Id {checkpoint['last_session_id']}")
+
+        report = ReplayReport(
+            replay_id=replay_id,
+            model_version=model_version,
+            status="completed" if checkpoint.get("status") == "completed" else "running",
+            from_id=checkpoint["from_id"],
+            to_id=checkpoint["to_id"],
+            last_session_id=checkpoint["last_session_id"],
+            rows_done_total=checkpoint["rows_done"],
+        )
+        self.current = report
+        if report.status == "completed":
+            return report
+
+        start = time.perf_counter()
+        try:
+            while report.last_session_id < report.to_id:
+                if self._cancel.is_set():
+                    report.status = "paused"
+                    break
+                if max_rows is not None and report.rows_this_run >= max_rows:
+                    report.status = "paused"
+                    break
+                if self.scoring_service.model_version() != model_version:
+                    # Retrain usred replay-a - ne miješaj verzije u jednom replay-u
+                    report.status = "interrupted"
+                    report.error = "model changed during replay"
+                    break
+
+                rows = self._read_chunk(report.last_session_id, report.to_id)
+                if not rows:
+                    report.last_session_id = report.to_id
+                    self._write_chunk(replay_id, model_version, [], report.to_id)
+                    break
+
+                sessions = []
+                for row in rows:
+                    try:
+                        sessions.append(self._row_to_session(row))
+                    except (ValueError, TypeError):
+                        report.rows_skipped += 1
+
+                predictions = self.scoring_service.score_batch(sessions, explore=False)
+                last_id = int(rows[-1][0])
+                self._write_chunk(replay_id, model_version, predictions, last_id)
+
+                report.chunks += 1
+                report.last_session_id = last_id
+                report.rows_this_run += len(predictions)
+                report.rows_done_total += len(predictions)
+                report.seconds = time.perf_counter() - start
+                report.rows_per_sec = report.rows_this_run / report.seconds if report.seconds > 0 else 0.0
+                if progress is not None:
+                    progress(report)
+
+            if report.last_session_id >= report.to_id:
+                report.status = "completed"
+            self._set_status(replay_id, report.status)
+        except Exception as e:
+            report.status = "failed"
+            report.error = str(e)
+            logger.error(f"❌ Replay {replay_id} prekinut: {e}")
+            try:
+                self._set_status(replay_id, "failed")
+            except Exception:
+                pass
+        finally:
+            report.seconds = time.perf_counter() - start
+            report.rows_per_sec = report.rows_this_run / report.seconds if report.seconds > 0 else 0.0
+
+        logger.info(f"🔁 {report.summary()}")
+        return report
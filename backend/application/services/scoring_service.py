@@ -1,14 +1,23 @@
 # backend/application/services/scoring_service.py
 import random
-from typing import Tuple
+import time
+from typing import Tuple, List, Optional
 from domain.entities import TrainingSession, PlayerAction, RiskLevel, FatiguePrediction
 from infrastructure.ml.risk_classifier import RiskClassifier
+from application.services.prediction_cache import PredictionCache, CachedOutputs
+from infrastructure.ml.inference_batcher import InferenceBatcher
+from application.services.player_load_service import PlayerLoadService
+from core.metrics import LatencyRegistry
 
 class FatigueScoringService:
     """Servis za scoring - implementira THINK fazu"""
     
-    def __init__(self, classifier, exploration_rate: float = 0.05, risk_classifier: RiskClassifier = None):
+    def __init__(self, classifier, exploration_rate: float = 0.05, risk_classifier: RiskClassifier = None,
+                 prediction_cache: Optional[PredictionCache] = None,
+                 player_load: Optional[PlayerLoadService] = None):
         self.classifier = classifier
+        # Opcionalni LRU cache izlaza modela (ključ: verzija modela + kvantizovani vektor)
+        self.prediction_cache = prediction_cache
         self.exploration_rate = exploration_rate
         
         # Pragovi za risk levels (mogu se učitati iz SystemSettings)
@@ -16,6 +25,32 @@ class FatigueScoringService:
         self.medium_threshold = 60.0
         self.high_threshold = 80.0
         self.risk_classifier = risk_classifier if risk_classifier is not None else RiskClassifier()
+        # Latencija po fazi THINK-a: encode, cache, mlp, injury_lr, risk_lr, decide
+        # (sa micro-batcher-om: inference = čekanje u batch-u + zajednički forward pass)
+        self.latency = LatencyRegistry()
+        # Opcionalni micro-batcher: istovremeni 1-row pozivi -> jedan batch forward pass
+        self.inference_batcher: Optional[InferenceBatcher] = None
+        # Opcionalni player load agregati (ACWR...) - dodaju se iza feature-a sesije
+        self.player_load = player_load
+    
+    def _session_features(self, session: TrainingSession) -> list:
+        """Feature-i sesije (+ player load agregati ako su uključeni)"""
+        features = session.extract_features()
+        if self.player_load is not None:
+            features += self.player_load.features_for(session)
+        return features
+    
+    def enable_inference_batching(self, max_batch: int = 32, max_delay_ms: float = 2.0) -> InferenceBatcher:
+        """Uključi micro-batcher ispred fatigue/injury/risk modela"""
+        if self.inference_batcher is not None:
+            self.inference_batcher.close()
+        self.inference_batcher = InferenceBatcher(
+            self._compute_outputs, max_batch=max_batch, max_delay_ms=max_delay_ms, name="scoring"
+        )
+        return self.inference_batcher
+    
+    def get_batcher_status(self) -> Optional[dict]:
+        return self.inference_batcher.get_status() if self.inference_batcher is not None else None
     
     def score_session(self, session: TrainingSession) -> FatiguePrediction:
         """
@@ -23,14 +58,50 @@ class FatigueScoringService:
         
         Returns: FatiguePrediction objekat sa svim detaljima
         """
+        latency = self.latency
+        t0 = time.perf_counter()
         # Ekstraktuj features
-        features = session.extract_features()
+        features = self._session_features(session)
+        
+        # Cache pogodak preskače sva tri modela
+        key = None
+        version = None
+        if self.prediction_cache is not None:
+            # Verzija se čita prije inferencije - put je preskače ako se model u međuvremenu promijenio
+            version = self.model_version()
+            self.prediction_cache.ensure_version(version)
+            key = self.prediction_cache.make_key(self.classifier._encode_features(features))
+            t1 = time.perf_counter()
+            latency.observe("encode", (t1 - t0) * 1000.0)
+            cached = self.prediction_cache.get(key)
+            t0 = time.perf_counter()
+            latency.observe("cache", (t0 - t1) * 1000.0)
+            if cached is not None:
+                prediction = self._build_prediction(session, cached.fatigue_score, cached.confidence,
+                                                    cached.injury_prob, cached.risk_level)
+                latency.observe("decide", (time.perf_counter() - t0) * 1000.0)
+                return prediction
+        else:
+            t1 = time.perf_counter()
+            latency.observe("encode", (t1 - t0) * 1000.0)
+            t0 = t1
+        
+        if self.inference_batcher is not None:
+            # Čeka istovremene pozive iz drugih threadova (blokira - ne zvati sa event loop-a)
+            outputs = self.inference_batcher.predict(features)
+            t1 = time.perf_counter()
+            latency.observe("inference", (t1 - t0) * 1000.0)
+            return self._finish_session(session, outputs, key, version, t1)
         
         # ML predikcija fatigue score-a (0-100)
         fatigue_score, confidence = self.classifier.predict(features)
+        t1 = time.perf_counter()
+        latency.observe("mlp", (t1 - t0) * 1000.0)
 
         # Predikcija vjerovatnoće povrede
         injury_prob = self.classifier.predict_injury_prob(features)
+        t0 = time.perf_counter()
+        latency.observe("injury_lr", (t0 - t1) * 1000.0)
 
         # Klasifikuj risk level preko treniranog RiskClassifier kada je dostupan
         if hasattr(self, "risk_classifier") and self.risk_classifier is not None:
@@ -40,7 +111,141 @@ class FatigueScoringService:
                 risk_level = self._classify_risk(fatigue_score, injury_prob)
         else:
             risk_level = self._classify_risk(fatigue_score, injury_prob)
+        t1 = time.perf_counter()
+        latency.observe("risk_lr", (t1 - t0) * 1000.0)
 
+        if key is not None:
+            self._cache_put(key, CachedOutputs(fatigue_score, confidence, injury_prob, risk_level), version)
+
+        prediction = self._build_prediction(session, fatigue_score, confidence, injury_prob, risk_level)
+        latency.observe("decide", (time.perf_counter() - t1) * 1000.0)
+        return prediction
+    
+    def prepare_features(self, sessions: List[TrainingSession]) -> List[list]:
+        """
+        Feature-i za batch sesija (+ player load agregati, jednim pozivom za cijeli
+        batch). Player load može čitati bazu, pa se zove iz threada koji je
+        preuzeo batch (ne sa event loop-a).
+        """
+        features = [session.extract_features() for session in sessions]
+        if self.player_load is not None and sessions:
+            for row, load in zip(features, self.player_load.features_for_sessions(sessions)):
+                row += load
+        return features
+    
+    async def score_features_async(self, session: TrainingSession, features: list) -> FatiguePrediction:
+        """
+        THINK za coroutine-e sa već pripremljenim feature-ima (prepare_features):
+        čeka micro-batcher bez blokiranja event loop-a, pa se istovremeni pozivi
+        (scoring petlja koja obrađuje više sesija odjednom) spoje u jedan forward pass.
+        """
+        if self.inference_batcher is None:
+            raise RuntimeError("score_features_async traži micro-batcher (enable_inference_batching)")
+        
+        latency = self.latency
+        t0 = time.perf_counter()
+        key = None
+        version = None
+        if self.prediction_cache is not None:
+            # Verzija se čita prije inferencije - put je preskače ako se model u međuvremenu promijenio
+            version = self.model_version()
+            self.prediction_cache.ensure_version(version)
+            key = self.prediction_cache.make_key(self.classifier._encode_features(features))
+            cached = self.prediction_cache.get(key)
+            if cached is not None:
+                t1 = time.perf_counter()
+                latency.observe("cache", (t1 - t0) * 1000.0)
+                prediction = self._build_prediction(session, cached.fatigue_score, cached.confidence,
+                                                    cached.injury_prob, cached.risk_level)
+                latency.observe("decide", (time.perf_counter() - t1) * 1000.0)
+                return prediction
+        
+        outputs = await self.inference_batcher.predict_async(features)
+        t1 = time.perf_counter()
+        latency.observe("inference", (t1 - t0) * 1000.0)
+        return self._finish_session(session, outputs, key, version, t1)
+    
+    def _finish_session(self, session: TrainingSession, outputs: CachedOutputs, key: Optional[tuple],
+                        version: Optional[str], started: float) -> FatiguePrediction:
+        if key is not None:
+            self._cache_put(key, outputs, version)
+        prediction = self._build_prediction(session, outputs.fatigue_score, outputs.confidence,
+                                            outputs.injury_prob, outputs.risk_level)
+        self.latency.observe("decide", (time.perf_counter() - started) * 1000.0)
+        return prediction
+    
+    def _cache_put(self, key: tuple, outputs: CachedOutputs, version: str):
+        """Upiši izlaze u cache samo ako se model nije promijenio od čitanja ``version``"""
+        if self.model_version() == version:
+            self.prediction_cache.put(key, outputs, model_version=version)
+    
+    def _compute_outputs(self, features_list: List[List]) -> List[CachedOutputs]:
+        """Sva tri modela, po jedan poziv za cijelu listu (batch_fn micro-batcher-a)"""
+        fatigue_scores, confidences = self.classifier.predict_batch(features_list)
+        injury_probs = self.classifier.predict_injury_prob_batch(features_list)
+        
+        risk_levels = None
+        if self.risk_classifier is not None:
+            try:
+                risk_levels = self.risk_classifier.predict_risk_levels(features_list)
+            except Exception:
+                risk_levels = None
+        
+        outputs = []
+        for j in range(len(features_list)):
+            fatigue_score = float(fatigue_scores[j])
+            injury_prob = float(injury_probs[j])
+            risk_level = (risk_levels[j] if risk_levels is not None
+                          else self._classify_risk(fatigue_score, injury_prob))
+            outputs.append(CachedOutputs(fatigue_score, float(confidences[j]), injury_prob, risk_level))
+        return outputs
+    
+    def score_batch(self, sessions: List[TrainingSession], explore: bool = False) -> List[FatiguePrediction]:
+        """
+        Batch scoring: svaki model se pozove JEDNOM za cijeli batch.
+        Koristi se za replay historijskih sesija (bez eksploracije po defaultu,
+        da rezultat zavisi samo od modela). Modeli vide samo cache promašaje.
+        """
+        if not sessions:
+            return []
+        # Jedan upit za sve sesije kojima agregati nisu u memoriji (replay)
+        features = self.prepare_features(sessions)
+        outputs: List[Optional[CachedOutputs]] = [None] * len(sessions)
+        keys: List[Optional[tuple]] = [None] * len(sessions)
+        
+        version = None
+        if self.prediction_cache is not None:
+            version = self.model_version()
+            self.prediction_cache.ensure_version(version)
+            for i, f in enumerate(features):
+                keys[i] = self.prediction_cache.make_key(self.classifier._encode_features(f))
+                outputs[i] = self.prediction_cache.get(keys[i])
+        
+        missing = [i for i, out in enumerate(outputs) if out is None]
+        if missing:
+            computed = self._compute_outputs([features[i] for i in missing])
+            cacheable = version is not None and self.model_version() == version
+            for i, out in zip(missing, computed):
+                outputs[i] = out
+                if cacheable:
+                    self.prediction_cache.put(keys[i], out, model_version=version)
+        
+        return [
+            self._build_prediction(session, out.fatigue_score, out.confidence,
+                                   out.injury_prob, out.risk_level, explore=explore)
+            for session, out in zip(sessions, outputs)
+        ]
+    
+    def model_version(self) -> str:
+        """Verzija kombinacije modela (fatigue/injury + risk) kojom se boduje"""
+        version = self.classifier.model_version()
+        if self.risk_classifier is not None:
+            version = f"{version}-{self.risk_classifier.model_version()}"
+        return version
+    
+    def _build_prediction(self, session: TrainingSession, fatigue_score: float, confidence: float,
+                          injury_prob: float, risk_level: RiskLevel, explore: bool = True) -> FatiguePrediction:
+        """Override pravila, eksploracija i review nad izlazima modela"""
         # Odredi akciju na osnovu risk levela
         ml_action = self._risk_to_action(risk_level)
 
@@ -60,7 +265,7 @@ class FatigueScoringService:
             risk_level = RiskLevel.CRITICAL
         
         # Exploration: nasumično probaj drugu akciju
-        is_exploring = random.random() < self.exploration_rate
+        is_exploring = explore and random.random() < self.exploration_rate
         if is_exploring:
             final_action = self._explore(ml_action)
             source = "exploration"
@@ -151,6 +356,12 @@ class FatigueScoringService:
         
         return False
     
+    def get_latency_status(self) -> dict:
+        return self.latency.snapshot()
+
+    def get_cache_status(self) -> Optional[dict]:
+        return self.prediction_cache.get_status() if self.prediction_cache is not None else None
+    
     def update_thresholds(self, low: float, medium: float, high: float):
         """Ažuriraj pragove za risk classification"""
         self.low_threshold = low
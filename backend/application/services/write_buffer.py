@@ -0,0 +1,199 @@
+# backend/application/services/write_buffer.py
+"""
+Write-behind buffer za rezultate scoring-a.
+
+Umjesto jednog UPDATE + commit po sesiji, rezultati se skupljaju i upisuju
+u jednoj transakciji (executemany) kad se skupi ``max_rows`` redova ili kad
+najstariji red čeka duže od ``max_delay_ms``.
+
+Crash-safe ugovor: dok rezultat nije flush-an, sesija u bazi ostaje u statusu
+``processing`` (pod lease-om ovog workera). Ako proces padne prije flush-a,
+lease istekne i ``QueueService.reap_expired_leases`` vraća takve sesije u
+``queued`` pa se ponovo boduju. Isto važi i za rezultate koje buffer odbaci:
+kad upis ne uspijeva (baza nedostupna) buffer drži najviše ``max_pending``
+redova i odbacuje najstarije, a rezultat čiji je lease u međuvremenu istekao
+UPDATE preskače (``rows_lease_lost``).
+
+``ScoredSessionWriteBuffer`` radi isto za ``POST /score``: sesija je bodovana
+odmah (bez reda), a u bazu se upisuje naknadno, batch INSERT-om kao
+``processed``. Tu nema lease-a - ako proces padne prije flush-a, odgovor je
+već vraćen klijentu, ali red nije upisan.
+"""
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PendingResult:
+    """Jedan rezultat koji čeka upis u bazu"""
+    session_id: int
+    action: str
+    fatigue_score: float
+    risk_level: str
+    confidence: float
+    injury_prob: Optional[float]
+
+    def as_params(self) -> tuple:
+        return (self.action, self.fatigue_score, self.risk_level,
+                self.confidence, self.injury_prob, self.session_id)
+
+
+@dataclass(slots=True)
+class PendingScoredSession:
+    """Sesija bodovana preko POST /score koja čeka INSERT"""
+    timestamp: datetime
+    player_name: str
+    position: str
+    activity_type: str
+    sleep_hours: float
+    stress_level: int
+    distance_km: float
+    sprint_count: int
+    soreness: Optional[int]
+    rpe: Optional[int]
+    injury_illness: Optional[bool]
+    priority: int
+    action: str
+    fatigue_score: float
+    risk_level: str
+    confidence: float
+    injury_prob: Optional[float]
+    request_id: str
+
+    def as_params(self) -> tuple:
+        return (self.timestamp, self.player_name, self.position, self.activity_type,
+                self.sleep_hours, self.stress_level, self.distance_km, self.sprint_count,
+                self.soreness, self.rpe, self.injury_illness, self.priority,
+                self.action, self.fatigue_score, self.risk_level, self.confidence,
+                self.injury_prob, self.request_id)
+
+
+class PredictionWriteBuffer:
+    """Skuplja rezultate i upisuje ih batch-evima preko QueueService.mark_many_as_processed"""
+
+    def __init__(self, queue_service, max_rows: int = 50, max_delay_ms: float = 250.0,
+                 auto_flush: bool = True, max_pending: int = 10000):
+        self.queue_service = queue_service
+        self.max_rows = max(int(max_rows), 1)
+        self.max_delay_ms = max_delay_ms
+        # Gornja granica reda dok upis ne uspijeva - najstariji redovi se odbacuju
+        self.max_pending = max(int(max_pending), self.max_rows)
+        # False: add() nikad ne upisuje sam (pozivalac flush-a van event loop-a)
+        self.auto_flush = auto_flush
+
+        self._pending: List[PendingResult] = []
+        self._oldest_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+        # Metrike
+        self.flush_count = 0
+        self.rows_flushed = 0
+        self.rows_lease_lost = 0
+        self.rows_dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def add(self, result: PendingResult) -> int:
+        """Dodaj rezultat; flush odmah ako je batch pun. Vraća broj upisanih redova."""
+        with self._lock:
+            self._pending.append(result)
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            full = len(self._pending) >= self.max_rows
+        return self.flush() if full and self.auto_flush else 0
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def is_due(self) -> bool:
+        """Da li je batch pun ili najstariji red čeka duže od max_delay_ms"""
+        with self._lock:
+            if self._oldest_at is None:
+                return False
+            if len(self._pending) >= self.max_rows:
+                return True
+            return (time.monotonic() - self._oldest_at) * 1000 >= self.max_delay_ms
+
+    def flush_if_due(self) -> int:
+        return self.flush() if self.is_due() else 0
+
+    def flush(self) -> int:
+        """Upiši sve što čeka u jednoj transakciji.
+
+        Ako upis ne uspije, redovi ostaju u bufferu (i u bazi kao ``processing``)
+        i pokušavaju se ponovo pri sljedećem flush-u - najviše ``max_pending``
+        redova, višak (najstariji) se odbacuje. Vraća broj upisanih redova.
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            oldest_at, self._oldest_at = self._oldest_at, None
+
+        start = time.perf_counter()
+        try:
+            written = self._write(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"❌ Flush {len(batch)} rezultata nije uspio (ostaju 'processing'): {e}")
+            with self._lock:
+                self._pending = batch + self._pending
+                self._oldest_at = oldest_at
+                overflow = len(self._pending) - self.max_pending
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    self.rows_dropped += overflow
+            if overflow > 0:
+                self._log_dropped(overflow)
+            return 0
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flush_count += 1
+        self.rows_flushed += written
+        self.rows_lease_lost += len(batch) - written
+        self.last_flush_ms = elapsed_ms
+        self.total_flush_ms += elapsed_ms
+        logger.info("💾 Flush: %s sesija upisano u %.1fms", written, elapsed_ms,
+                    extra={"event": "write_buffer.flush", "rows": written})
+        return written
+
+    def _write(self, batch: list) -> int:
+        return self.queue_service.mark_many_as_processed([r.as_params() for r in batch])
+
+    def _log_dropped(self, count: int):
+        logger.warning(f"⚠️ Write buffer pun ({self.max_pending}): odbačeno {count} najstarijih rezultata "
+                       f"(reaper vraća njihove sesije u red)")
+
+    def get_status(self) -> dict:
+        return {
+            "max_rows": self.max_rows,
+            "max_delay_ms": self.max_delay_ms,
+            "pending": self.pending_count(),
+            "flush_count": self.flush_count,
+            "rows_flushed": self.rows_flushed,
+            "rows_lease_lost": self.rows_lease_lost,
+            "max_pending": self.max_pending,
+            "rows_dropped": self.rows_dropped,
+            "failed_flushes": self.failed_flushes,
+            "avg_rows_per_flush": self.rows_flushed / self.flush_count if self.flush_count else 0,
+            "avg_flush_ms": self.total_flush_ms / self.flush_count if self.flush_count else 0,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+class ScoredSessionWriteBuffer(PredictionWriteBuffer):
+    """Write-behind za POST /score: batch INSERT preko QueueService.insert_scored_many"""
+
+    def _write(self, batch: list) -> int:
+        return self.queue_service.insert_scored_many([r.as_params() for r in batch])
+
+    def _log_dropped(self, count: int):
+        logger.error(f"❌ Write buffer pun ({self.max_pending}): {count} bodovanih sesija nije upisano u bazu")
@@ -0,0 +1,6 @@
+"""Offline performance benchmarks (no SQL Server needed).
+
+    python -m benchmarks.run_benchmarks      # end-to-end pipeline / HTTP / retrain / cold load
+    python -m benchmarks.micro               # per-function ns/op and allocations
+    python -m benchmarks.logging_overhead    # hot-path logging cost at 1k sessions/s
+"""
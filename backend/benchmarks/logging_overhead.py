@@ -0,0 +1,191 @@
+"""Hot-path logging overhead at a fixed 1k sessions/s (offline).
+
+Two measurements per logging mode (see ``core.logging_setup``):
+
+- ``paced``: the per-session records of the pipeline (enqueued, scored,
+  processed, every 20th a low-confidence warning - same loggers, templates and
+  ``event`` tags as the call sites) emitted at a fixed ``--rate`` from one
+  producer thread. Reports producer time per session, achieved rate, process
+  CPU (includes the listener thread) and the time to drain the async queue;
+- ``pipeline``: ``ScoringAgentRunner`` draining ``InMemoryQueueService``
+  unpaced; reports sessions/s and the runner's ``log`` stage latency.
+
+The sink writes to a temp file, not the console.
+
+Usage:
+    python -m benchmarks.logging_overhead [--quick] [--rate 1000] [--seconds 5] [--output FILE]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from application.runners.scoring_runner import ScoringAgentRunner
+from benchmarks.memory_queue import InMemoryQueueService
+from benchmarks.run_benchmarks import (
+    RESULTS_DIR, ModelSandbox, _drain, git_revision, latency_summary, make_sessions, rate,
+)
+from core.logging_setup import configure_logging
+
+MODES: Dict[str, dict] = {
+    "off": {"level": logging.WARNING, "async_sink": False, "rate_limits": {}},
+    "sync_text": {"async_sink": False, "rate_limits": {}},
+    "async_text": {"async_sink": True, "rate_limits": {}},
+    "async_json": {"async_sink": True, "structured": True, "rate_limits": {}},
+    "async_text_rate_limited": {"async_sink": True, "rate_limits": None},  # DEFAULT_RATE_LIMITS
+    "async_json_rate_limited": {"async_sink": True, "structured": True, "rate_limits": None},
+}
+
+queue_log = logging.getLogger("application.services.queue_service")
+runner_log = logging.getLogger("application.runners.scoring_runner")
+
+
+def emit_session(i: int):
+    """The records one session produces on its way through the pipeline."""
+    queue_log.info("✅ Sesija #%s (%s) stavljena u queue [%s]", i, f"player-{i % 40}", "normal",
+                   extra={"event": "queue.enqueued", "session_id": i})
+    if i % 20 == 0:
+        runner_log.warning("⚠️ Low confidence prediction: %.2f", 0.61,
+                           extra={"event": "scoring.low_confidence"})
+    runner_log.info("✅ Agent procesirao: %s - %s (fatigue: %.1f, conf: %.2f)",
+                    f"player-{i % 40}", "train_normally", 42.5, 0.83,
+                    extra={"event": "scoring.tick", "session_id": i})
+    queue_log.info("✅ Sesija #%s processed: %s (fatigue: %.1f, injury_prob: %.2f)",
+                   i, "train_normally", 42.5, 0.07,
+                   extra={"event": "queue.processed", "session_id": i})
+
+
+def bench_paced(target_rate: float, seconds: float) -> dict:
+    count = int(target_rate * seconds)
+    interval = 1.0 / target_rate
+    samples: List[float] = []
+    cpu_started = time.process_time()
+    producer_cpu_started = time.thread_time()
+    started = time.perf_counter()
+    next_at = started
+    for i in range(count):
+        t0 = time.perf_counter()
+        emit_session(i)
+        samples.append((time.perf_counter() - t0) * 1e6)
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - started
+    summary = latency_summary(samples)
+    return {
+        "sessions": count,
+        "achieved_rate": rate(count, elapsed),
+        "producer_us_per_session": {
+            "mean": summary["mean_ms"], "p50": summary["p50_ms"],
+            "p99": summary["p99_ms"], "max": summary["max_ms"],
+        },
+        "producer_cpu_pct": 100.0 * (time.thread_time() - producer_cpu_started) / elapsed,
+        "process_cpu_pct": 100.0 * (time.process_time() - cpu_started) / elapsed,
+    }
+
+
+def bench_pipeline(sandbox: ModelSandbox, n: int) -> dict:
+    scoring = sandbox.scoring_service()
+    queue = InMemoryQueueService()
+    for session in make_sessions(n, seed=11):
+        queue.enqueue(session)
+    runner = ScoringAgentRunner(queue, scoring)
+    started = time.perf_counter()
+    processed = _drain(runner)
+    elapsed = time.perf_counter() - started
+    stages = runner.latency.snapshot()
+    return {
+        "sessions": processed,
+        "sessions_per_sec": rate(processed, elapsed),
+        "log_stage_ms": {k: stages["log"][k] for k in ("mean_ms", "p50_ms", "p99_ms", "max_ms")},
+        "tick_p50_ms": stages["tick"]["p50_ms"],
+    }
+
+
+def run_mode(name: str, options: dict, sandbox: ModelSandbox, target_rate: float,
+             seconds: float, pipeline_sessions: int, directory: str) -> dict:
+    path = os.path.join(directory, f"{name}.log")
+    with open(path, "w", encoding="utf-8") as sink:
+        options = dict(options)
+        level = options.pop("level", logging.INFO)
+        runtime = configure_logging(level=level, stream=sink, **options)
+        result = {"paced": bench_paced(target_rate, seconds)}
+        stop_started = time.perf_counter()
+        runtime.stop()
+        result["paced"]["drain_ms"] = (time.perf_counter() - stop_started) * 1000.0
+        result["paced"]["filter"] = {k: v for k, v in runtime.get_stats().items() if k in ("passed", "dropped")}
+
+        runtime = configure_logging(level=level, stream=sink, **options)
+        result["pipeline"] = bench_pipeline(sandbox, pipeline_sessions)
+        runtime.stop()
+    result["log_bytes"] = os.path.getsize(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="1 s per mode, 200 pipeline sessions")
+    parser.add_argument("--rate", type=float, default=1000.0, help="paced sessions per second")
+    parser.add_argument("--seconds", type=float, default=5.0, help="paced run length per mode")
+    parser.add_argument("--pipeline-sessions", type=int, default=2000)
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated subset of {list(MODES)}")
+    parser.add_argument("--output", default=None,
+                        help="JSON file (default: benchmarks/results/logging-<timestamp>.json)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.seconds, args.pipeline_sessions = 1.0, 200
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {sorted(unknown)}")
+
+    sandbox = ModelSandbox()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="fatigue-logbench-") as directory:
+            for name in modes:
+                print(f"▶ {name}")
+                results[name] = run_mode(name, MODES[name], sandbox, args.rate, args.seconds,
+                                         args.pipeline_sessions, directory)
+    finally:
+        configure_logging(level=logging.WARNING, async_sink=False, rate_limits={})
+        sandbox.cleanup()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "rate": args.rate,
+            "seconds": args.seconds,
+            "pipeline_sessions": args.pipeline_sessions,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"logging-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"✓ Results: {output}")
+
+    print(f"   {'mode':<26}{'rate/s':>8}{'us/sess':>9}{'p99 us':>9}{'cpu %':>7}{'drain ms':>10}"
+          f"{'pipe/s':>8}{'log p99 ms':>11}")
+    for name, result in results.items():
+        paced, pipeline = result["paced"], result["pipeline"]
+        print(f"   {name:<26}{paced['achieved_rate']:>8.0f}{paced['producer_us_per_session']['mean']:>9.1f}"
+              f"{paced['producer_us_per_session']['p99']:>9.1f}{paced['process_cpu_pct']:>7.1f}"
+              f"{paced['drain_ms']:>10.1f}{pipeline['sessions_per_sec']:>8.0f}"
+              f"{pipeline['log_stage_ms']['p99_ms']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""In-memory stand-in for the SQL Server backed ``QueueService``.
+
+Same public interface (enqueue / dequeue_next / mark_as_processed /
+mark_many_as_processed / insert_scored_many / find_by_request_id /
+read_load_rows / read_player_load_rows / reap_expired_leases /
+get_lane_stats) plus ``get_session_status`` with the row shape of
+``infrastructure.database.get_session_status``, so the runner, the write
+buffer and the web layer can be benchmarked without a database. Lane
+selection reuses ``QueueService._next_lane`` (same weighted round-robin).
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from application.services.queue_service import QueueService, LANE_PRIORITY
+from domain.entities import TrainingSession, SessionStatus
+
+
+class InMemoryQueueService(QueueService):
+    """QueueService backed by dicts and per-lane deques."""
+
+    def __init__(self, worker_id: str = "bench:0", **kwargs):
+        super().__init__(worker_id=worker_id, **kwargs)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._sessions: Dict[int, TrainingSession] = {}
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._lanes = {lane: deque() for lane in LANE_PRIORITY}
+        self._request_ids: Dict[str, int] = {}
+        # (Id, PlayerName, Timestamp, DistanceKm, RPE) in insertion order, as read_load_rows returns them
+        self._load_rows: List[tuple] = []
+
+    def enqueue(self, session: TrainingSession) -> TrainingSession:
+        with self._lock:
+            session.id = self._next_id
+            self._next_id += 1
+            session.status = SessionStatus.QUEUED
+            self._sessions[session.id] = session
+            self._rows[session.id] = {
+                "id": session.id,
+                "timestamp": session.timestamp,
+                "predicted_action": None,
+                "fatigue_score": None,
+                "risk_level": None,
+                "confidence": None,
+                "status": SessionStatus.QUEUED.value,
+                "injury_prob": None,
+                "enqueued_at": time.monotonic(),
+                "claimed_by": None,
+            }
+            self._lanes[session.priority].append(session.id)
+            self._load_rows.append((session.id, session.player_name, session.timestamp,
+                                    session.distance_km, session.rpe))
+        return session
+
+    def dequeue_next(self) -> Optional[TrainingSession]:
+        lane = self._next_lane()
+        with self._lock:
+            # Chosen lane first, then the rest by priority (same ORDER BY as the SQL version)
+            order = [lane] + sorted((l for l in self._lanes if l != lane), key=LANE_PRIORITY.get)
+            for candidate in order:
+                if self._lanes[candidate]:
+                    session_id = self._lanes[candidate].popleft()
+                    break
+            else:
+                return None
+            row = self._rows[session_id]
+            row["status"] = SessionStatus.PROCESSING.value
+            row["claimed_by"] = self.worker_id
+            session = self._sessions[session_id]
+            session.status = SessionStatus.PROCESSING
+            self._record_dequeue(candidate, (time.monotonic() - row["enqueued_at"]) * 1000.0)
+            return session
+
+    def _write_result(self, session_id: int, action: str, fatigue_score: float,
+                      risk_level: str, confidence: float, injury_prob: Optional[float]) -> bool:
+        row = self._rows.get(session_id)
+        if row is None or row["claimed_by"] != self.worker_id:
+            return False
+        row.update(
+            predicted_action=action,
+            fatigue_score=fatigue_score,
+            risk_level=risk_level,
+            confidence=confidence,
+            injury_prob=injury_prob,
+            status=SessionStatus.PROCESSED.value,
+            timestamp=datetime.now(),
+        )
+        return True
+
+    def mark_as_processed(self, session_id: int, action: str,
+                          fatigue_score: float, risk_level: str, confidence: float,
+                          injury_prob: float = None) -> bool:
+        with self._lock:
+            return self._write_result(session_id, action, fatigue_score, risk_level, confidence, injury_prob)
+
+    def mark_many_as_processed(self, rows: Sequence[tuple]) -> int:
+        with self._lock:
+            return sum(self._write_result(session_id, action, fatigue_score, risk_level, confidence, injury_prob)
+                       for action, fatigue_score, risk_level, confidence, injury_prob, session_id in rows)
+
+    def insert_scored_many(self, rows: Sequence[tuple]) -> int:
+        with self._lock:
+            for row in rows:
+                (timestamp, player, _position, _activity, _sleep, _stress, distance, _sprints,
+                 _soreness, rpe, _injury, _priority, action, fatigue_score, risk_level,
+                 confidence, injury_prob, request_id) = row
+                session_id = self._next_id
+                self._next_id += 1
+                self._rows[session_id] = {
+                    "id": session_id,
+                    "timestamp": timestamp,
+                    "predicted_action": action,
+                    "fatigue_score": fatigue_score,
+                    "risk_level": risk_level,
+                    "confidence": confidence,
+                    "status": SessionStatus.PROCESSED.value,
+                    "injury_prob": injury_prob,
+                    "enqueued_at": time.monotonic(),
+                    "claimed_by": None,
+                }
+                self._request_ids[request_id] = session_id
+                self._load_rows.append((session_id, player, timestamp, distance, rpe))
+        return len(rows)
+
+    def find_by_request_id(self, request_id: str) -> Optional[int]:
+        with self._lock:
+            return self._request_ids.get(request_id)
+
+    def read_load_rows(self, after_id: int, since: datetime, limit: int = 5000) -> List[tuple]:
+        with self._lock:
+            start = bisect.bisect_right(self._load_rows, after_id, key=lambda row: row[0])
+            rows = []
+            for row in self._load_rows[start:]:
+                if row[2] >= since:
+                    rows.append(row)
+                    if len(rows) >= limit:
+                        break
+            return rows
+
+    def read_player_load_rows(self, player_names: Sequence[str], since: datetime, until: datetime,
+                              until_id: int) -> List[tuple]:
+        names = set(player_names)
+        with self._lock:
+            end = bisect.bisect_right(self._load_rows, until_id, key=lambda row: row[0])
+            return [row for row in self._load_rows[:end]
+                    if row[1] in names and since <= row[2] < until]
+
+    def reap_expired_leases(self) -> Dict[str, Any]:
+        return {"requeued": 0, "dead_lettered": 0, "dead_letter_ids": []}
+
+    def get_lane_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            depth = {lane: len(ids) for lane, ids in self._lanes.items()}
+        stats = {}
+        for lane in LANE_PRIORITY:
+            dequeued = self.lane_dequeued[lane]
+            stats[lane.value] = {
+                "weight": self.lane_weights.get(lane, 0),
+                "depth": depth[lane],
+                "oldest_wait_s": 0.0,
+                "dequeued": dequeued,
+                "avg_wait_ms": self.lane_wait_ms_total[lane] / dequeued if dequeued else 0.0,
+                "max_wait_ms": self.lane_wait_ms_max[lane],
+            }
+        return stats
+
+    def get_session_status(self, session_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._rows.get(session_id)
+            if row is None:
+                return None
+            return {key: row[key] for key in (
+                "id", "timestamp", "predicted_action", "fatigue_score",
+                "risk_level", "confidence", "status", "injury_prob",
+            )}
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return sum(len(ids) for ids in self._lanes.values())
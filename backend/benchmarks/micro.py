@@ -0,0 +1,270 @@
+"""Microbenchmarks for the per-session hot path (ns/op and allocations per call).
+
+Models are fitted in memory from ``data/Workout_Routine_Dirty.csv`` with the
+same pure fit functions the classifiers use (nothing is written to the tree),
+so the numbers do not depend on which ``*.joblib`` happens to be committed.
+
+Cases:
+    encode_features, prepare_features,
+    predict[n=16|1k|100k]          (kNN confidence over the neighbour set),
+    predict_injury_prob[model|model+fallback|fallback_only],
+    risk.predict_risk_level, scoring.score_session
+
+Per case: best/median ns per call over ``--repeat`` timed runs (loop count
+auto-calibrated to ``--min-time``), plus tracemalloc allocations per call:
+peak transient bytes and retained bytes / blocks.
+
+Usage:
+    python -m benchmarks.micro [--quick] [--filter predict] [--output FILE]
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from application.services.scoring_service import FatigueScoringService
+from domain.entities import TrainingSession
+from infrastructure.ml.classifier import (
+    FatigueClassifier, encode_feature_frame, fit_fatigue_csv_model, fit_injury_pipeline,
+)
+from infrastructure.ml.feature_store import FeatureStore
+from infrastructure.ml.risk_classifier import RiskClassifier, fit_risk_pipeline
+from infrastructure.ml.training_data import (
+    load_csv_feature_frame, injury_training_set, risk_training_set,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CSV = os.path.join(BACKEND_DIR, "data", "Workout_Routine_Dirty.csv")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+NEIGHBOR_SIZES = {"16": 16, "1k": 1_000, "100k": 100_000}
+FEATURE_COLUMNS = ["position", "activity_type", "sleep_hours", "stress_level",
+                   "distance_km", "sprint_count", "soreness", "rpe"]
+
+
+@dataclass
+class MicroResult:
+    name: str
+    loops: int
+    best_ns: float
+    median_ns: float
+    alloc_bytes: float
+    retained_blocks: float
+    retained_bytes: float
+
+    def line(self) -> str:
+        return (f"{self.name:<42} {self.best_ns:>12,.0f} {self.median_ns:>12,.0f} "
+                f"{self.alloc_bytes:>10,.0f} {self.retained_blocks:>9.1f} {self.retained_bytes:>9,.0f}")
+
+
+HEADER = f"{'case':<42} {'best ns/op':>12} {'median ns/op':>12} {'alloc B':>10} {'kept blk':>9} {'kept B':>9}"
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _calibrate(fn: Callable[[], object], min_time: float) -> int:
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= min_time or loops >= 1 << 20:
+            return loops
+        loops *= 2
+
+
+def _allocations(fn: Callable[[], object], calls: int) -> Dict[str, float]:
+    """tracemalloc per call: peak transient bytes, retained blocks and bytes."""
+    fn()  # lazy state / caches outside the measurement
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        start_current, _ = tracemalloc.get_traced_memory()
+        peak_total = 0
+        for _ in range(calls):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+        end_current, _ = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    blocks = sum(max(stat.count_diff, 0) for stat in diff)
+    return {
+        "alloc_bytes": peak_total / calls,
+        "retained_blocks": blocks / calls,
+        "retained_bytes": max(end_current - start_current, 0) / calls,
+    }
+
+
+def measure(name: str, fn: Callable[[], object], repeat: int, min_time: float,
+            alloc_calls: int) -> MicroResult:
+    loops = _calibrate(fn, min_time)
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            for _ in range(loops):
+                fn()
+            timings.append((time.perf_counter_ns() - started) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    allocations = _allocations(fn, alloc_calls)
+    return MicroResult(name, loops, min(timings), statistics.median(timings), **allocations)
+
+
+# ---------------------------------------------------------------------------
+# Fixtures (in-memory models fitted from the CSV)
+# ---------------------------------------------------------------------------
+
+class Fixtures:
+    def __init__(self, csv_path: str, quick: bool):
+        self.directory = tempfile.mkdtemp(prefix="fatigue-micro-")
+        frame = load_csv_feature_frame(csv_path)
+        if quick:
+            frame = frame.sample(n=min(len(frame), 300), random_state=42)
+        X_encoded = encode_feature_frame(frame)
+        y = frame["fatigue"].to_numpy(dtype=float)
+
+        model, scaler, _ = fit_fatigue_csv_model(X_encoded, y)
+        injury_pipeline, _ = fit_injury_pipeline(*injury_training_set(frame))
+        risk_pipeline, _ = fit_risk_pipeline(*risk_training_set(frame))
+
+        # Assigned directly (install_* would also persist models and ml_metrics.json)
+        self.classifier = FatigueClassifier.empty(os.path.join(self.directory, "fatigue_model.joblib"))
+        self.classifier.model = model
+        self.classifier.scaler = scaler
+        self.classifier.injury_model = injury_pipeline
+        self.classifier.training_dataset = FeatureStore.from_arrays(X_encoded, y)
+
+        self.risk = RiskClassifier.empty(os.path.join(self.directory, "risk_model.joblib"))
+        self.risk.model = risk_pipeline
+        self.risk.trained_columns = list(risk_training_set(frame)[0].columns)
+
+        self.no_injury_model = FatigueClassifier.empty(os.path.join(self.directory, "fallback.joblib"))
+
+        self.scoring = FatigueScoringService(self.classifier, exploration_rate=0.0, risk_classifier=self.risk)
+
+        self.rows = [list(row) for row in frame[FEATURE_COLUMNS].itertuples(index=False)]
+        self.X_encoded, self.y = X_encoded, y
+        self.features = self.rows[0]
+        self.session = TrainingSession.create_new(
+            "bench", self.features[0], self.features[1], *self.features[2:8])
+        self.session.id = 1
+
+        # One row above and one below 0.15 (below it predict_injury_prob also blends in the fallback)
+        probs = injury_pipeline.predict_proba(injury_training_set(frame)[0])[:, 1]
+        self.injury_high = self.rows[int(np.argmax(probs))] if probs.max() >= 0.15 else None
+        self.injury_low = self.rows[int(np.argmin(probs))] if probs.min() < 0.15 else None
+
+    def neighbours(self, size: int) -> FeatureStore:
+        """``size`` neighbour rows: the CSV rows, tiled with small jitter."""
+        rng = np.random.default_rng(size)
+        index = rng.integers(0, len(self.y), size)
+        X = self.X_encoded[index].astype(np.float32)
+        X[:, 2:] += rng.normal(0, 0.05, (size, X.shape[1] - 2)).astype(np.float32)
+        return FeatureStore.from_arrays(X, self.y[index])
+
+
+def build_cases(fx: Fixtures) -> Dict[str, Callable[[], object]]:
+    features = fx.features
+    cases: Dict[str, Callable[[], object]] = {
+        "fatigue._encode_features": lambda: fx.classifier._encode_features(features),
+        "fatigue._prepare_features": lambda: fx.classifier._prepare_features(features),
+    }
+
+    for label, size in NEIGHBOR_SIZES.items():
+        classifier = FatigueClassifier.empty(os.path.join(fx.directory, f"fatigue_{label}.joblib"))
+        classifier.model, classifier.scaler = fx.classifier.model, fx.classifier.scaler
+        classifier.training_dataset = fx.neighbours(size)
+        cases[f"fatigue.predict[n={label}]"] = (lambda c: lambda: c.predict(features))(classifier)
+
+    if fx.injury_high is not None:
+        cases["fatigue.predict_injury_prob[model]"] = lambda: fx.classifier.predict_injury_prob(fx.injury_high)
+    if fx.injury_low is not None:
+        cases["fatigue.predict_injury_prob[model+fallback]"] = lambda: fx.classifier.predict_injury_prob(fx.injury_low)
+    cases["fatigue.predict_injury_prob[fallback_only]"] = lambda: fx.no_injury_model.predict_injury_prob(features)
+
+    cases["risk.predict_risk_level"] = lambda: fx.risk.predict_risk_level(features)
+    cases["scoring.score_session"] = lambda: fx.scoring.score_session(fx.session)
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--quick", action="store_true", help="fewer repeats, 300-row CSV sample")
+    parser.add_argument("--filter", default=None, help="only cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=None, help="timed runs per case (default 7, quick 3)")
+    parser.add_argument("--min-time", type=float, default=None, help="seconds per timed run (default 0.2, quick 0.05)")
+    parser.add_argument("--output", default=None, help="JSON file (default: benchmarks/results/micro-<timestamp>.json)")
+    args = parser.parse_args()
+
+    repeat = args.repeat or (3 if args.quick else 7)
+    min_time = args.min_time or (0.05 if args.quick else 0.2)
+    alloc_calls = 20 if args.quick else 100
+
+    warnings.filterwarnings("ignore")
+    fixtures = Fixtures(args.csv, args.quick)
+    cases = build_cases(fixtures)
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+
+    print(HEADER)
+    results: List[MicroResult] = []
+    try:
+        for name, fn in cases.items():
+            result = measure(name, fn, repeat, min_time, alloc_calls)
+            results.append(result)
+            print(result.line())
+    finally:
+        shutil.rmtree(fixtures.directory, ignore_errors=True)
+
+    skipped = [name for name, row in (("predict_injury_prob[model]", fixtures.injury_high),
+                                      ("predict_injury_prob[model+fallback]", fixtures.injury_low)) if row is None]
+    if skipped:
+        print(f"(skipped, no CSV row on that side of the 0.15 threshold: {', '.join(skipped)})")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"micro-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "repeat": repeat,
+                "min_time": min_time,
+                "quick": args.quick,
+            },
+            "results": {result.name: asdict(result) for result in results},
+        }, handle, indent=2)
+    print(f"✓ Results: {output}")
+
+
+if __name__ == "__main__":
+    main()
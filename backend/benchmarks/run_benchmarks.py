@@ -0,0 +1,531 @@
+"""End-to-end throughput benchmarks for the agent pipeline (offline).
+
+Runs against ``InMemoryQueueService`` instead of SQL Server and against copies
+of the committed models in a temp directory (the repo's model / learning
+state files are never written). Measures:
+
+- enqueue rate (``QueueService.enqueue``);
+- dequeue + score + write-back rate (``ScoringAgentRunner.step`` with and
+  without the write buffer, and ``step_batch_async(32)`` through the inference
+  micro-batcher, with the achieved batch sizes);
+- ``POST /predict`` and ``GET /predictions/{id}`` latency under concurrent
+  load (in-process ASGI, no network);
+- ``POST /score`` (inline scoring, micro-batched) latency under concurrent
+  load against its p99 target, with the achieved batch sizes;
+- fatigue retrain wall-clock vs. feedback history size;
+- model cold-load time (fresh interpreter: imports + load + first predict).
+
+Results are written as JSON; ``--baseline`` compares against an earlier run.
+
+Usage:
+    python -m benchmarks.run_benchmarks [--quick] [--output FILE] [--baseline FILE]
+                                        [--only pipeline,http,...]
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from application.agent_manager import AgentManager
+from application.runners.scoring_runner import ScoringAgentRunner
+from application.services.inline_scoring import InlineScoringService, DEFAULT_SCORE_P99_TARGET_MS
+from application.services.scoring_service import FatigueScoringService
+from application.services.write_buffer import PredictionWriteBuffer, ScoredSessionWriteBuffer
+from benchmarks.memory_queue import InMemoryQueueService
+from core.perf import peak_rss_mb
+from domain.entities import TrainingSession
+from infrastructure.ml.classifier import FatigueClassifier, fit_fatigue_regressor
+from infrastructure.ml.risk_classifier import RiskClassifier
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MODEL_FILES = ("fatigue_model.joblib", "fatigue_model.scaler.joblib", "risk_model.joblib")
+SECTIONS = ("enqueue", "pipeline", "http", "score", "retrain", "cold_load")
+
+POSITIONS = ["goalkeeper", "defender", "midfielder", "forward"]
+
+COLD_LOAD_SNIPPET = """
+import json, os, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+from infrastructure.ml.classifier import FatigueClassifier
+from infrastructure.ml.risk_classifier import RiskClassifier
+t1 = time.perf_counter()
+fc = FatigueClassifier.load(sys.argv[1])
+t2 = time.perf_counter()
+rc = RiskClassifier.load(sys.argv[2])
+t3 = time.perf_counter()
+features = ["midfielder", "practice", 7.0, 5, 8.0, 20, 4, 5]
+fc.predict(features); fc.predict_injury_prob(features); rc.predict_risk_level(features)
+t4 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "fatigue_load_s": t2 - t1, "risk_load_s": t3 - t2,
+                  "first_predict_ms": (t4 - t3) * 1000.0, "total_s": t4 - t0}))
+"""
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_sessions(n: int, seed: int = 7) -> List[TrainingSession]:
+    """Deterministic synthetic sessions covering all positions / lanes."""
+    rng = random.Random(seed)
+    sessions = []
+    for i in range(n):
+        game = rng.random() < 0.3
+        sessions.append(TrainingSession.create_new(
+            player_name=f"player-{i % 40}",
+            position=POSITIONS[i % len(POSITIONS)],
+            activity_type="game" if game else "practice",
+            sleep_hours=round(rng.uniform(4.0, 10.0), 1),
+            stress_level=rng.randint(1, 10),
+            distance_km=round(rng.uniform(2.0, 13.0), 1),
+            sprint_count=rng.randint(0, 40),
+            soreness=rng.randint(1, 10),
+            rpe=rng.randint(1, 10),
+            injury_illness=rng.random() < 0.1,
+            priority="backfill" if rng.random() < 0.1 else None,
+        ))
+    return sessions
+
+
+def latency_summary(samples_ms: List[float]) -> dict:
+    if not samples_ms:
+        return {"count": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(q):
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def rate(count: int, seconds: float) -> float:
+    return count / seconds if seconds > 0 else 0.0
+
+
+class ModelSandbox:
+    """Copies of the committed models in a temp dir (benchmarks may retrain / write state)."""
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="fatigue-bench-")
+        for name in MODEL_FILES:
+            source = os.path.join(BACKEND_DIR, name)
+            if os.path.exists(source):
+                shutil.copy2(source, os.path.join(self.directory, name))
+        self.fatigue_model = os.path.join(self.directory, "fatigue_model.joblib")
+        self.risk_model = os.path.join(self.directory, "risk_model.joblib")
+
+    def scoring_service(self) -> FatigueScoringService:
+        return FatigueScoringService(
+            FatigueClassifier.load(self.fatigue_model),
+            exploration_rate=0.0,
+            risk_classifier=RiskClassifier.load(self.risk_model),
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_enqueue(n: int) -> dict:
+    queue = InMemoryQueueService()
+    sessions = make_sessions(n)
+    started = time.perf_counter()
+    for session in sessions:
+        queue.enqueue(session)
+    elapsed = time.perf_counter() - started
+    return {"sessions": n, "seconds": elapsed, "sessions_per_sec": rate(n, elapsed)}
+
+
+def _drain(runner: ScoringAgentRunner) -> int:
+    processed = 0
+    while runner.step() is not None:
+        processed += 1
+    runner.flush_pending()
+    return processed
+
+
+async def _drain_async(runner: ScoringAgentRunner, concurrency: int) -> int:
+    """Scoring-loop shape with the micro-batcher: ``step_batch_async(concurrency)`` per tick."""
+    processed = 0
+    while True:
+        done = len(await runner.step_batch_async(concurrency))
+        processed += done
+        if done == 0:
+            return processed
+
+
+def bench_pipeline(scoring: FatigueScoringService, n: int, sandbox: Optional[ModelSandbox] = None) -> dict:
+    results = {}
+    if sandbox is not None:
+        batched = sandbox.scoring_service()
+        batched.enable_inference_batching(max_batch=32, max_delay_ms=2.0)
+        queue = InMemoryQueueService()
+        for session in make_sessions(n, seed=11):
+            queue.enqueue(session)
+        runner = ScoringAgentRunner(queue, batched, write_buffer=PredictionWriteBuffer(queue))
+        started = time.perf_counter()
+        processed = asyncio.run(_drain_async(runner, 32))
+        elapsed = time.perf_counter() - started
+        results["inference_batching"] = {
+            "sessions": processed,
+            "seconds": elapsed,
+            "sessions_per_sec": rate(processed, elapsed),
+            "batcher": batched.get_batcher_status(),
+        }
+        batched.inference_batcher.close()
+    for mode in ("direct", "write_buffer"):
+        queue = InMemoryQueueService()
+        for session in make_sessions(n, seed=11):
+            queue.enqueue(session)
+        buffer = PredictionWriteBuffer(queue) if mode == "write_buffer" else None
+        runner = ScoringAgentRunner(queue, scoring, write_buffer=buffer)
+        started = time.perf_counter()
+        processed = _drain(runner)
+        elapsed = time.perf_counter() - started
+        results[mode] = {
+            "sessions": processed,
+            "seconds": elapsed,
+            "sessions_per_sec": rate(processed, elapsed),
+            "stage_latency": runner.latency.snapshot(),
+        }
+    results["scoring_latency"] = scoring.get_latency_status()
+    return results
+
+
+async def _run_load(client, concurrency: int, total: int,
+                    request: Callable[[object, int], "asyncio.Future"]) -> dict:
+    samples: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await request(client, i)
+            samples.append((time.perf_counter() - started) * 1000.0)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = latency_summary(samples)
+    summary.update(requests_per_sec=rate(len(samples), elapsed), errors=errors)
+    return summary
+
+
+def bench_http(scoring: FatigueScoringService, requests: int, concurrency_levels: List[int]) -> dict:
+    import httpx
+    import web.main as web_main
+    from infrastructure.system_init import SystemContainer
+
+    queue = InMemoryQueueService()
+    manager = AgentManager(scoring.classifier)
+    manager.queue_service = queue
+    manager.scoring_service = scoring
+    container = SystemContainer(scoring.classifier)
+    container.set_agent_manager(manager)
+    app = web_main.create_fastapi_app(container)
+
+    # /predictions reads straight from the database - point it at the in-memory queue
+    original_status = web_main.get_session_status
+    web_main.get_session_status = queue.get_session_status
+
+    payloads = [{
+        "player_name": s.player_name, "position": s.position.value,
+        "activity_type": s.activity_type.value, "sleep_hours": s.sleep_hours,
+        "stress_level": s.stress_level, "distance_km": s.distance_km,
+        "sprint_count": s.sprint_count, "soreness": s.soreness, "rpe": s.rpe,
+    } for s in make_sessions(256, seed=13)]
+
+    async def post_predict(client, i):
+        return await client.post("/predict", json=payloads[i % len(payloads)])
+
+    async def get_prediction(client, i):
+        return await client.get(f"/predictions/{1 + i % processed_ids}")
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            out = {"predict": {}, "predictions": {}}
+            for concurrency in concurrency_levels:
+                out["predict"][str(concurrency)] = await _run_load(client, concurrency, requests, post_predict)
+            for concurrency in concurrency_levels:
+                out["predictions"][str(concurrency)] = await _run_load(client, concurrency, requests, get_prediction)
+            return out
+
+    try:
+        # Score part of what /predict enqueued, so /predictions returns both states
+        for session in make_sessions(requests, seed=17):
+            queue.enqueue(session)
+        runner = ScoringAgentRunner(queue, scoring)
+        processed_ids = max(requests // 2, 1)
+        for _ in range(processed_ids):
+            runner.step()
+        return asyncio.run(run())
+    finally:
+        web_main.get_session_status = original_status
+
+
+def bench_score(scoring: FatigueScoringService, requests: int, concurrency_levels: List[int],
+                max_wait_levels=(0.0, 1.0), p99_target_ms: float = DEFAULT_SCORE_P99_TARGET_MS) -> dict:
+    """POST /score per micro-batch wait setting; results persisted through the in-memory queue."""
+    import httpx
+    import web.main as web_main
+    from infrastructure.system_init import SystemContainer
+
+    payloads = [{
+        "player_name": s.player_name, "position": s.position.value,
+        "activity_type": s.activity_type.value, "sleep_hours": s.sleep_hours,
+        "stress_level": s.stress_level, "distance_km": s.distance_km,
+        "sprint_count": s.sprint_count, "soreness": s.soreness, "rpe": s.rpe,
+    } for s in make_sessions(256, seed=23)]
+
+    async def post_score(client, i):
+        return await client.post("/score", json=payloads[i % len(payloads)])
+
+    async def run(app, inline):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            inline.start()
+            out = {}
+            try:
+                for concurrency in concurrency_levels:
+                    before_requests, before_batches = inline.requests, inline.batches
+                    summary = await _run_load(client, concurrency, requests, post_score)
+                    batches = inline.batches - before_batches
+                    summary.update(
+                        avg_batch_size=(inline.requests - before_requests) / batches if batches else 0.0,
+                        within_p99_target=summary.get("p99_ms", 0.0) <= p99_target_ms,
+                    )
+                    out[str(concurrency)] = summary
+            finally:
+                await inline.stop()
+            return out
+
+    results = {"p99_target_ms": p99_target_ms}
+    for max_wait_ms in max_wait_levels:
+        queue = InMemoryQueueService()
+        manager = AgentManager(scoring.classifier)
+        manager.queue_service = queue
+        manager.scoring_service = scoring
+        manager.inline_scorer = InlineScoringService(
+            scoring, write_buffer=ScoredSessionWriteBuffer(queue, auto_flush=False),
+            max_wait_ms=max_wait_ms, p99_target_ms=p99_target_ms,
+        )
+        container = SystemContainer(scoring.classifier)
+        container.set_agent_manager(manager)
+        app = web_main.create_fastapi_app(container)
+        level = asyncio.run(run(app, manager.inline_scorer))
+        level["persisted"] = len(queue._request_ids)
+        results[f"wait_{max_wait_ms:g}ms"] = level
+    return results
+
+
+def bench_retrain(sandbox: ModelSandbox, history_sizes: List[int]) -> dict:
+    classifier = FatigueClassifier.load(sandbox.fatigue_model)
+    pool = make_sessions(max(history_sizes), seed=19)
+    features = [s.extract_features() for s in pool]
+    X_history = np.vstack([classifier._encode_features(f) for f in features])
+    y_history, _ = classifier.predict_batch(features)
+    y_history = np.clip(y_history + np.random.default_rng(19).normal(0, 5, len(y_history)), 0, 100)
+
+    results = {}
+    for size in history_sizes:
+        X = np.vstack([classifier.initial_examples.X, X_history[:size]]).astype(float)
+        y = np.concatenate([classifier.initial_examples.y, y_history[:size]]).astype(float)
+        model = copy.deepcopy(classifier.model)
+        started = time.perf_counter()
+        fit_fatigue_regressor(model, X, y, classifier.scaler)
+        elapsed = time.perf_counter() - started
+        results[str(size)] = {"rows": len(y), "seconds": elapsed, "iterations": int(getattr(model, "n_iter_", 0))}
+    return results
+
+
+def bench_cold_load(sandbox: ModelSandbox, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, "-c", COLD_LOAD_SNIPPET, sandbox.fatigue_model, sandbox.risk_model],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]} | {"repeats": repeats}
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _flatten(data, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> List[str]:
+    """Lines for metrics that moved more than ``threshold`` (throughput down / latency up = regression)."""
+    now, before = _flatten(current["results"]), _flatten(baseline.get("results", {}))
+    lines = []
+    for key in sorted(now.keys() & before.keys()):
+        if not key.endswith(("_per_sec", "_ms", "_s", "seconds")) or before[key] == 0:
+            continue
+        change = (now[key] - before[key]) / before[key]
+        if abs(change) < threshold:
+            continue
+        worse = change < 0 if key.endswith("_per_sec") else change > 0
+        lines.append(f"{'REGRESSION' if worse else 'improved  '} {key}: {before[key]:.4g} -> {now[key]:.4g} ({change:+.0%})")
+    return lines
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes (smoke run, ~seconds)")
+    parser.add_argument("--only", default=",".join(SECTIONS), help=f"comma-separated subset of {SECTIONS}")
+    parser.add_argument("--output", default=None, help="JSON file (default: benchmarks/results/e2e-<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--log-level", default="WARNING", help="agent logging level during the run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING))
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper(), logging.WARNING))
+    sections = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {sorted(unknown)}")
+
+    if args.quick:
+        sizes = {"enqueue": 2000, "pipeline": 300, "http_requests": 200, "http_concurrency": [1, 8],
+                 "retrain": [100, 500], "cold_load_repeats": 1}
+    else:
+        sizes = {"enqueue": 50000, "pipeline": 5000, "http_requests": 2000, "http_concurrency": [1, 8, 32],
+                 "retrain": [100, 1000, 5000], "cold_load_repeats": 3}
+
+    sandbox = ModelSandbox()
+    results = {}
+    try:
+        scoring = sandbox.scoring_service()
+        if "enqueue" in sections:
+            print("▶ enqueue")
+            results["enqueue"] = bench_enqueue(sizes["enqueue"])
+        if "pipeline" in sections:
+            print("▶ dequeue + score + write-back")
+            results["pipeline"] = bench_pipeline(scoring, sizes["pipeline"], sandbox)
+        if "http" in sections:
+            print("▶ HTTP /predict, /predictions")
+            results["http"] = bench_http(scoring, sizes["http_requests"], sizes["http_concurrency"])
+        if "score" in sections:
+            print("▶ HTTP /score (inline)")
+            results["score"] = bench_score(scoring, sizes["http_requests"], sizes["http_concurrency"])
+        if "retrain" in sections:
+            print("▶ retrain vs history size")
+            results["retrain"] = bench_retrain(sandbox, sizes["retrain"])
+        if "cold_load" in sections:
+            print("▶ model cold load")
+            results["cold_load"] = bench_cold_load(sandbox, sizes["cold_load_repeats"])
+    finally:
+        sandbox.cleanup()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+            "sizes": sizes,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"✓ Results: {output}")
+
+    if "enqueue" in results:
+        print(f"   enqueue:  {results['enqueue']['sessions_per_sec']:.0f} sessions/s")
+    if "pipeline" in results:
+        for mode in ("direct", "write_buffer", "inference_batching"):
+            if mode in results["pipeline"]:
+                print(f"   pipeline ({mode}): {results['pipeline'][mode]['sessions_per_sec']:.0f} sessions/s")
+        batcher = results["pipeline"].get("inference_batching", {}).get("batcher")
+        if batcher:
+            print(f"   inference batcher: avg batch {batcher['avg_batch_size']:.1f}, "
+                  f"avg wait {batcher['avg_wait_ms']:.2f} ms, forward {batcher['avg_forward_ms']:.2f} ms/batch")
+    if "http" in results:
+        for endpoint, levels in results["http"].items():
+            for concurrency, summary in levels.items():
+                print(f"   {endpoint} c={concurrency}: p50 {summary['p50_ms']:.2f} ms, "
+                      f"p99 {summary['p99_ms']:.2f} ms, {summary['requests_per_sec']:.0f} req/s")
+    if "score" in results:
+        target = results["score"]["p99_target_ms"]
+        for mode, levels in results["score"].items():
+            if not isinstance(levels, dict):
+                continue
+            for concurrency, summary in levels.items():
+                if not isinstance(summary, dict):
+                    continue
+                print(f"   score {mode} c={concurrency}: p50 {summary['p50_ms']:.2f} ms, "
+                      f"p99 {summary['p99_ms']:.2f} ms (target {target:.0f}), "
+                      f"batch {summary['avg_batch_size']:.1f}, {summary['requests_per_sec']:.0f} req/s")
+    if "retrain" in results:
+        for size, summary in results["retrain"].items():
+            print(f"   retrain history={size}: {summary['seconds']:.2f} s")
+    if "cold_load" in results:
+        print(f"   cold load: {results['cold_load']['total_s']:.2f} s")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            lines = compare(report, json.load(handle))
+        print(f"\nCompared with {args.baseline}:")
+        print("\n".join(lines) if lines else "   no changes above 10%")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,27 @@ Odgovornosti:
 
 """
 import logging
+import os
 from typing import Optional
 from infrastructure.system_init import InfrastructureSystemInit
+from core.logging_setup import configure_logging_from_env
 
 logger = logging.getLogger(__name__)
 
+# Zajednička konfiguracija za web i worker proces (worker.py)
+SYSTEM_CONFIG = {
+    "model_file": "fatigue_model.joblib",
+    "exploration_rate": 0.05,
+    "gold_threshold": 10,
+}
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Boolean env varijabla ("1", "true", "yes")"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes")
+
 def create_app():
     """
     Factory funkcija za kreiranje FastAPI aplikacije.
@@ -23,6 +39,12 @@ def create_app():
     from fastapi import FastAPI
     from web.main import create_fastapi_app
     
+    # Async/strukturisani logging (FATIGUE_LOG_* env varijable) - prije prvog loga
+    configure_logging_from_env()
+    
+    # FATIGUE_ENQUEUE_ONLY=1: web proces samo prima sesije, boduju ih worker procesi
+    enqueue_only = env_flag("FATIGUE_ENQUEUE_ONLY")
+    
     logger.info("="*70)
     logger.info("🚀 BOOTSTRAP: Pokrećem inicijalizaciju sistema...")
     logger.info("="*70)
@@ -33,15 +55,25 @@ def create_app():
         
         # Sve komponente se kreiraju OVDE, ne u web layeru!
         container = bootstrap.initialize_system(
-            model_file="fatigue_model.joblib",
-            exploration_rate=0.05,
-            gold_threshold=10
+            **SYSTEM_CONFIG,
+            # FATIGUE_CLUSTER=1 za uvicorn --workers N (retrain samo u jednom procesu)
+            cluster_mode=env_flag("FATIGUE_CLUSTER"),
+            enqueue_only=enqueue_only,
+            # FATIGUE_INFERENCE_BATCHING=1: jedan forward pass za više istovremenih predikcija
+            inference_batching=env_flag("FATIGUE_INFERENCE_BATCHING"),
+            # FATIGUE_PLAYER_LOAD=1: MLP dobija ACWR/monotoniju/strain igrača (zaseban model fajl)
+            player_load=env_flag("FATIGUE_PLAYER_LOAD")
         )
         
         if not container:
             raise RuntimeError("❌ Sistem se nije uspio inicijalizovati!")
         
         logger.info("✅ BOOTSTRAP: Sistem uspješno inicijalizovan!")
+        if enqueue_only:
+            logger.info("   ✓ Baza podataka")
+            logger.info("   ✓ Queue Service (enqueue-only - agenti rade u worker procesima)")
+            logger.info("="*70)
+            return create_fastapi_app(container)
         logger.info("   ✓ Baza podataka")
         logger.info("   ✓ ML Classifier")
         logger.info("   ✓ DI Container")
@@ -66,7 +98,7 @@ def get_system_container():
     Koristi se za testove ili CLI naredbe.
     """
     bootstrap = InfrastructureSystemInit()
-    return bootstrap.initialize_system()
+    return bootstrap.initialize_system(**SYSTEM_CONFIG)
 
 if __name__ == "__main__":
     print("🔧 Ovo je bootstrap modul. Koristi se kao:")
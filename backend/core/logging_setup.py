@@ -0,0 +1,268 @@
+"""Logging for the hot path: async sink, structured output, sampling and rate limits.
+
+``configure_logging()`` replaces the root handlers with:
+
+- a ``QueueHandler`` (the producer only enqueues the ``LogRecord``; message
+  formatting and the console write happen in the ``QueueListener`` thread);
+- a ``HotPathFilter`` in front of the queue that samples and rate-limits per
+  message type, so dropped records cost one dict lookup and are never
+  formatted;
+- a text or JSON-lines (``structured=True``) formatter on the sink.
+
+Message type = ``extra={"event": ...}`` if the call sets one, otherwise
+``"<logger>:<format string>"``. Call sites should log with lazy %-formatting
+(``logger.info("x=%s", x)``), not f-strings, so the template is stable and
+nothing is formatted for dropped records.
+
+Environment (read by ``configure_logging_from_env``):
+
+    FATIGUE_LOG_LEVEL=INFO
+    FATIGUE_LOG_FORMAT=text|json
+    FATIGUE_LOG_ASYNC=1
+    FATIGUE_LOG_SAMPLE="scoring.tick=0.1"          # keep 10%
+    FATIGUE_LOG_RATE_LIMIT="queue.processed=20"    # max 20 records/s
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, TextIO
+
+# Per-second caps for the per-session messages (one or more per scoring tick)
+DEFAULT_RATE_LIMITS: Dict[str, float] = {
+    "api.predict": 20.0,
+    "queue.enqueued": 20.0,
+    "queue.processed": 20.0,
+    "scoring.tick": 20.0,
+    "scoring.exploration": 5.0,
+    "scoring.low_confidence": 5.0,
+    "scoring.review_needed": 5.0,
+    "write_buffer.flush": 5.0,
+}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def message_type(record: logging.LogRecord) -> str:
+    event = getattr(record, "event", None)
+    if event:
+        return event
+    return f"{record.name}:{record.msg}"
+
+
+class HotPathFilter(logging.Filter):
+    """Per-message-type sampling (keep every 1/rate-th record) and token-bucket rate limits.
+
+    Only records at or below ``max_level`` (default INFO) are sampled;
+    rate limits apply up to WARNING. Errors always pass. The first record
+    let through after drops carries ``suppressed=<count>``.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None,
+                 rate_limits: Optional[Dict[str, float]] = None,
+                 max_level: int = logging.INFO):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.max_level = max_level
+        self._seen: Dict[str, int] = {}
+        self._buckets: Dict[str, list] = {}  # key -> [tokens, last refill]
+        self._suppressed: Dict[str, int] = {}
+        self.passed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _sampled_out(self, key: str) -> bool:
+        rate = self.sample_rates.get(key)
+        if rate is None or rate >= 1.0:
+            return False
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if rate <= 0.0:
+            return True
+        # Deterministic: keep the 1st record, then every round(1/rate)-th
+        return seen % max(int(round(1.0 / rate)), 1) != 0
+
+    def _rate_limited(self, key: str) -> bool:
+        limit = self.rate_limits.get(key)
+        if limit is None:
+            return False
+        if limit <= 0.0:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [limit, now]
+        bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+        bucket[1] = now
+        if bucket[0] < 1.0:
+            return True
+        bucket[0] -= 1.0
+        return False
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = message_type(record)
+        with self._lock:
+            drop = ((record.levelno <= self.max_level and self._sampled_out(key))
+                    or (record.levelno <= logging.WARNING and self._rate_limited(key)))
+            if drop:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.dropped += 1
+                return False
+            suppressed = self._suppressed.pop(key, 0)
+            self.passed += 1
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "passed": self.passed,
+                "dropped": self.dropped,
+                "pending_suppressed": dict(self._suppressed),
+                "sample_rates": dict(self.sample_rates),
+                "rate_limits": dict(self.rate_limits),
+            }
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, message + ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text; appends the drop count left by HotPathFilter."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} (+{suppressed} suppressed)" if suppressed else text
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that does NOT format in the producer thread.
+
+    The stdlib ``prepare`` renders ``record.msg % args`` before enqueueing
+    (needed for cross-process queues). In-process the record can travel as-is;
+    only the traceback is rendered here because frames do not outlive the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LoggingRuntime:
+    """Handle returned by configure_logging (filter stats, stop/flush)."""
+
+    def __init__(self, hot_path_filter: HotPathFilter,
+                 listener: Optional[logging.handlers.QueueListener]):
+        self.filter = hot_path_filter
+        self.listener = listener
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()  # drains the queue
+            self.listener = None
+
+    def get_stats(self) -> dict:
+        stats = self.filter.get_stats()
+        stats["async"] = self.listener is not None
+        return stats
+
+
+_runtime: Optional[LoggingRuntime] = None
+
+
+def configure_logging(level: int = logging.INFO, structured: bool = False, async_sink: bool = True,
+                      sample_rates: Optional[Dict[str, float]] = None,
+                      rate_limits: Optional[Dict[str, float]] = None,
+                      stream: Optional[TextIO] = None) -> LoggingRuntime:
+    """(Re)configure the root logger; ``rate_limits=None`` means DEFAULT_RATE_LIMITS."""
+    global _runtime
+    if _runtime is not None:
+        _runtime.stop()
+
+    sink = logging.StreamHandler(stream or sys.stderr)
+    sink.setFormatter(StructuredFormatter() if structured else TextFormatter(TEXT_FORMAT))
+    hot_path_filter = HotPathFilter(
+        sample_rates=sample_rates,
+        rate_limits=DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits,
+    )
+
+    listener = None
+    if async_sink:
+        handler: logging.Handler = LazyQueueHandler(queue.SimpleQueue())
+        listener = logging.handlers.QueueListener(handler.queue, sink, respect_handler_level=True)
+        listener.start()
+    else:
+        handler = sink
+    handler.addFilter(hot_path_filter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _runtime = LoggingRuntime(hot_path_filter, listener)
+    return _runtime
+
+
+def get_logging_runtime() -> Optional[LoggingRuntime]:
+    return _runtime
+
+
+def _parse_pairs(value: Optional[str]) -> Dict[str, float]:
+    pairs = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, number = item.split("=", 1)
+            pairs[key.strip()] = float(number)
+    return pairs
+
+
+def configure_logging_from_env() -> LoggingRuntime:
+    rate_limits = dict(DEFAULT_RATE_LIMITS)
+    rate_limits.update(_parse_pairs(os.getenv("FATIGUE_LOG_RATE_LIMIT")))
+    return configure_logging(
+        level=getattr(logging, os.getenv("FATIGUE_LOG_LEVEL", "INFO").upper(), logging.INFO),
+        structured=os.getenv("FATIGUE_LOG_FORMAT", "text").lower() == "json",
+        async_sink=os.getenv("FATIGUE_LOG_ASYNC", "1") not in ("0", "false", "no"),
+        sample_rates=_parse_pairs(os.getenv("FATIGUE_LOG_SAMPLE")),
+        rate_limits=rate_limits,
+    )
+
+
+@atexit.register
+def _flush_on_exit():
+    if _runtime is not None:
+        _runtime.stop()
@@ -0,0 +1,177 @@
+"""Per-stage latency metrics with sliding-window percentiles and Prometheus text export.
+
+``LatencyRegistry`` holds one ``LatencyHistogram`` per stage name. Each
+histogram keeps:
+
+- cumulative bucket counts / sum / count since start (Prometheus histogram);
+- the samples of the last ``window_seconds`` (bounded by ``max_samples``) for
+  p50/p95/p99 on ``/agent/status``.
+"""
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bucket upper bounds in milliseconds
+DEFAULT_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class LatencyHistogram:
+    """Latency distribution of one stage."""
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 4096,
+                 buckets_ms: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.window_seconds = window_seconds
+        self.buckets_ms = tuple(buckets_ms)
+        self.bucket_counts = [0] * (len(self.buckets_ms) + 1)  # last = +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._window: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets_ms, value_ms)] += 1
+            self.count += 1
+            self.sum_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+            self._window.append((now, value_ms))
+
+    def _window_values(self, now: float) -> List[float]:
+        cutoff = now - self.window_seconds
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+        return sorted(value for _, value in self._window)
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            values = self._window_values(now)
+            snap = {
+                "count": self.count,
+                "mean_ms": self.sum_ms / self.count if self.count else 0.0,
+                "max_ms": self.max_ms,
+                "window_seconds": self.window_seconds,
+                "window_count": len(values),
+            }
+        for q in QUANTILES:
+            snap[f"p{int(q * 100)}_ms"] = _percentile(values, q)
+        return snap
+
+    def cumulative_buckets(self) -> List[Tuple[float, int]]:
+        """[(upper bound ms, cumulative count), ...] ending with (+inf, count)."""
+        with self._lock:
+            counts = list(self.bucket_counts)
+        result, running = [], 0
+        for bound, n in zip(self.buckets_ms + (float("inf"),), counts):
+            running += n
+            result.append((bound, running))
+        return result
+
+
+class LatencyRegistry:
+    """Named stage histograms for one component (runner, scoring service, ...)."""
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 4096):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        hist = self._stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(
+                    stage, LatencyHistogram(self.window_seconds, self.max_samples)
+                )
+        return hist
+
+    def observe(self, stage: str, value_ms: float):
+        self.histogram(stage).observe(value_ms)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000.0)
+
+    def stages(self) -> Dict[str, LatencyHistogram]:
+        with self._lock:
+            return dict(self._stages)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {stage: hist.snapshot() for stage, hist in self.stages().items()}
+
+
+def _labels(**labels: str) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render_prometheus(registries: Dict[str, LatencyRegistry],
+                      gauges: Iterable[Tuple[str, str, float]] = (),
+                      prefix: str = "fatigue") -> str:
+    """Prometheus text exposition (format 0.0.4).
+
+    ``registries``: component name -> registry; exported as
+    ``<prefix>_stage_duration_seconds`` (histogram) and
+    ``<prefix>_stage_duration_window_seconds`` (sliding-window quantiles).
+    ``gauges``: (metric name, help text, value) tuples exported as-is.
+    """
+    lines: List[str] = []
+    hist_name = f"{prefix}_stage_duration_seconds"
+    window_name = f"{prefix}_stage_duration_window_seconds"
+
+    lines.append(f"# HELP {hist_name} Per-stage latency of the SENSE-THINK-ACT-LEARN loop.")
+    lines.append(f"# TYPE {hist_name} histogram")
+    snapshots = []
+    for component, registry in registries.items():
+        for stage, hist in sorted(registry.stages().items()):
+            for bound_ms, cumulative in hist.cumulative_buckets():
+                le = _fmt(bound_ms / 1000.0)
+                lines.append(f"{hist_name}_bucket{_labels(component=component, stage=stage, le=le)} {cumulative}")
+            labels = _labels(component=component, stage=stage)
+            lines.append(f"{hist_name}_sum{labels} {_fmt(hist.sum_ms / 1000.0)}")
+            lines.append(f"{hist_name}_count{labels} {hist.count}")
+            snapshots.append((component, stage, hist.snapshot()))
+
+    lines.append(f"# HELP {window_name} Latency quantiles over the sliding window.")
+    lines.append(f"# TYPE {window_name} gauge")
+    for component, stage, snap in snapshots:
+        for q in QUANTILES:
+            labels = _labels(component=component, stage=stage, quantile=str(q))
+            lines.append(f"{window_name}{labels} {_fmt(snap[f'p{int(q * 100)}_ms'] / 1000.0)}")
+
+    for name, help_text, value in gauges:
+        metric = f"{prefix}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {_fmt(value if value is not None else 0.0)}")
+
+    return "\n".join(lines) + "\n"
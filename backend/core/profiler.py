@@ -0,0 +1,170 @@
+"""Stdlib-only sampling profiler for a running process.
+
+A daemon thread wakes every ``interval`` seconds, grabs every thread's current
+frame with ``sys._current_frames()`` and counts the stacks. Nothing is hooked
+into the profiled code (unlike ``sys.setprofile``), so the cost is one stack
+walk per thread per sample and is paid by the sampler thread (plus the GIL it
+holds while walking).
+
+``focus`` restricts the profile to stacks that pass through one of the given
+functions (e.g. the agent loops); the stack is cut so that function becomes
+the root. Output is the collapsed-stack format read by ``flamegraph.pl``,
+speedscope and inferno::
+
+    thread;outer (file.py);inner (file.py) 42
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Set
+
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(code, line: Optional[int] = None) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    where = os.path.basename(code.co_filename)
+    if line is not None:
+        where = f"{where}:{line}"
+    return f"{name} ({where})"
+
+
+@dataclass
+class ProfileReport:
+    started_at: float
+    duration_s: float
+    interval_s: float
+    samples: int = 0
+    matched_samples: int = 0
+    sampler_cpu_s: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        """One ``frame;frame;... count`` line per distinct stack, hottest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[dict]:
+        """Self (leaf) and total (anywhere on the stack) sample counts per frame."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]  # first element is the thread name
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        matched = self.matched_samples or 1
+        return [{
+            "function": frame,
+            "self_samples": self_counts[frame],
+            "total_samples": total_counts[frame],
+            "self_pct": 100.0 * self_counts[frame] / matched,
+            "total_pct": 100.0 * total_counts[frame] / matched,
+        } for frame in sorted(total_counts, key=lambda f: (self_counts[f], total_counts[f]), reverse=True)[:limit]]
+
+    def to_dict(self, top: int = 20) -> dict:
+        return {
+            "started_at": self.started_at,
+            "duration_s": self.duration_s,
+            "interval_s": self.interval_s,
+            "samples": self.samples,
+            "matched_samples": self.matched_samples,
+            "sampler_cpu_s": self.sampler_cpu_s,
+            "sampler_cpu_pct": 100.0 * self.sampler_cpu_s / self.duration_s if self.duration_s else 0.0,
+            "top_functions": self.top_functions(top),
+            "collapsed": self.collapsed(),
+        }
+
+
+class SamplingProfiler:
+    """Samples all threads (except itself) until ``stop()``."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL,
+                 focus: Optional[Iterable[Callable]] = None,
+                 line_numbers: bool = False):
+        self.interval = max(float(interval), 0.0005)
+        self.line_numbers = line_numbers
+        self._focus: Set = {getattr(fn, "__code__", fn) for fn in (focus or ())}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._report: Optional[ProfileReport] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("Profiler already running")
+        self._stop.clear()
+        self._report = ProfileReport(started_at=time.time(), duration_s=0.0, interval_s=self.interval)
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> ProfileReport:
+        if self._thread is None:
+            raise RuntimeError("Profiler was not started")
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self._report
+
+    def _run(self):
+        report = self._report
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        next_at = started
+        while not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                report.samples += 1
+                stack = self._stack(frame)
+                if stack is None:
+                    continue
+                report.matched_samples += 1
+                report.stacks[";".join([names.get(thread_id, str(thread_id))] + stack)] += 1
+            # Fixed schedule: the sampling cost does not stretch the interval
+            next_at += self.interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_at = time.perf_counter()
+        report.duration_s = time.perf_counter() - started
+        report.sampler_cpu_s = time.thread_time() - cpu_started
+
+    def _stack(self, frame) -> Optional[List[str]]:
+        """Root-first frame labels; None if the stack misses every focus function."""
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        if self._focus:
+            for index, candidate in enumerate(frames):
+                if candidate.f_code in self._focus:
+                    frames = frames[index:]
+                    break
+            else:
+                return None
+        return [_frame_label(f.f_code, f.f_lineno if self.line_numbers else None) for f in frames]
+
+
+def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL,
+                focus: Optional[Iterable[Callable]] = None,
+                line_numbers: bool = False) -> ProfileReport:
+    """Blocking helper: sample for ``seconds`` and return the report."""
+    profiler = SamplingProfiler(interval=interval, focus=focus, line_numbers=line_numbers)
+    profiler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        report = profiler.stop()
+    return report
@@ -17,6 +17,13 @@ class SessionStatus(str, Enum):
     PROCESSING = "processing"
     PROCESSED = "processed"
     REVIEW_NEEDED = "review_needed"
+    DEAD_LETTER = "dead_letter"  # Lease je istekao previše puta - ne pokušava se ponovo
+
+class SessionPriority(str, Enum):
+    """Lane u redu za scoring (live ide prije normal, normal prije backfill)"""
+    LIVE = "live"          # Utakmice / izvještaji koje trener čeka
+    NORMAL = "normal"      # Obične API prijave
+    BACKFILL = "backfill"  # Bulk import historijskih sesija
 
 class Position(str, Enum):
     """Pozicije igrača"""
@@ -38,7 +45,8 @@ class PlayerAction(str, Enum):
     REST_RECOMMENDED = "rest_recommended"
     MUST_REST = "must_rest"
 
-@dataclass
+# slots=True: bez __dict__ po instanci - sesije i predikcije su objekti hot path-a
+@dataclass(slots=True)
 class TrainingSession:
     """Domenska entitet - Treninška sesija - UPDATED sa novim features"""
     id: Optional[int] = None
@@ -60,13 +68,20 @@ class TrainingSession:
     risk_level: Optional[RiskLevel] = None
     confidence: Optional[float] = None
     status: SessionStatus = SessionStatus.QUEUED
+    priority: SessionPriority = SessionPriority.NORMAL
     
     @classmethod
     def create_new(cls, player_name: str, position: str, activity_type: str,
                    sleep_hours: float, stress_level: int, distance_km: float,
                    sprint_count: int, soreness: int = None, rpe: int = None, 
-                   injury_illness: bool = None) -> 'TrainingSession':
-        """Factory metoda za kreiranje nove sesije - UPDATED"""
+                   injury_illness: bool = None, priority: str = None) -> 'TrainingSession':
+        """Factory metoda za kreiranje nove sesije - UPDATED
+
+        Bez eksplicitnog prioriteta utakmice idu u live lane, ostalo u normal.
+        """
+        if priority is None:
+            priority = (SessionPriority.LIVE if activity_type.lower() == ActivityType.GAME.value
+                        else SessionPriority.NORMAL)
         return cls(
             timestamp=datetime.now(),
             player_name=player_name,
@@ -78,7 +93,8 @@ class TrainingSession:
             sprint_count=sprint_count,
             soreness=soreness,
             rpe=rpe,
-            injury_illness=injury_illness
+            injury_illness=injury_illness,
+            priority=SessionPriority(priority)
         )
     
     def extract_features(self) -> list:
@@ -100,7 +116,7 @@ class TrainingSession:
             1 if self.injury_illness else 0
         ]
 
-@dataclass
+@dataclass(slots=True)
 class FatiguePrediction:
     """Domenska entitet - Predikcija agenta"""
     session_id: int
@@ -71,6 +71,14 @@ def get_connection():
         raise ImportError("pyodbc is required for database connectivity but is not installed.")
     return pyodbc.connect(conn_str)
 
+def fetch_in_chunks(cursor, chunk_size: int = 5000):
+    """Čitaj rezultat upita u dijelovima (fetchmany) umjesto jednog fetchall-a"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
 def init_database():
     """
     Kompletna inicijalizacija baze:
@@ -112,7 +120,13 @@ def init_database():
                     RiskLevel NVARCHAR(20) NULL,
                     Status NVARCHAR(20) DEFAULT 'queued',
                     Confidence FLOAT NULL,
-                    InjuryProb FLOAT NULL
+                    InjuryProb FLOAT NULL,
+                    ClaimedAt DATETIME NULL,
+                    ClaimedBy NVARCHAR(64) NULL,
+                    RetryCount INT NOT NULL DEFAULT 0,
+                    Priority INT NOT NULL DEFAULT 1,
+                    EnqueuedAt DATETIME NOT NULL DEFAULT GETDATE(),
+                    RequestId NVARCHAR(36) NULL
                 )
                 PRINT 'Tabela TrainingSessions kreirana'
             END
@@ -134,11 +148,54 @@ def init_database():
                 IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
                               WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'InjuryProb')
                     ALTER TABLE TrainingSessions ADD InjuryProb FLOAT NULL
+
+                -- Lease kolone za claim sesija (reaper vraća istekle u red)
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                              WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'ClaimedAt')
+                    ALTER TABLE TrainingSessions ADD ClaimedAt DATETIME NULL
+
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                              WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'ClaimedBy')
+                    ALTER TABLE TrainingSessions ADD ClaimedBy NVARCHAR(64) NULL
+
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                              WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'RetryCount')
+                    ALTER TABLE TrainingSessions ADD RetryCount INT NOT NULL DEFAULT 0
+
+                -- Priority lanes (0 = live, 1 = normal, 2 = backfill)
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                              WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'Priority')
+                    ALTER TABLE TrainingSessions ADD Priority INT NOT NULL DEFAULT 1
+
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                              WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'EnqueuedAt')
+                    ALTER TABLE TrainingSessions ADD EnqueuedAt DATETIME NOT NULL DEFAULT GETDATE()
+
+                -- POST /score: sesije bodovane odmah (bez reda), upisane naknadno
+                IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                              WHERE TABLE_NAME = 'TrainingSessions' AND COLUMN_NAME = 'RequestId')
+                    ALTER TABLE TrainingSessions ADD RequestId NVARCHAR(36) NULL
                 
                 PRINT 'Tabela TrainingSessions već postoji (ažurirane nove kolone ako su potrebne)'
             END
         """)
         
+        # Indeks za dequeue po lane-ovima (odvojen batch - kolone moraju postojati)
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'IX_TrainingSessions_Queue')
+                CREATE INDEX IX_TrainingSessions_Queue 
+                ON TrainingSessions (Status, Priority, Id)
+        """)
+        
+        # Lookup POST /score rezultata po RequestId (samo redovi koji ga imaju)
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'IX_TrainingSessions_RequestId')
+                CREATE INDEX IX_TrainingSessions_RequestId 
+                ON TrainingSessions (RequestId) WHERE RequestId IS NOT NULL
+        """)
+        
         # Tabela Feedback
         cursor.execute("""
             IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES 
@@ -168,6 +225,48 @@ def init_database():
             END
         """)
 
+        # Replay tabele: re-scoring historijskih sesija novim modelom
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES 
+                          WHERE TABLE_NAME = 'PredictionReplays')
+            BEGIN
+                CREATE TABLE PredictionReplays (
+                    Id BIGINT IDENTITY(1,1) PRIMARY KEY,
+                    ReplayId NVARCHAR(64) NOT NULL,
+                    SessionId INT NOT NULL,
+                    ModelVersion NVARCHAR(64) NOT NULL,
+                    PredictedAction NVARCHAR(50) NULL,
+                    FatigueScore FLOAT NULL,
+                    RiskLevel NVARCHAR(20) NULL,
+                    Confidence FLOAT NULL,
+                    InjuryProb FLOAT NULL,
+                    RequiresReview BIT NULL,
+                    CreatedAt DATETIME DEFAULT GETDATE()
+                )
+                CREATE INDEX IX_PredictionReplays_Session ON PredictionReplays (SessionId, ModelVersion)
+                PRINT 'Tabela PredictionReplays kreirana'
+            END
+        """)
+        
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES 
+                          WHERE TABLE_NAME = 'ReplayCheckpoints')
+            BEGIN
+                CREATE TABLE ReplayCheckpoints (
+                    ReplayId NVARCHAR(64) PRIMARY KEY,
+                    ModelVersion NVARCHAR(64) NOT NULL,
+                    FromId INT NOT NULL,
+                    ToId INT NOT NULL,
+                    LastSessionId INT NOT NULL,
+                    RowsDone BIGINT NOT NULL DEFAULT 0,
+                    Status NVARCHAR(20) NOT NULL DEFAULT 'running',
+                    StartedAt DATETIME DEFAULT GETDATE(),
+                    UpdatedAt DATETIME DEFAULT GETDATE()
+                )
+                PRINT 'Tabela ReplayCheckpoints kreirana'
+            END
+        """)
+
         # Tabela SystemSettings
         cursor.execute("""
             IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES 
@@ -210,7 +309,57 @@ def init_database():
                 PRINT 'Dodata LastRetrainDate kolona u SystemSettings'
             END
         """)
-        
+
+        # Cluster mod: generacija modela na disku (lider je povećava nakon retrain-a,
+        # ostali procesi tada ponovo učitaju bundle)
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS
+                  WHERE TABLE_NAME = 'SystemSettings' AND COLUMN_NAME = 'ModelGeneration')
+            BEGIN
+                ALTER TABLE SystemSettings ADD ModelGeneration BIGINT NOT NULL DEFAULT 0
+                PRINT 'Dodata ModelGeneration kolona u SystemSettings'
+            END
+        """)
+
+        # Cluster mod: lease red po ulozi (leader election za retrain) + heartbeat procesa
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES
+                          WHERE TABLE_NAME = 'AgentLeases')
+            BEGIN
+                CREATE TABLE AgentLeases (
+                    Role NVARCHAR(32) PRIMARY KEY,
+                    HolderId NVARCHAR(64) NULL,
+                    Epoch BIGINT NOT NULL DEFAULT 0,
+                    AcquiredAt DATETIME NULL,
+                    ExpiresAt DATETIME NULL
+                )
+                PRINT 'Tabela AgentLeases kreirana'
+            END
+        """)
+
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM AgentLeases WHERE Role = 'retrain')
+                INSERT INTO AgentLeases (Role) VALUES ('retrain')
+        """)
+
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES
+                          WHERE TABLE_NAME = 'AgentHeartbeats')
+            BEGIN
+                CREATE TABLE AgentHeartbeats (
+                    WorkerId NVARCHAR(64) PRIMARY KEY,
+                    Role NVARCHAR(32) NOT NULL,
+                    StartedAt DATETIME NOT NULL DEFAULT GETDATE(),
+                    LastSeenAt DATETIME NOT NULL DEFAULT GETDATE(),
+                    ProcessedCount BIGINT NOT NULL DEFAULT 0,
+                    ModelVersion NVARCHAR(64) NULL,
+                    ModelGeneration BIGINT NULL,
+                    StatusJson NVARCHAR(MAX) NULL
+                )
+                PRINT 'Tabela AgentHeartbeats kreirana'
+            END
+        """)
+
         conn.commit()
         logger.info("🎉 Baza potpuno inicijalizirana!")
         return True
@@ -387,6 +536,9 @@ def get_database_info() -> Dict[str, Any]:
         cursor.execute("SELECT COUNT(*) FROM TrainingSessions WHERE Status = 'queued'")
         queued_count = cursor.fetchone()[0]
         
+        cursor.execute("SELECT COUNT(*) FROM TrainingSessions WHERE Status = 'dead_letter'")
+        dead_letter_count = cursor.fetchone()[0]
+        
         cursor.execute("SELECT COUNT(*) FROM Feedback")
         feedback_count = cursor.fetchone()[0]
         
@@ -395,6 +547,7 @@ def get_database_info() -> Dict[str, Any]:
             "server": DB_SERVER,
             "sessions": sessions_count,
             "queued": queued_count,
+            "dead_letter": dead_letter_count,
             "feedback": feedback_count
         }
         
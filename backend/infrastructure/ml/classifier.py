@@ -1,9 +1,11 @@
 # backend/infrastructure/ml/classifier.py - FIXED SA PRAVIM INCREMENTAL LEARNINGOM
+import copy
 import joblib
 import numpy as np
 import pandas as pd
 import os
-import time
+import logging
+import threading
 from typing import List, Tuple, Optional, Dict, Any
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import LabelEncoder, StandardScaler
@@ -19,13 +21,214 @@ from sklearn.metrics import (
 )
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
-from infrastructure.ml.preprocessing import distance_to_km, normalize_position, normalize_activity
+from infrastructure.ml.preprocessing import distance_to_km
 from infrastructure.ml.metrics_store import save_metrics, load_metrics
+from infrastructure.ml.model_io import atomic_dump, model_fingerprint
+from infrastructure.ml.lookup_table import LogitLookupTable
+from infrastructure.ml.mlp_kernel import MLPKernel
+from infrastructure.ml.feature_store import FeatureStore
+from infrastructure.ml.retention import RetentionManager, RetentionPolicy, fatigue_risk_labels
+from infrastructure.ml.learning_state import LearningStateFile
+from infrastructure.ml.training_data import load_csv_feature_frame, injury_training_set
+from infrastructure.ml.player_load import PLAYER_LOAD_FEATURES, NEUTRAL_LOAD_FEATURES, player_load_feature_frame
+
+logger = logging.getLogger(__name__)
+
+POSITIONS = ["goalkeeper", "defender", "midfielder", "forward"]
+ACTIVITIES = ["practice", "game"]
+FATIGUE_FRAME_COLUMNS = [
+    "position", "activity_type", "sleep_hours", "stress_level",
+    "distance_km", "sprint_count", "soreness", "rpe",
+]
+
+# Max dozvoljeno |kernel - sklearn| odstupanje fatigue score-a (float32 zaokruživanje je ~1e-5)
+KERNEL_TOLERANCE = 1e-3
+
+# Osnovni primjeri za baseline model
+# Format: (position, activity, sleep, stress, distance, sprints, soreness, rpe, fatigue)
+BASELINE_EXAMPLES = [
+    # LOW fatigue (0-40)
+    (0, 0, 8.0, 2, 5.0, 10, 2, 3, 25.0),
+    (1, 0, 7.5, 3, 6.0, 15, 3, 4, 30.0),
+    (2, 0, 8.0, 2, 7.0, 20, 2, 3, 28.0),
+    (3, 0, 7.0, 3, 8.0, 25, 3, 4, 35.0),
+
+    # MEDIUM fatigue (40-60)
+    (3, 0, 6.0, 5, 8.0, 25, 5, 6, 50.0),
+    (2, 1, 7.0, 4, 9.0, 30, 4, 5, 52.0),
+    (1, 1, 6.5, 6, 7.5, 20, 5, 6, 48.0),
+    (3, 1, 6.0, 5, 9.5, 32, 6, 6, 55.0),
+
+    # HIGH fatigue (60-80)
+    (3, 1, 5.0, 7, 10.0, 35, 7, 8, 70.0),
+    (2, 1, 5.5, 8, 11.0, 40, 7, 8, 72.0),
+    (1, 1, 6.0, 7, 8.5, 25, 6, 7, 65.0),
+    (3, 1, 5.0, 8, 10.5, 38, 8, 8, 75.0),
+
+    # CRITICAL fatigue (80-100)
+    (3, 1, 4.0, 9, 12.0, 45, 9, 9, 88.0),
+    (2, 1, 4.5, 9, 11.5, 42, 9, 10, 92.0),
+    (1, 1, 5.0, 8, 9.0, 30, 8, 9, 82.0),
+    (2, 1, 4.0, 10, 12.0, 45, 10, 10, 95.0),
+]
+
+
+def build_fatigue_regressor(max_iter: int = 200) -> MLPRegressor:
+    """Nova (netrenirana) MLP mreža sa standardnom arhitekturom (100, 50)."""
+    return MLPRegressor(
+        hidden_layer_sizes=(100, 50),
+        activation='relu',
+        solver='adam',
+        learning_rate='adaptive',
+        max_iter=max_iter,
+        random_state=42,
+        warm_start=True  # OVO POMAŽE KOD RETRAIN-A
+    )
+
+
+def fit_fatigue_regressor(model: MLPRegressor, X_encoded: np.ndarray, y: np.ndarray,
+                          scaler: Optional[StandardScaler] = None) -> MLPRegressor:
+    """Treniraj MLP na enkodiranim primjerima (skalira ih ako postoji scaler).
+
+    Čista funkcija bez stanja klasifikatora - može se izvršiti i u drugom procesu.
+    """
+    if model is None:
+        model = build_fatigue_regressor()
+    X_train = X_encoded
+    if scaler is not None:
+        try:
+            X_train = scaler.transform(X_encoded)
+        except Exception:
+            pass
+    model.fit(X_train, y)
+    return model
+
+
+def player_load_model_file(model_file: str) -> str:
+    """Zaseban fajl za MLP sa player load feature-ima (drugi broj ulaza od osnovnog modela)."""
+    base, ext = os.path.splitext(model_file)
+    return f"{base}.load{ext}"
+
+
+def encode_feature_frame(frame: pd.DataFrame, player_load: bool = False) -> np.ndarray:
+    """Vektorski ekvivalent FatigueClassifier._encode_features za cijeli feature frame.
+
+    ``player_load=True`` dodaje PLAYER_LOAD_FEATURES (sesije se odigraju po datumu
+    kroz PlayerLoadStore, isto kao u živom scoring-u).
+    """
+    position_encoder = LabelEncoder().fit(POSITIONS)
+    activity_encoder = LabelEncoder().fit(ACTIVITIES)
+    X = np.empty((len(frame), len(FATIGUE_FRAME_COLUMNS)), dtype=float)
+    X[:, 0] = position_encoder.transform(frame["position"])
+    X[:, 1] = activity_encoder.transform(frame["activity_type"])
+    for i, column in enumerate(FATIGUE_FRAME_COLUMNS[2:], start=2):
+        X[:, i] = frame[column].to_numpy(dtype=float)
+    if player_load:
+        X = np.hstack([X, player_load_feature_frame(frame)])
+    return X
+
+
+def fit_fatigue_csv_model(X_encoded: np.ndarray, y: np.ndarray) -> Tuple[MLPRegressor, Optional[StandardScaler], Dict[str, Any]]:
+    """Train/test split + StandardScaler + nova MLP (max_iter=300); vrati (model, scaler, metrike)."""
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_encoded, y, test_size=0.2, random_state=42
+    )
+
+    # Fit scaler on training data and transform both sets to avoid leakage
+    scaler = None
+    try:
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X_train)
+        X_test = scaler.transform(X_test)
+    except Exception:
+        # If scaling fails, fall back to unscaled data
+        scaler = None
+
+    model = build_fatigue_regressor(max_iter=300)
+    model.fit(X_train, y_train)
+    preds = model.predict(X_test)
+    metrics = {
+        "mae": float(mean_absolute_error(y_test, preds)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, preds))),
+        "r2": float(r2_score(y_test, preds)),
+        "train_size": int(len(y_train)),
+        "test_size": int(len(y_test)),
+    }
+    return model, scaler, metrics
+
+
+def fit_injury_pipeline(X: pd.DataFrame, y: pd.Series) -> Tuple[Pipeline, Dict[str, Any]]:
+    """Logistička regresija (binarna) za vjerovatnoću povrede — train/test + StandardScaler.
+
+    Vraća (pipeline, metrike). Nema side-effecta, pa se može pozvati iz worker procesa.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        X,
+        y,
+        test_size=0.2,
+        random_state=42,
+        stratify=y if y.nunique() > 1 else None,
+    )
+
+    # Apply SMOTE when injury labels are imbalanced to improve recall on the
+    # minority injury class while preserving a held-out evaluation split.
+    resampled = False
+    try:
+        counts = y_train.value_counts()
+        if counts.max() / max(counts.min(), 1) > 2.0:
+            from imblearn.over_sampling import SMOTE
+            sm = SMOTE(random_state=42)
+            X_train, y_train = sm.fit_resample(X_train, y_train)
+            resampled = True
+            logger.info("⚡ Applied SMOTE to balance injury training data")
+    except Exception:
+        pass
+
+    pipeline = Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", LogisticRegression(max_iter=2000, class_weight="balanced")),
+    ])
+    pipeline.fit(X_train, y_train)
+
+    y_pred = pipeline.predict(X_test)
+    y_prob = pipeline.predict_proba(X_test)[:, 1]
+    metrics = {
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "balanced_accuracy": float(balanced_accuracy_score(y_test, y_pred)),
+        "f1": float(f1_score(y_test, y_pred, zero_division=0)),
+        "roc_auc": float(roc_auc_score(y_test, y_prob)) if y.nunique() > 1 else 0.0,
+        "train_size": int(len(y_train)),
+        "test_size": int(len(y_test)),
+        "positive_rate": float(y.mean()),
+        "smote_applied": resampled,
+    }
+    return pipeline, metrics
+
 
 class FatigueClassifier:
-    """ML klasa za predikciju fatigue score-a - SA PRAVIM INCREMENTAL LEARNING"""
+    """ML klasa za predikciju fatigue score-a - SA PRAVIM INCREMENTAL LEARNING
+
+    Konstruktor nikad ne trenira: samo učita postojeće modele sa diska (ako
+    postoje). Lifecycle je eksplicitan:
+
+        FatigueClassifier.load(path)    # model mora postojati na disku
+        FatigueClassifier.empty()       # ništa ne učitava, za skripte koje odmah treniraju
+        clf.train() / clf.train(csv)    # baseline (16 primjera) ili puni CSV trening
+
+    ``lookup_table=True`` (ili ``set_lookup_table(True)``) uključuje kompajlirani
+    mod za injury LR: vjerovatnoća se čita iz predračunate tabele logita koja se
+    regeneriše pri svakom učitavanju/treningu injury modela.
+
+    ``player_load=True`` dodaje MLP-u PLAYER_LOAD_FEATURES (ACWR, monotonija,
+    strain - vidi infrastructure.ml.player_load). Očekuju se iza osnovnih
+    feature-a sesije (``extract_features() + PlayerLoadService.features_for``);
+    red bez njih dobija NEUTRAL_LOAD_FEATURES. Takav model ima 13 ulaza, pa
+    ide u zaseban fajl (``player_load_model_file``).
+    """
     
-    def __init__(self, model_file: str = "fatigue_model.joblib"):
+    def __init__(self, model_file: str = "fatigue_model.joblib", load: bool = True,
+                 lookup_table: bool = False, retention: Optional[RetentionPolicy] = None,
+                 player_load: bool = False):
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
         self.model_file = os.path.join(base_dir, model_file) if not os.path.isabs(model_file) else model_file
         self.model: Optional[MLPRegressor] = None
@@ -35,12 +238,15 @@ class FatigueClassifier:
         self.activity_encoder = LabelEncoder()
         
         # Definiši moguće vrijednosti
-        self.positions = ["goalkeeper", "defender", "midfielder", "forward"]
-        self.activities = ["practice", "game"]
+        self.positions = list(POSITIONS)
+        self.activities = list(ACTIVITIES)
         
         # Fit encodere
         self.position_encoder.fit(self.positions)
         self.activity_encoder.fit(self.activities)
+        # Isti kodovi kao LabelEncoder.transform, ali dict lookup (bez sklearn validacije po redu)
+        self._position_codes = {p: i for i, p in enumerate(self.position_encoder.classes_)}
+        self._activity_codes = {a: i for i, a in enumerate(self.activity_encoder.classes_)}
         
         # Features metadata
         # NOTE: do not include `injury_illness` as an input feature for the
@@ -52,20 +258,40 @@ class FatigueClassifier:
             'position', 'activity_type', 'sleep_hours', 'stress_level',
             'distance_km', 'sprint_count', 'soreness', 'rpe'
         ]
+        self.player_load = player_load
+        if player_load:
+            self.feature_names += PLAYER_LOAD_FEATURES
         self.n_features = len(self.feature_names)
         
-        # Training history (ZA INCREMENTAL LEARNING)
-        self.training_history = []
-        self.initial_examples = []  # Čuva inicijalne primjere
-        self.training_dataset_X = []
-        self.training_dataset_y = []
+        # Learning state (enkodirano, float32) - perzistira se pored modela u binarnim fajlovima,
+        # učitava se lijeno pri prvom pristupu (vidi training_history / training_dataset / initial_examples)
+        state_base = os.path.splitext(self.model_file)[0]
+        self._history_state = LearningStateFile(state_base + ".history.bin", self.n_features, with_timestamps=True)
+        self._neighbors_state = LearningStateFile(state_base + ".neighbors.bin", self.n_features)
+        self._initial_state = LearningStateFile(state_base + ".initial.bin", self.n_features)
+        # None = još nije učitano sa diska
+        self._training_history: Optional[FeatureStore] = None
+        self._training_dataset: Optional[FeatureStore] = None
+        self._initial_examples: Optional[FeatureStore] = None
+        # Ograničava history (max veličina / starost / sampling) - vidi infrastructure.ml.retention
+        self.retention = RetentionManager(retention)
         self.baseline_example_count = 16
 
         # Scaler for fatigue regression (saved alongside model when trained from CSV)
         self.scaler = None
+        # Štiti zamjenu modela (retrain u drugom procesu) od predikcija u toku
+        self._lock = threading.RLock()
+        # Verzija (hash) modela - računa se lijeno, briše se pri svakoj zamjeni
+        self._version: Optional[str] = None
         self.scaler_file = os.path.splitext(self.model_file)[0] + ".scaler.joblib"
-        
-        self._load_or_create_model()
+
+        # NumPy inference kernel - gradi se jednom po verziji modela
+        self._kernel: Optional[MLPKernel] = None
+        self._kernel_version: Optional[str] = None
+        self.kernel_enabled = True
+        # Verify mod: svaka predikcija se računa i kroz sklearn i poredi sa kernelom
+        self.kernel_verify = False
+        self.kernel_stats: Dict[str, Any] = {"builds": 0, "checks": 0, "mismatches": 0, "max_abs_diff": 0.0}
 
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
         self.injury_model_file = os.path.join(base_dir, "injury_model.joblib")
@@ -74,10 +300,171 @@ class FatigueClassifier:
             "Sleep_Duration", "Stress", "Distance_km", "Soreness", "RPE"
         ]
         self.injury_metrics: Dict[str, Any] = {}
-        self._load_or_train_injury_model()
+        self.use_lookup_table = lookup_table
+        self.injury_lookup: Optional[LogitLookupTable] = None
+        self.injury_lookup_drift: Dict[str, Any] = {}
+
+        if load:
+            self._load_model()
+            self._load_injury_model()
+        else:
+            self._training_history = FeatureStore(self.n_features, with_timestamps=True)
+            self._training_dataset = FeatureStore(self.n_features)
+            self._initial_examples = FeatureStore(self.n_features)
+
+    # ============================================================================
+    # LEARNING STATE (lijeno učitavanje + inkrementalni upis)
+    # ============================================================================
+
+    def _read_state(self, state: LearningStateFile) -> Optional[FeatureStore]:
+        if not state.exists():
+            return None
+        try:
+            store, counters = state.read()
+        except Exception as e:
+            logger.warning(f"⚠️ Learning state {os.path.basename(state.path)} nije učitan: {e}")
+            return None
+        if state is self._history_state:
+            self.retention.restore(counters)
+        return store
+
+    def _write_state(self, state: LearningStateFile, store: FeatureStore, counters: Optional[Dict[str, int]] = None):
+        try:
+            state.write(store, counters)
+        except Exception as e:
+            logger.warning(f"⚠️ Learning state {os.path.basename(state.path)} nije sačuvan: {e}")
 
-    def _load_or_create_model(self):
-        """Učitaj postojeći model ili kreiraj novi"""
+    @property
+    def training_history(self) -> FeatureStore:
+        """Feedback primjeri (zadržani prozor, vidi retention)"""
+        if self._training_history is None:
+            with self._lock:
+                if self._training_history is None:
+                    store = self._read_state(self._history_state)
+                    self._training_history = store or FeatureStore(self.n_features, with_timestamps=True)
+                    if store is not None and self._enforce_retention():
+                        self._write_state(self._history_state, store, self.retention.state())
+        return self._training_history
+
+    @training_history.setter
+    def training_history(self, store: FeatureStore):
+        self._training_history = store
+
+    @property
+    def training_dataset(self) -> FeatureStore:
+        """Susjedi za kNN confidence (primjeri na kojima je trenutni model treniran)"""
+        if self._training_dataset is None:
+            with self._lock:
+                if self._training_dataset is None:
+                    store = self._read_state(self._neighbors_state)
+                    if store is None:
+                        self._training_dataset = FeatureStore(self.n_features)
+                        if self.model is not None:
+                            # Nema sačuvanog stanja - confidence iz osnovnih primjera
+                            self._populate_training_dataset_from_examples()
+                    else:
+                        self._training_dataset = store
+        return self._training_dataset
+
+    @training_dataset.setter
+    def training_dataset(self, store: FeatureStore):
+        self._training_dataset = store
+
+    @property
+    def initial_examples(self) -> FeatureStore:
+        """Inicijalni (baseline) primjeri koji ulaze u svaki retrain"""
+        if self._initial_examples is None:
+            with self._lock:
+                if self._initial_examples is None:
+                    self._initial_examples = (self._read_state(self._initial_state)
+                                              or FeatureStore(self.n_features))
+        return self._initial_examples
+
+    @initial_examples.setter
+    def initial_examples(self, store: FeatureStore):
+        self._initial_examples = store
+
+    # ============================================================================
+    # LIFECYCLE
+    # ============================================================================
+
+    @classmethod
+    def load(cls, model_file: str = "fatigue_model.joblib", player_load: bool = False) -> "FatigueClassifier":
+        """Učitaj istrenirani model sa diska (bez ikakvog treniranja)."""
+        classifier = cls(model_file=model_file, player_load=player_load)
+        if classifier.model is None:
+            raise FileNotFoundError(f"Fatigue model not found or unusable: {classifier.model_file}")
+        return classifier
+
+    @classmethod
+    def empty(cls, model_file: str = "fatigue_model.joblib", player_load: bool = False) -> "FatigueClassifier":
+        """Prazan klasifikator (ništa ne učitava ni ne trenira) — za skripte koje odmah treniraju."""
+        return cls(model_file=model_file, load=False, player_load=player_load)
+
+    def reload_from_disk(self) -> str:
+        """Preuzmi bundle koji je na disk upisao drugi proces (retrain lider u cluster modu).
+
+        Učitava MLP, scaler i injury LR u novu instancu pa ih zamijeni pod lock-om;
+        learning state (.bin fajlovi) se ponovo čita lijeno. Fajlovi se pišu sa
+        atomic_dump, pa se uvijek vidi ili stari ili novi bundle. Vraća novu verziju.
+        """
+        fresh = FatigueClassifier(model_file=self.model_file, lookup_table=self.use_lookup_table,
+                                  player_load=self.player_load)
+        if fresh.model is None:
+            raise FileNotFoundError(f"Fatigue model not found or unusable: {self.model_file}")
+        with self._lock:
+            self._version = None
+            self.model = fresh.model
+            self.scaler = fresh.scaler
+            self.injury_model = fresh.injury_model
+            self.injury_feature_columns = fresh.injury_feature_columns
+            self.injury_metrics = fresh.injury_metrics
+            self.injury_lookup = fresh.injury_lookup
+            self.injury_lookup_drift = fresh.injury_lookup_drift
+            self._training_history = None
+            self._training_dataset = None
+            self._initial_examples = None
+        return self.model_version()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.model is not None
+
+    def model_version(self) -> str:
+        """Hash fatigue MLP + scaler + injury LR (mijenja se sa svakim retrain-om)."""
+        with self._lock:
+            if self._version is None:
+                self._version = model_fingerprint(self.model, self.scaler, self.injury_model)
+            return self._version
+
+    def _invalidate_version(self):
+        with self._lock:
+            self._version = None
+
+    def train(self, csv_path: Optional[str] = None, only_missing: bool = False) -> "FatigueClassifier":
+        """Eksplicitni trening.
+
+        Bez ``csv_path`` trenira baseline MLP na 16 osnovnih primjera i injury LR
+        iz default CSV-a; sa ``csv_path`` radi puni CSV trening (MLP + injury).
+        ``only_missing=True`` trenira samo modele koji nisu učitani.
+        """
+        if csv_path is not None:
+            self.train_from_csv(csv_path)
+            return self
+
+        if not (only_missing and self.model is not None):
+            self._invalidate_version()
+            self.model = build_fatigue_regressor()
+            self._initialize_model()
+            atomic_dump(self.model, self.model_file)
+            logger.info(f"✓ Model inicijaliziran")
+        if not (only_missing and self.injury_model is not None):
+            self._train_injury_model()
+        return self
+
+    def _load_model(self):
+        """Učitaj postojeći model (ako postoji) — ne trenira"""
+        self._invalidate_version()
         if os.path.exists(self.model_file):
             self.model = joblib.load(self.model_file)
             # Attempt to load scaler if it exists (backwards compatible)
@@ -85,127 +472,47 @@ class FatigueClassifier:
                 if os.path.exists(self.scaler_file):
                     self.scaler = joblib.load(self.scaler_file)
                     if hasattr(self.scaler, 'n_features_in_') and self.scaler.n_features_in_ != self.n_features:
-                        print(f"⚠️ Scaler feature size mismatch: expected {self.n_features}, got {self.scaler.n_features_in_}. Ignoring scaler.")
+                        logger.warning(f"⚠️ Scaler feature size mismatch: expected {self.n_features}, got {self.scaler.n_features_in_}. Ignoring scaler.")
                         self.scaler = None
                     else:
-                        print(f"✓ Scaler učitan iz {self.scaler_file}")
+                        logger.info(f"✓ Scaler učitan iz {self.scaler_file}")
             except Exception:
                 self.scaler = None
             if hasattr(self.model, 'n_features_in_') and self.model.n_features_in_ != self.n_features:
-                print(f"⚠️ Loaded fatigue model expects {self.model.n_features_in_} features but current input has {self.n_features}. Reinitializing model.")
-                self.model = MLPRegressor(
-                    hidden_layer_sizes=(100, 50),
-                    activation='relu',
-                    solver='adam',
-                    learning_rate='adaptive',
-                    max_iter=200,
-                    random_state=42,
-                    warm_start=True
-                )
-                self._initialize_model()
-                joblib.dump(self.model, self.model_file)
-                print(f"✓ Reinitialized fatigue model with current feature schema")
-            else:
-                print(f"✓ Model učitan iz {self.model_file}")
-
-            # Čak i kada je učitan, inicijalizuj training_dataset za confidence calculation
-            if not self.training_dataset_X or len(self.training_dataset_X) == 0:
-                self._populate_training_dataset_from_examples()
-        else:
-            # Kreiraj novi model
-            self.model = MLPRegressor(
-                hidden_layer_sizes=(100, 50),
-                activation='relu',
-                solver='adam',
-                learning_rate='adaptive',
-                max_iter=200,
-                random_state=42,
-                warm_start=True  # OVO POMAŽE KOD RETRAIN-A
-            )
-            self._initialize_model()
-            joblib.dump(self.model, self.model_file)
-            print(f"✓ Model inicijaliziran")
+                logger.warning(f"⚠️ Loaded fatigue model expects {self.model.n_features_in_} features but current input has {self.n_features}. Model needs retraining.")
+                self.model = None
+                return
+            logger.info(f"✓ Model učitan iz {self.model_file}")
     
     def _populate_training_dataset_from_examples(self):
         """Popuni training_dataset iz inicijalnih primjera za confidence calculation"""
-        examples = [
-            (0, 0, 8.0, 2, 5.0, 10, 2, 3, 25.0),
-            (1, 0, 7.5, 3, 6.0, 15, 3, 4, 30.0),
-            (2, 0, 8.0, 2, 7.0, 20, 2, 3, 28.0),
-            (3, 0, 7.0, 3, 8.0, 25, 3, 4, 35.0),
-            (3, 0, 6.0, 5, 8.0, 25, 5, 6, 50.0),
-            (2, 1, 7.0, 4, 9.0, 30, 4, 5, 52.0),
-            (1, 1, 6.5, 6, 7.5, 20, 5, 6, 48.0),
-            (3, 1, 6.0, 5, 9.5, 32, 6, 6, 55.0),
-            (3, 1, 5.0, 7, 10.0, 35, 7, 8, 70.0),
-            (2, 1, 5.5, 8, 11.0, 40, 7, 8, 72.0),
-            (1, 1, 6.0, 7, 8.5, 25, 6, 7, 65.0),
-            (3, 1, 5.0, 8, 10.5, 38, 8, 8, 75.0),
-            (3, 1, 4.0, 9, 12.0, 45, 9, 9, 88.0),
-            (2, 1, 4.5, 9, 11.5, 42, 9, 10, 92.0),
-            (1, 1, 5.0, 8, 9.0, 30, 8, 9, 82.0),
-            (2, 1, 4.0, 10, 12.0, 45, 10, 10, 95.0),
-        ]
-
-        for pos, act, sleep, stress, dist, sprints, soreness, rpe, fatigue in examples:
+        for pos, act, sleep, stress, dist, sprints, soreness, rpe, fatigue in BASELINE_EXAMPLES:
             features = [pos, act, sleep, stress, dist, sprints, soreness, rpe]
             try:
-                encoded = self._encode_features(features)
-                self.training_dataset_X.append(np.array(encoded, dtype=float))
-                self.training_dataset_y.append(float(fatigue))
+                self.training_dataset.append(self._encode_features(features), float(fatigue))
             except Exception as e:
-                print(f"⚠️ Upozorenje pri popunjavanju training dataset-a: {e}")
+                logger.warning(f"⚠️ Upozorenje pri popunjavanju training dataset-a: {e}")
     
     def _initialize_model(self):
         """Inicijalizacija s osnovnim primjerima i sačuvaj ih"""
-        X_init = []
-        y_init = []
-        
-        # Format: [position, activity, sleep, stress, distance, sprints, soreness, rpe]
-        examples = [
-            # LOW fatigue (0-40)
-            (0, 0, 8.0, 2, 5.0, 10, 2, 3, 25.0),
-            (1, 0, 7.5, 3, 6.0, 15, 3, 4, 30.0),
-            (2, 0, 8.0, 2, 7.0, 20, 2, 3, 28.0),
-            (3, 0, 7.0, 3, 8.0, 25, 3, 4, 35.0),
-
-            # MEDIUM fatigue (40-60)
-            (3, 0, 6.0, 5, 8.0, 25, 5, 6, 50.0),
-            (2, 1, 7.0, 4, 9.0, 30, 4, 5, 52.0),
-            (1, 1, 6.5, 6, 7.5, 20, 5, 6, 48.0),
-            (3, 1, 6.0, 5, 9.5, 32, 6, 6, 55.0),
-
-            # HIGH fatigue (60-80)
-            (3, 1, 5.0, 7, 10.0, 35, 7, 8, 70.0),
-            (2, 1, 5.5, 8, 11.0, 40, 7, 8, 72.0),
-            (1, 1, 6.0, 7, 8.5, 25, 6, 7, 65.0),
-            (3, 1, 5.0, 8, 10.5, 38, 8, 8, 75.0),
-
-            # CRITICAL fatigue (80-100)
-            (3, 1, 4.0, 9, 12.0, 45, 9, 9, 88.0),
-            (2, 1, 4.5, 9, 11.5, 42, 9, 10, 92.0),
-            (1, 1, 5.0, 8, 9.0, 30, 8, 9, 82.0),
-            (2, 1, 4.0, 10, 12.0, 45, 10, 10, 95.0),
-        ]
+        initial = FeatureStore(self.n_features)
 
-        for pos, act, sleep, stress, dist, sprints, soreness, rpe, fatigue in examples:
+        for pos, act, sleep, stress, dist, sprints, soreness, rpe, fatigue in BASELINE_EXAMPLES:
             features = [pos, act, sleep, stress, dist, sprints, soreness, rpe]
-            X_init.append(features)
-            y_init.append(fatigue)
-            
-            # Sačuvaj inicijalne primjere za kasniji retrain
-            self.initial_examples.append({
-                'features': features,
-                'fatigue_score': fatigue
-            })
-        
-        self.model.fit(np.array(X_init), np.array(y_init))
-        self.training_dataset_X = [np.array(x, dtype=float) for x in X_init]
-        self.training_dataset_y = [float(y) for y in y_init]
-        print(f"✓ Model inicijaliziran sa {len(X_init)} primjera")
+            # Sačuvaj inicijalne primjere (enkodirane) za kasniji retrain
+            initial.append(self._encode_features(features), fatigue)
+
+        # Fit i neighbors na enkodiranim redovima - isti raspored kao predict
+        # (sa player_load i NEUTRAL_LOAD_FEATURES na kraju)
+        self.model.fit(initial.X, initial.y)
+        self.initial_examples = initial
+        self.training_dataset = FeatureStore.from_arrays(initial.X, initial.y)
+        self._write_state(self._initial_state, self.initial_examples)
+        self._write_state(self._neighbors_state, self.training_dataset)
+        logger.info(f"✓ Model inicijaliziran sa {len(initial)} primjera")
 
 
-    def _load_or_train_injury_model(self):
+    def _load_injury_model(self):
         if os.path.exists(self.injury_model_file):
             try:
                 bundle = joblib.load(self.injury_model_file)
@@ -214,103 +521,114 @@ class FatigueClassifier:
                     "feature_columns", self.injury_feature_columns
                 )
                 self.injury_metrics = bundle.get("metrics", {})
-                print(f"✓ Injury model učitan iz {self.injury_model_file}")
+                self._rebuild_injury_lookup()
+                logger.info(f"✓ Injury model učitan iz {self.injury_model_file}")
                 return
             except Exception as exc:
-                print(f"⚠️ Injury model load failed: {exc}")
-
-        self._train_injury_model()
+                logger.warning(f"⚠️ Injury model load failed: {exc}")
+                self.injury_model = None
 
     def _train_injury_model(self, csv_path: Optional[str] = None) -> bool:
         """Logistička regresija (binarna) za vjerovatnoću povrede — train/test + StandardScaler."""
         data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
         csv_path = csv_path or os.path.join(data_dir, "Workout_Routine_Dirty.csv")
         try:
-            df = pd.read_csv(csv_path)
+            df_columns = pd.read_csv(csv_path, nrows=0).columns
             required = ["Sleep_Duration", "Stress", "Distance", "Soreness", "RPE", "Injury_Illness"]
-            if not all(col in df.columns for col in required):
-                print("⚠️ CSV nema potrebne kolone za injury model")
+            if not all(col in df_columns for col in required):
+                logger.warning("⚠️ CSV nema potrebne kolone za injury model")
                 self.injury_model = None
                 return False
 
-            X = pd.DataFrame({
-                "Sleep_Duration": pd.to_numeric(df["Sleep_Duration"], errors="coerce").fillna(7),
-                "Stress": pd.to_numeric(df["Stress"], errors="coerce").fillna(5),
-                "Distance_km": df["Distance"].apply(distance_to_km),
-                "Soreness": pd.to_numeric(df["Soreness"], errors="coerce").fillna(5),
-                "RPE": pd.to_numeric(df["RPE"], errors="coerce").fillna(5),
-            })
-            y = (df["Injury_Illness"].astype(str).str.strip().str.lower() == "yes").astype(int)
+            return self.train_injury_from_frame(load_csv_feature_frame(csv_path))
+        except Exception as e:
+            logger.error(f"❌ Greška pri treniranju injury modela: {e}")
+            self.injury_model = None
+            return False
+
+    def train_injury_from_frame(self, frame: pd.DataFrame) -> bool:
+        """Treniraj injury LR iz već parsiranog feature frame-a (vidi training_data)."""
+        try:
+            X, y = injury_training_set(frame)
 
             if y.nunique() < 2:
-                print("⚠️ Injury target ima samo jednu klasu — preskačem trening")
+                logger.warning("⚠️ Injury target ima samo jednu klasu — preskačem trening")
                 self.injury_model = None
                 return False
 
-            X_train, X_test, y_train, y_test = train_test_split(
-                X,
-                y,
-                test_size=0.2,
-                random_state=42,
-                stratify=y if y.nunique() > 1 else None,
-            )
-
-            # Apply SMOTE when injury labels are imbalanced to improve recall on the
-            # minority injury class while preserving a held-out evaluation split.
-            resampled = False
-            try:
-                counts = y_train.value_counts()
-                if counts.max() / max(counts.min(), 1) > 2.0:
-                    from imblearn.over_sampling import SMOTE
-                    sm = SMOTE(random_state=42)
-                    X_train, y_train = sm.fit_resample(X_train, y_train)
-                    resampled = True
-                    print("⚡ Applied SMOTE to balance injury training data")
-            except Exception:
-                pass
-
-            pipeline = Pipeline([
-                ("scaler", StandardScaler()),
-                ("clf", LogisticRegression(max_iter=2000, class_weight="balanced")),
-            ])
-            pipeline.fit(X_train, y_train)
-
-            y_pred = pipeline.predict(X_test)
-            y_prob = pipeline.predict_proba(X_test)[:, 1]
-            metrics = {
-                "accuracy": float(accuracy_score(y_test, y_pred)),
-                "balanced_accuracy": float(balanced_accuracy_score(y_test, y_pred)),
-                "f1": float(f1_score(y_test, y_pred, zero_division=0)),
-                "roc_auc": float(roc_auc_score(y_test, y_prob)) if y.nunique() > 1 else 0.0,
-                "train_size": int(len(y_train)),
-                "test_size": int(len(y_test)),
-                "positive_rate": float(y.mean()),
-                "smote_applied": resampled,
-            }
-            self.injury_model = pipeline
-            self.injury_feature_columns = list(X.columns)
-            self.injury_metrics = metrics
-
-            joblib.dump({
+            pipeline, metrics = fit_injury_pipeline(X, y)
+            self.install_injury_bundle({
                 "pipeline": pipeline,
-                "feature_columns": self.injury_feature_columns,
+                "feature_columns": list(X.columns),
                 "metrics": metrics,
-            }, self.injury_model_file)
-
-            all_metrics = load_metrics()
-            all_metrics["injury_logistic_regression"] = metrics
-            save_metrics(all_metrics)
+            })
 
-            print(
+            logger.info(
                 f"✅ Injury LR: acc={metrics['accuracy']:.2f}, "
                 f"F1={metrics['f1']:.2f}, AUC={metrics['roc_auc']:.2f}"
             )
             return True
         except Exception as e:
-            print(f"❌ Greška pri treniranju injury modela: {e}")
+            logger.error(f"❌ Greška pri treniranju injury modela: {e}")
             self.injury_model = None
             return False
 
+    def install_injury_bundle(self, bundle: Dict[str, Any]):
+        """Atomski zamijeni injury model (npr. istreniran u worker procesu) i sačuvaj ga."""
+        with self._lock:
+            self._version = None
+            self.injury_model = bundle["pipeline"]
+            self.injury_feature_columns = list(bundle.get("feature_columns", self.injury_feature_columns))
+            self.injury_metrics = bundle.get("metrics", {})
+            self._rebuild_injury_lookup()
+
+        atomic_dump({
+            "pipeline": self.injury_model,
+            "feature_columns": self.injury_feature_columns,
+            "metrics": self.injury_metrics,
+        }, self.injury_model_file)
+
+        all_metrics = load_metrics()
+        all_metrics["injury_logistic_regression"] = self.injury_metrics
+        save_metrics(all_metrics)
+
+    def set_lookup_table(self, enabled: bool):
+        """Uključi/isključi lookup tabelu za injury LR u toku rada."""
+        with self._lock:
+            self.use_lookup_table = enabled
+            self._rebuild_injury_lookup()
+
+    def _rebuild_injury_lookup(self):
+        """Regeneriši tabelu za trenutni injury model i izmjeri odstupanje od egzaktnog modela."""
+        with self._lock:
+            self.injury_lookup = None
+            self.injury_lookup_drift = {}
+            if not self.use_lookup_table or self.injury_model is None:
+                return
+            try:
+                table = LogitLookupTable(self.injury_model, self.injury_feature_columns)
+                self.injury_lookup_drift = table.drift_report(
+                    self.injury_model, self.injury_feature_columns
+                ).to_dict()
+                self.injury_lookup = table
+            except Exception as e:
+                logger.warning(f"⚠️ Injury lookup tabela nedostupna, koristim egzaktni model: {e}")
+                return
+        drift = self.injury_lookup_drift
+        logger.info(f"📋 Injury lookup tabela: {drift['table_bytes'] // 1024} KB za {drift['build_ms']:.0f}ms, "
+                    f"max |Δp|={drift['max_abs_proba_diff']:.2e}")
+
+    @staticmethod
+    def _injury_logit_row(features: List) -> List[float]:
+        """Red u LOGIT_FEATURES redoslijedu (sleep, stress, distance_km, soreness, rpe)."""
+        return [
+            float(features[2]),
+            float(features[3]),
+            distance_to_km(features[4]),
+            float(features[6]) if len(features) > 6 else 5.0,
+            float(features[7]) if len(features) > 7 else 5.0,
+        ]
+
     def _injury_feature_row(self, features: List) -> pd.DataFrame:
         sleep = float(features[2])
         stress = float(features[3])
@@ -328,13 +646,19 @@ class FatigueClassifier:
 
     def predict_injury_prob(self, features: List) -> float:
         """Vjerovatnoća povrede (0–1) — logistička regresija sa fallback logikom."""
-        if self.injury_model is None:
+        injury_model = self.injury_model
+        injury_lookup = self.injury_lookup
+        if injury_model is None:
             # Fallback: izračunaj na osnovu features ako model nije dostupan
             return self._estimate_injury_from_features(features)
         
         try:
-            X = self._injury_feature_row(features)
-            prob = self.injury_model.predict_proba(X)[0][1]
+            if injury_lookup is not None:
+                prob = float(injury_lookup.predict_proba_positive(
+                    np.array([self._injury_logit_row(features)]))[0])
+            else:
+                X = self._injury_feature_row(features)
+                prob = injury_model.predict_proba(X)[0][1]
             
             # Ako je predikcija preniska, koristi fallback logiku
             if prob < 0.15:
@@ -344,10 +668,34 @@ class FatigueClassifier:
             
             return float(np.clip(prob, 0.0, 1.0))
         except Exception as e:
-            print(f"❌ Greška pri predikciji povrede: {e}")
+            logger.error(f"❌ Greška pri predikciji povrede: {e}")
             # Fallback na procjenu od features-a
             return self._estimate_injury_from_features(features)
     
+    def predict_injury_prob_batch(self, features_list: List[List]) -> np.ndarray:
+        """Batch verzija predict_injury_prob (jedan predict_proba za sve redove)."""
+        fallback = np.array([self._estimate_injury_from_features(f) for f in features_list], dtype=float)
+        injury_model = self.injury_model
+        injury_lookup = self.injury_lookup
+        if injury_model is None or len(features_list) == 0:
+            return fallback
+
+        try:
+            if injury_lookup is not None:
+                probs = injury_lookup.predict_proba_positive(
+                    np.array([self._injury_logit_row(f) for f in features_list]))
+            else:
+                X = pd.concat([self._injury_feature_row(f) for f in features_list], ignore_index=True)
+                probs = injury_model.predict_proba(X)[:, 1]
+        except Exception as e:
+            logger.error(f"❌ Greška pri batch predikciji povrede: {e}")
+            return fallback
+
+        # Ista fallback logika kao u predict_injury_prob
+        low = probs < 0.15
+        probs = np.where(low, np.maximum(probs, fallback * 0.5), probs)
+        return np.clip(probs, 0.0, 1.0)
+
     def _estimate_injury_from_features(self, features: List) -> float:
         """Procijeni vjerovatnoću povrede na osnovu features kada model nije dostupan."""
         try:
@@ -376,14 +724,18 @@ class FatigueClassifier:
         activity_str = features[1]
         
         try:
-            pos_encoded = self.position_encoder.transform([position_str])[0]
-        except Exception:
-            pos_encoded = self.position_encoder.transform(["midfielder"])[0]
+            pos_encoded = self._position_codes.get(position_str)
+        except TypeError:
+            pos_encoded = None
+        if pos_encoded is None:
+            pos_encoded = self._position_codes["midfielder"]
 
         try:
-            act_encoded = self.activity_encoder.transform([activity_str])[0]
-        except Exception:
-            act_encoded = self.activity_encoder.transform(["practice"])[0]
+            act_encoded = self._activity_codes.get(activity_str)
+        except TypeError:
+            act_encoded = None
+        if act_encoded is None:
+            act_encoded = self._activity_codes["practice"]
         
         numeric_features = [
             float(features[2]),  # sleep_hours
@@ -396,13 +748,32 @@ class FatigueClassifier:
         rpe = float(features[7]) if len(features) > 7 else 5.0
 
         # Injury is not part of the fatigue regressor inputs (avoid leakage)
-        return np.array([
+        encoded = [
             pos_encoded,
             act_encoded,
             *numeric_features,
             soreness,
             rpe
-        ])
+        ]
+        if self.player_load:
+            # Player load feature-i dolaze iza injury_illness (indeks 8)
+            load = features[9:9 + len(PLAYER_LOAD_FEATURES)]
+            if len(load) != len(PLAYER_LOAD_FEATURES):
+                load = NEUTRAL_LOAD_FEATURES
+            encoded.extend(float(v) for v in load)
+        return np.array(encoded)
+
+    def _decode_features(self, encoded: np.ndarray) -> List:
+        """Inverz _encode_features (kodovi -> stringovi) za primjere iz feature store-a."""
+        decoded = [
+            str(self.position_encoder.classes_[int(encoded[0])]),
+            str(self.activity_encoder.classes_[int(encoded[1])]),
+            *[float(v) for v in encoded[2:8]],
+        ]
+        if self.player_load:
+            # injury_illness nije enkodiran - 0 čuva raspored (load feature-i od indeksa 9)
+            decoded += [0.0, *[float(v) for v in encoded[8:]]]
+        return decoded
 
     def _prepare_features(self, features: List) -> np.ndarray:
         """Encode features and apply scaler if available."""
@@ -426,21 +797,86 @@ class FatigueClassifier:
 
     def predict(self, features: List) -> Tuple[float, float]:
         """Napravi predikciju fatigue score-a"""
+        with self._lock:
+            return self._predict_locked(features)
+
+    # ============================================================================
+    # INFERENCE KERNEL
+    # ============================================================================
+
+    def _get_kernel(self) -> Optional[MLPKernel]:
+        """NumPy kernel za trenutnu verziju modela (gradi se i provjerava pri promjeni verzije)."""
+        with self._lock:
+            if not self.kernel_enabled or self.model is None:
+                return None
+            version = self.model_version()
+            if self._kernel_version == version:
+                return self._kernel
+
+            self._kernel = None
+            self._kernel_version = version
+            scaler = self.scaler
+            if scaler is not None and getattr(scaler, "n_features_in_", self.n_features) != self.n_features:
+                scaler = None
+            try:
+                kernel = MLPKernel(self.model, scaler)
+                # Bez training dataset-a: enkodirani BASELINE_EXAMPLES (sa player_load
+                # dobijaju NEUTRAL_LOAD_FEATURES, pa širina odgovara modelu)
+                probe = (self.training_dataset.X.astype(float) if self.training_dataset
+                         else np.array([self._encode_features(list(ex[:-1])) for ex in BASELINE_EXAMPLES],
+                                       dtype=float))
+                diff = kernel.max_abs_diff(self.model, scaler, probe)
+            except Exception as e:
+                logger.warning(f"⚠️ MLP kernel nedostupan, koristim sklearn predict: {e}")
+                return None
+
+            self.kernel_stats["builds"] += 1
+            self.kernel_stats["build_max_abs_diff"] = diff
+            if diff > KERNEL_TOLERANCE:
+                logger.warning(f"⚠️ MLP kernel odstupa od sklearn-a ({diff:.2e} > {KERNEL_TOLERANCE}) - isključen")
+                return None
+            self._kernel = kernel
+            return kernel
+
+    def _regress(self, encoded: np.ndarray) -> float:
+        """Sirovi MLP izlaz za jedan enkodirani red (kernel ili sklearn)."""
+        kernel = self._get_kernel()
+        if kernel is not None and not self.kernel_verify:
+            return kernel.predict_one(encoded)
+
+        x = encoded.reshape(1, -1)
+        if self.scaler is not None:
+            try:
+                x = self.scaler.transform(x)
+            except Exception:
+                pass
+        exact = float(self.model.predict(x)[0])
+        if kernel is not None:
+            diff = abs(kernel.predict_one(encoded) - exact)
+            self.kernel_stats["checks"] += 1
+            self.kernel_stats["max_abs_diff"] = max(self.kernel_stats["max_abs_diff"], diff)
+            if diff > KERNEL_TOLERANCE:
+                self.kernel_stats["mismatches"] += 1
+                logger.warning(f"⚠️ MLP kernel mismatch: {diff:.2e}")
+        return exact
+
+    def _predict_locked(self, features: List) -> Tuple[float, float]:
+        if self.model is None:
+            raise RuntimeError("Fatigue model nije istreniran — koristi FatigueClassifier.load() ili .train()")
         encoded_features = self._encode_features(features)
-        x = self._prepare_features(features)
         
-        fatigue_score = self.model.predict(x)[0]
+        fatigue_score = self._regress(encoded_features)
         fatigue_score = max(0.0, min(100.0, fatigue_score))
         
         # Confidence estimated from local training neighborhood
         confidence = 0.60  # Default base confidence
         
         # Ako imamo dovoljno primjera, izračunaj na osnovu udaljenosti od susednih primjera
-        if len(self.training_dataset_X) >= 3:
-            X_data = np.vstack(self.training_dataset_X)
+        if len(self.training_dataset) >= 3:
+            X_data = self.training_dataset.X
             dists = np.linalg.norm(X_data - encoded_features, axis=1)
             nearest = np.argsort(dists)[:5]
-            neighbor_scores = np.array(self.training_dataset_y)[nearest]
+            neighbor_scores = self.training_dataset.y[nearest].astype(float)
             neighbor_std = float(np.std(neighbor_scores))
             neighbor_dist = float(np.mean(dists[nearest]))
 
@@ -464,84 +900,182 @@ class FatigueClassifier:
         
         return float(fatigue_score), float(confidence)
     
+    def predict_batch(self, features_list: List[List]) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch verzija predict(): jedan MLP forward pass za sve redove.
+
+        Vraća (fatigue_scores, confidences) kao nizove; vrijednosti su iste kao
+        kad se predict() pozove red po red.
+        """
+        if len(features_list) == 0:
+            return np.empty(0), np.empty(0)
+        X_encoded = np.array([self._encode_features(f) for f in features_list], dtype=float)
+
+        with self._lock:
+            model = self.model
+            scaler = self.scaler
+            if model is None:
+                raise RuntimeError("Fatigue model nije istreniran — koristi FatigueClassifier.load() ili .train()")
+            X_data = self.training_dataset.X.astype(float) if len(self.training_dataset) >= 3 else None
+            y_data = self.training_dataset.y.astype(float) if X_data is not None else None
+            kernel = self._get_kernel()
+
+        if kernel is not None and not self.kernel_verify:
+            raw = kernel.predict(X_encoded)
+        else:
+            X = X_encoded
+            if scaler is not None:
+                try:
+                    X = scaler.transform(X_encoded)
+                except Exception:
+                    pass
+            raw = model.predict(X)
+            if kernel is not None:
+                diffs = np.abs(kernel.predict(X_encoded) - raw)
+                self.kernel_stats["checks"] += len(raw)
+                self.kernel_stats["max_abs_diff"] = max(self.kernel_stats["max_abs_diff"], float(diffs.max()))
+                self.kernel_stats["mismatches"] += int(np.sum(diffs > KERNEL_TOLERANCE))
+        scores = np.clip(raw, 0.0, 100.0)
+
+        if X_data is not None:
+            # ||a-b||² = |a|² + |b|² - 2ab, bez (n, m, d) međumatrice
+            sq = (np.sum(X_encoded ** 2, axis=1)[:, None] + np.sum(X_data ** 2, axis=1)[None, :]
+                  - 2.0 * X_encoded @ X_data.T)
+            dists = np.sqrt(np.maximum(sq, 0.0))
+            k = min(5, X_data.shape[0])
+            nearest = np.argpartition(dists, k - 1, axis=1)[:, :k]
+            neighbor_dist = np.take_along_axis(dists, nearest, axis=1).mean(axis=1)
+            neighbor_std = y_data[nearest].std(axis=1)
+
+            distance_conf = 1.0 - np.minimum(neighbor_dist / 20.0, 1.0)
+            variance_conf = 1.0 - np.minimum(neighbor_std / 30.0, 1.0)
+            confidences = np.clip(0.4 * distance_conf + 0.6 * variance_conf, 0.25, 0.95)
+        elif hasattr(model, 'n_outputs_'):
+            input_norm = np.linalg.norm(X_encoded, axis=1)
+            confidences = np.where(input_norm > 0, 0.60 + 0.15 * np.minimum(input_norm / 50.0, 1.0), 0.65)
+        else:
+            confidences = np.full(len(features_list), 0.60)
+
+        return scores.astype(float), confidences.astype(float)
+    
     def train_single(self, features: List, fatigue_score: float) -> bool:
         """
         🔥 OVO JE KLJUČNA METODA - INCREMENTAL LEARNING!
         Treniraj model sa feedback-om
         """
         # 1. Dodaj u training history
-        self.training_history.append({
-            'features': features,
-            'fatigue_score': fatigue_score,
-            'timestamp': time.time()
-        })
-        
-        print(f"📝 Memorisan feedback: fatigue={fatigue_score:.2f}")
-        print(f"   Ukupno memorisanih feedbacka: {len(self.training_history)}")
+        self.remember_feedback(features, fatigue_score)
         
         # 2. Automatski retrain nakon 3 nova feedbacka
-        if len(self.training_history) >= 3:
+        if self.ready_for_retrain():
             success = self._retrain_on_all_examples()
             return success
         
         return True
+
+    def remember_feedback(self, features: List, fatigue_score: float, persist: bool = True):
+        """Memoriši feedback primjer bez treniranja (retrain se radi kasnije, u batch-u).
+
+        ``persist=False`` mijenja samo memoriju - history fajl se upisuje kasnije
+        sa ``save_feedback_history`` (ili se izmjene odbace sa ``discard_unsaved_feedback``).
+        """
+        history = self.training_history
+        before = len(history)
+        accepted = self.retention.offer(history, self._encode_features(features), fatigue_score)
+        evicted = self._enforce_retention()
+
+        # Novi red na kraju -> append jednog zapisa; zamjena/izbacivanje -> prepiši fajl
+        if persist:
+            try:
+                if evicted or (accepted and len(history) == before):
+                    self._history_state.write(history, self.retention.state())
+                elif accepted:
+                    self._history_state.append(history, before, self.retention.state())
+                else:
+                    self._history_state.update_counters(self.retention.state())
+            except Exception as e:
+                logger.warning(f"⚠️ Feedback history nije sačuvan: {e}")
+        
+        logger.info("📝 Memorisan feedback: fatigue=%.2f (ukupno memorisanih: %s)",
+                    fatigue_score, len(history), extra={"event": "learning.feedback"})
+
+    def save_feedback_history(self):
+        """Upiši cijeli feedback history (poslije ``remember_feedback(persist=False)``)"""
+        self._write_state(self._history_state, self.training_history, self.retention.state())
+
+    def discard_unsaved_feedback(self):
+        """Odbaci feedback koji nije upisan - history (i retention brojači) se ponovo čitaju sa diska"""
+        with self._lock:
+            self._training_history = None
+
+    def _enforce_retention(self) -> int:
+        history = self._training_history
+        evicted = self.retention.enforce(history, fatigue_risk_labels(history.y))
+        if evicted:
+            logger.info("🧹 Retention: izbačeno %s starih feedback primjera (zadržano %s)",
+                        evicted, len(history), extra={"event": "learning.retention"})
+        return evicted
+
+    def ready_for_retrain(self) -> bool:
+        """Retrain ima smisla tek kad imamo bar 3 feedback primjera"""
+        return len(self.training_history) >= 3
+
+    def build_retrain_matrix(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Enkodiraj SVE primjere (inicijalni + feedback) u matricu za retrain"""
+        # INICIJALNI + FEEDBACK primjeri (oba već enkodirana u feature store-ovima)
+        all_X = np.vstack([self.initial_examples.X, self.training_history.X]).astype(float)
+        all_y = np.concatenate([self.initial_examples.y, self.training_history.y]).astype(float)
+        return all_X, all_y
+
+    def fit_retrain_bundle(self, X_encoded: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        """Treniraj kopiju MLP-a na retrain matrici; ništa ne instalira ni ne upisuje.
+
+        Isti bundle kao fit_fatigue_job iz retrain executora (vidi install_fatigue_model).
+        """
+        model = fit_fatigue_regressor(copy.deepcopy(self.model), X_encoded, y, self.scaler)
+        return {"model": model, "X_encoded": X_encoded, "y": y}
+
+    def install_fatigue_model(self, model: MLPRegressor, X_encoded: np.ndarray, y: np.ndarray):
+        """Atomski zamijeni fatigue model i njegov training dataset, pa ga sačuvaj.
+
+        Predikcije u toku završavaju sa starim modelom; sljedeća vidi novi.
+        """
+        training = FeatureStore.from_arrays(X_encoded, y)
+        with self._lock:
+            self._version = None
+            self.model = model
+            self.training_dataset = training
+        atomic_dump(model, self.model_file)
+        self._write_state(self._neighbors_state, training)
     
     def _retrain_on_all_examples(self):
         """Retrain model na SVIM primjerima (inicijalni + feedback)"""
-        print("\n🔄 Pokrećem retrain na svim primjerima...")
-        
-        all_X = []
-        all_y = []
-        
-        # 1. Dodaj INICIJALNE primjere
-        for example in self.initial_examples:
-            encoded = self._encode_features(example['features'])
-            all_X.append(encoded)
-            all_y.append(example['fatigue_score'])
+        logger.info("🔄 Pokrećem retrain na svim primjerima...")
         
-        # 2. Dodaj FEEDBACK primjere
-        for item in self.training_history:
-            encoded = self._encode_features(item['features'])
-            all_X.append(encoded)
-            all_y.append(item['fatigue_score'])
+        X_array, y_array = self.build_retrain_matrix()
         
-        # 3. Treniraj na SVI primjerima
-        X_array = np.array(all_X)
-        y_array = np.array(all_y)
-        
-        print(f"   Treniram na {len(y_array)} primjera:")
-        print(f"   - Inicijalni: {len(self.initial_examples)}")
-        print(f"   - Feedback: {len(self.training_history)}")
+        logger.info(f"   Treniram na {len(y_array)} primjera:")
+        logger.info(f"   - Inicijalni: {len(self.initial_examples)}")
+        logger.info(f"   - Feedback: {len(self.training_history)}")
         
         # KLJUČNO: Koristi warm_start=True da model nastavi učiti
-        X_train = X_array
-        if self.scaler is not None:
-            try:
-                X_train = self.scaler.transform(X_array)
-            except Exception:
-                pass
-
-        self.model.fit(X_train, y_array)
-        self.training_dataset_X = [np.array(x, dtype=float) for x in X_array]
-        self.training_dataset_y = [float(y) for y in y_array]
+        bundle = self.fit_retrain_bundle(X_array, y_array)
         
         # Sačuvaj model
-        joblib.dump(self.model, self.model_file)
+        self.install_fatigue_model(bundle["model"], X_array, y_array)
         
-        print(f"✅ Retrain završen! Model sačuvan.")
+        logger.info(f"✅ Retrain završen! Model sačuvan.")
         
         # 4. Provjeri da li je naučio - predikcije za neke primjere
         if len(self.training_history) > 0:
-            latest = self.training_history[-1]
-            features = latest['features']
-            true_score = latest['fatigue_score']
+            encoded, true_score = self.training_history.last()
+            features = self._decode_features(encoded)
             
             pred_score, confidence = self.predict(features)
             error = abs(pred_score - true_score)
             
-            print(f"   Test za najnoviji feedback:")
-            print(f"   - True: {true_score:.1f}, Pred: {pred_score:.1f}")
-            print(f"   - Error: {error:.1f} (manje je bolje)")
+            logger.info(f"   Test za najnoviji feedback:")
+            logger.info(f"   - True: {true_score:.1f}, Pred: {pred_score:.1f}")
+            logger.info(f"   - Error: {error:.1f} (manje je bolje)")
         
         return True
     
@@ -560,10 +1094,13 @@ class FatigueClassifier:
                 pass
         
         # Treniraj model
+        self._invalidate_version()
+        if self.model is None:
+            self.model = build_fatigue_regressor()
         self.model.fit(X_encoded, y_batch)
         
-        joblib.dump(self.model, self.model_file)
-        print(f"✅ Model treniran na {len(y_batch)} primjera")
+        atomic_dump(self.model, self.model_file)
+        logger.info(f"✅ Model treniran na {len(y_batch)} primjera")
     
     def get_model_info(self):
         """Vrati informacije o modelu"""
@@ -576,31 +1113,47 @@ class FatigueClassifier:
             "n_features": self.n_features,
             "model_file": self.model_file,
             "exists": os.path.exists(self.model_file),
+            "trained": self.model is not None,
             "initial_examples": len(self.initial_examples),
             "feedback_learned": len(self.training_history),
             "total_training_examples": len(self.initial_examples) + len(self.training_history),
+            "feature_store_bytes": self.training_dataset.nbytes + self.training_history.nbytes,
+            "inference_kernel": {
+                "enabled": self.kernel_enabled,
+                "active": self._kernel is not None,
+                "verify": self.kernel_verify,
+                "model_version": self._kernel_version,
+                **self.kernel_stats,
+            },
             "injury_model": {
                 "algorithm": "LogisticRegression (binary classification)",
                 "model_file": self.injury_model_file,
                 "loaded": self.injury_model is not None,
                 "features": self.injury_feature_columns,
                 "metrics": self.injury_metrics,
+                "lookup_table": {
+                    "enabled": self.use_lookup_table,
+                    "active": self.injury_lookup is not None,
+                    "drift": self.injury_lookup_drift,
+                },
             },
         }
     
     def get_learning_stats(self):
         """Statistike učenja"""
+        retention = self.retention.get_stats(self.training_history)
         if not self.training_history:
-            return {"message": "No feedback learned yet"}
+            return {"message": "No feedback learned yet", "retention": retention}
         
-        scores = [h['fatigue_score'] for h in self.training_history]
+        scores = self.training_history.y.astype(float).tolist()
         
         return {
             "feedback_learned": len(self.training_history),
             "avg_fatigue_feedback": np.mean(scores),
             "min_fatigue_feedback": np.min(scores),
             "max_fatigue_feedback": np.max(scores),
-            "recent_feedback": scores[-5:] if len(scores) >= 5 else scores
+            "recent_feedback": scores[-5:] if len(scores) >= 5 else scores,
+            "retention": retention,
         }
     
     # ============================================================================
@@ -616,91 +1169,43 @@ class FatigueClassifier:
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"CSV not found: {csv_path}")
 
-        df = pd.read_csv(csv_path)
-        if "Fatigue" in df.columns:
-            target_col = "Fatigue"
-        elif "FatigueScore" in df.columns:
-            target_col = "FatigueScore"
-        elif "ProxyFatigue" in df.columns:
-            target_col = "ProxyFatigue"
-        else:
-            sleep = pd.to_numeric(df.get("Sleep_Duration", 7), errors="coerce").fillna(7)
-            stress = pd.to_numeric(df.get("Stress", 5), errors="coerce").fillna(5)
-            rpe = pd.to_numeric(df.get("RPE", 5), errors="coerce").fillna(5)
-            soreness = pd.to_numeric(df.get("Soreness", 5), errors="coerce").fillna(5)
-            proxy = ((10 - sleep) * 5) + (stress * 5) + (rpe * 3) + (soreness * 2)
-            df["ProxyFatigue"] = proxy.clip(0, 100)
-            target_col = "ProxyFatigue"
-
-        rows = []
-        targets = []
-        for _, row in df.iterrows():
-            position = normalize_position(row.get("Position", "midfielder"))
-            activity = normalize_activity(row.get("Session_Type", row.get("Activity", "practice")))
-            sleep = float(row.get("Sleep_Duration", 7))
-            stress = float(row.get("Stress", 5))
-            distance = distance_to_km(row.get("Distance", 5))
-            sprint = int(row.get("SprintCount", row.get("Acceleration_Count", 10)) or 10)
-            soreness = float(row.get("Soreness", 5))
-            rpe = float(row.get("RPE", 5))
-            injury = 1 if str(row.get("Injury_Illness", "No")).strip().lower() in ("yes", "1", "true") else 0
-            # Note: injury is computed for downstream injury model but is not
-            # included as an input feature to the fatigue regressor to avoid
-            # leakage (injury may be a consequence of fatigue).
-            rows.append([position, activity, sleep, stress, distance, sprint, soreness, rpe])
-            targets.append(float(row.get(target_col, 0)))
-
-        X_encoded = np.array([self._encode_features(f) for f in rows])
-        y = np.array(targets)
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_encoded, y, test_size=0.2, random_state=42
-        )
-
-        # Fit scaler on training data and transform both sets to avoid leakage
-        try:
-            scaler = StandardScaler()
-            X_train = scaler.fit_transform(X_train)
-            X_test = scaler.transform(X_test)
+        frame = load_csv_feature_frame(csv_path)
+        mae, rmse, r2 = self.train_from_frame(frame)
+
+        self.train_injury_from_frame(frame)
+        return mae, rmse, r2
+
+    def train_from_frame(self, frame: pd.DataFrame):
+        """Treniraj fatigue MLP iz već parsiranog feature frame-a; vrati MAE, RMSE, R²."""
+        # Note: injury is kept in the frame for the downstream injury model but
+        # is not an input feature to the fatigue regressor to avoid leakage
+        # (injury may be a consequence of fatigue).
+        X_encoded = encode_feature_frame(frame, player_load=self.player_load)
+        y = frame["fatigue"].to_numpy(dtype=float)
+        model, scaler, metrics = fit_fatigue_csv_model(X_encoded, y)
+        metrics["target_column"] = frame.attrs.get("fatigue_column")
+        self.install_csv_bundle({
+            "model": model,
+            "scaler": scaler,
+            "metrics": metrics,
+            "X_encoded": X_encoded,
+            "y": y,
+        })
+        return metrics["mae"], metrics["rmse"], metrics["r2"]
+
+    def install_csv_bundle(self, bundle: Dict[str, Any]):
+        """Instaliraj model istreniran iz CSV-a (model + scaler + metrike) i sačuvaj ga."""
+        scaler = bundle.get("scaler")
+        if scaler is not None:
+            self._invalidate_version()
             self.scaler = scaler
             # Save scaler for future incremental usage
             try:
-                joblib.dump(scaler, self.scaler_file)
+                atomic_dump(scaler, self.scaler_file)
             except Exception:
                 pass
-        except Exception:
-            # If scaling fails, fall back to unscaled data
-            pass
+        self.install_fatigue_model(bundle["model"], bundle["X_encoded"], bundle["y"])
 
-        self.model = MLPRegressor(
-            hidden_layer_sizes=(100, 50),
-            activation="relu",
-            solver="adam",
-            learning_rate="adaptive",
-            max_iter=300,
-            random_state=42,
-            warm_start=True,
-        )
-        self.model.fit(X_train, y_train)
-        preds = self.model.predict(X_test)
-        mae = float(mean_absolute_error(y_test, preds))
-        rmse = float(np.sqrt(mean_squared_error(y_test, preds)))
-        r2 = float(r2_score(y_test, preds))
-
-        joblib.dump(self.model, self.model_file)
-        self.training_dataset_X = [np.array(x, dtype=float) for x in X_encoded]
-        self.training_dataset_y = [float(v) for v in y]
-
-        fatigue_metrics = {
-            "mae": mae,
-            "rmse": rmse,
-            "r2": r2,
-            "train_size": int(len(y_train)),
-            "test_size": int(len(y_test)),
-            "target_column": target_col,
-        }
         all_metrics = load_metrics()
-        all_metrics["fatigue_mlp_regressor"] = fatigue_metrics
+        all_metrics["fatigue_mlp_regressor"] = bundle["metrics"]
         save_metrics(all_metrics)
-
-        self._train_injury_model(csv_path)
-        return mae, rmse, r2
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Compact, growable feature store for the classifier's in-memory history.
+
+Rows are encoded feature vectors (see ``FatigueClassifier._encode_features``)
+kept as one float32 matrix plus float32 targets and (optionally) float64
+timestamps. Appends are amortized O(1): capacity doubles when full, so a long
+running agent holds ~(4*d + 4 + 8) bytes per example instead of one numpy
+object (+ list slot, + dict for feedback) per row.
+"""
+import time
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+
+class FeatureStore:
+    """Array-backed (X, y[, timestamp]) rows with amortized append."""
+
+    __slots__ = ("n_features", "with_timestamps", "_X", "_y", "_ts", "_size")
+
+    def __init__(self, n_features: int, capacity: int = 64, with_timestamps: bool = False):
+        self.n_features = n_features
+        self.with_timestamps = with_timestamps
+        capacity = max(int(capacity), 1)
+        self._X = np.empty((capacity, n_features), dtype=np.float32)
+        self._y = np.empty(capacity, dtype=np.float32)
+        self._ts = np.empty(capacity, dtype=np.float64) if with_timestamps else None
+        self._size = 0
+
+    @classmethod
+    def from_arrays(cls, X, y, with_timestamps: bool = False) -> "FeatureStore":
+        X = np.asarray(X, dtype=np.float32).reshape(len(y), -1)
+        store = cls(X.shape[1], capacity=len(y), with_timestamps=with_timestamps)
+        store.extend(X, y)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def capacity(self) -> int:
+        return self._X.shape[0]
+
+    def _reserve(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        X = np.empty((capacity, self.n_features), dtype=np.float32)
+        X[:self._size] = self._X[:self._size]
+        y = np.empty(capacity, dtype=np.float32)
+        y[:self._size] = self._y[:self._size]
+        self._X, self._y = X, y
+        if self._ts is not None:
+            ts = np.empty(capacity, dtype=np.float64)
+            ts[:self._size] = self._ts[:self._size]
+            self._ts = ts
+
+    def append(self, x, y: float, timestamp: Optional[float] = None):
+        self._reserve(self._size + 1)
+        self._X[self._size] = x
+        self._y[self._size] = y
+        if self._ts is not None:
+            self._ts[self._size] = time.time() if timestamp is None else timestamp
+        self._size += 1
+
+    def extend(self, X, y, timestamps=None):
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.n_features)
+        n = X.shape[0]
+        self._reserve(self._size + n)
+        self._X[self._size:self._size + n] = X
+        self._y[self._size:self._size + n] = np.asarray(y, dtype=np.float32)
+        if self._ts is not None:
+            self._ts[self._size:self._size + n] = time.time() if timestamps is None else timestamps
+        self._size += n
+
+    def replace(self, index: int, x, y: float, timestamp: Optional[float] = None):
+        """Overwrite row ``index`` in place (reservoir sampling)."""
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        self._X[index] = x
+        self._y[index] = y
+        if self._ts is not None:
+            self._ts[index] = time.time() if timestamp is None else timestamp
+
+    def keep(self, indices):
+        """Compact the store to ``indices`` (in the given order)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        n = len(indices)
+        self._X[:n] = self._X[indices]
+        self._y[:n] = self._y[indices]
+        if self._ts is not None:
+            self._ts[:n] = self._ts[indices]
+        self._size = n
+
+    def clear(self):
+        self._size = 0
+
+    @property
+    def X(self) -> np.ndarray:
+        """(n, d) float32 view - valid until the next append."""
+        return self._X[:self._size]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self._size]
+
+    @property
+    def timestamps(self) -> Optional[np.ndarray]:
+        return self._ts[:self._size] if self._ts is not None else None
+
+    def last(self) -> Tuple[np.ndarray, float]:
+        if not self._size:
+            raise IndexError("FeatureStore is empty")
+        return self._X[self._size - 1], float(self._y[self._size - 1])
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, float]]:
+        for i in range(self._size):
+            yield self._X[i], float(self._y[i])
+
+    @property
+    def nbytes(self) -> int:
+        """Allocated bytes (including spare capacity)."""
+        total = self._X.nbytes + self._y.nbytes
+        if self._ts is not None:
+            total += self._ts.nbytes
+        return int(total)
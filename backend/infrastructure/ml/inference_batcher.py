@@ -0,0 +1,171 @@
+"""Coalesce concurrent single-row predictions into one batched forward pass.
+
+Callers (scoring loop coroutines, replay/worker threads, ...) submit one
+feature row each and get a ``concurrent.futures.Future``. A background thread
+takes the oldest pending row, waits until ``max_batch`` rows are pending or
+the oldest one has waited ``max_delay_ms``, runs ``batch_fn`` once for all of
+them and resolves every caller's future with its own output.
+
+The MLP / injury LR / risk LR forward passes cost almost the same for 1 row as
+for 32 (the overhead is input validation and the Python call path, not the
+matrix math), so under concurrency the per-row cost drops roughly with the
+achieved batch size. A lone caller pays at most ``max_delay_ms`` extra.
+
+``batch_fn`` must take a list of rows and return a list of outputs of the same
+length, in the same order. An exception fails every future of that batch.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the achieved-batch-size histogram in get_status()
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class InferenceBatcher:
+    """Request-coalescing micro-batcher in front of a batched predict function."""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch: int = 32, max_delay_ms: float = 2.0, name: str = "inference"):
+        self.batch_fn = batch_fn
+        self.max_batch = max(int(max_batch), 1)
+        self.max_delay_ms = max(float(max_delay_ms), 0.0)
+        self.name = name
+
+        self._pending: List[Tuple[Any, Future, float]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Metrics (written by the batcher thread only)
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.wait_ms_total = 0.0
+        self.forward_ms_total = 0.0
+        self.size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)  # last = > max bucket
+
+    # ------------------------------------------------------------------
+    # Caller side
+    # ------------------------------------------------------------------
+
+    def submit(self, row: Any) -> Future:
+        """Queue one row; the future resolves to its output."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"InferenceBatcher '{self.name}' is closed")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+            self._pending.append((row, future, time.perf_counter()))
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def predict(self, row: Any, timeout: Optional[float] = None) -> Any:
+        """Blocking variant for worker threads. Do not call from the event loop."""
+        return self.submit(row).result(timeout)
+
+    async def predict_async(self, row: Any) -> Any:
+        """Awaitable variant for coroutines (the event loop keeps running while the batch fills)."""
+        return await asyncio.wrap_future(self.submit(row))
+
+    def close(self, timeout: float = 1.0):
+        """Stop the batcher thread after the rows already queued are served."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Batcher thread
+    # ------------------------------------------------------------------
+
+    def _next_batch(self) -> Optional[List[Tuple[Any, Future, float]]]:
+        with self._cond:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            # Fill until max_batch or until the oldest row has waited max_delay_ms
+            deadline = self._pending[0][2] + self.max_delay_ms / 1000.0
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._execute(batch)
+            except Exception as e:
+                # The thread must survive: callers of later submit() would wait forever
+                self.errors += 1
+                logger.exception(f"❌ Inference batcher ({self.name}) failed to resolve a batch: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _execute(self, batch: List[Tuple[Any, Future, float]]):
+        # Callers cancelled meanwhile (e.g. a scoring task cancelled on stop) are skipped;
+        # the rest can no longer be cancelled, so set_result/set_exception cannot race.
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            outputs = self.batch_fn([row for row, _, _ in batch])
+            if len(outputs) != len(batch):
+                raise ValueError(f"batch_fn returned {len(outputs)} outputs for {len(batch)} rows")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Inference batch ({self.name}, {len(batch)} rows) failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        size = len(batch)
+        self.batches += 1
+        self.rows += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.forward_ms_total += (finished - started) * 1000.0
+        self.wait_ms_total += sum((started - queued_at) * 1000.0 for _, _, queued_at in batch)
+        bucket = next((i for i, bound in enumerate(BATCH_SIZE_BUCKETS) if size <= bound), len(BATCH_SIZE_BUCKETS))
+        self.size_histogram[bucket] += 1
+
+        for (_, future, _), output in zip(batch, outputs):
+            future.set_result(output)
+
+    def get_status(self) -> dict:
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "name": self.name,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay_ms,
+            "batches": self.batches,
+            "rows": self.rows,
+            "errors": self.errors,
+            "avg_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "avg_wait_ms": self.wait_ms_total / self.rows if self.rows else 0.0,
+            "avg_forward_ms": self.forward_ms_total / self.batches if self.batches else 0.0,
+            "batch_size_histogram": dict(zip(labels, self.size_histogram)),
+            "pending": len(self._pending),
+        }
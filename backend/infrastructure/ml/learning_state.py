@@ -0,0 +1,119 @@
+"""Append-only binary persistence for the classifiers' learning state.
+
+One file per ``FeatureStore`` (feedback history, kNN neighbour matrix, risk
+feedback), stored next to the model::
+
+    header  <4sHHH H 4Q>   magic, version, n_features, flags, reserved,
+                           4 retention counters (seen, evicted_by_age,
+                           evicted_by_size, rejected)
+    records                x: float32[n_features], y: float32[, ts: float64]
+
+New examples are appended as single records; the counters are rewritten in
+place in the header. Evictions and model swaps rewrite the whole file
+atomically (temp file + rename). Loading is a single read; a partial
+trailing record (crash mid-append) is ignored.
+"""
+import os
+import struct
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from infrastructure.ml.feature_store import FeatureStore
+
+MAGIC = b"FBLS"
+VERSION = 1
+FLAG_TIMESTAMPS = 1
+COUNTER_KEYS = ("seen", "evicted_by_age", "evicted_by_size", "rejected")
+_HEADER = struct.Struct("<4sHHHH4Q")
+_COUNTERS = struct.Struct("<4Q")
+_COUNTERS_OFFSET = _HEADER.size - _COUNTERS.size
+
+
+class LearningStateFile:
+    """Binary file backing one FeatureStore."""
+
+    def __init__(self, path: str, n_features: int, with_timestamps: bool = False):
+        self.path = path
+        self.n_features = n_features
+        self.with_timestamps = with_timestamps
+        fields = [("x", "<f4", (n_features,)), ("y", "<f4")]
+        if with_timestamps:
+            fields.append(("ts", "<f8"))
+        self.record_dtype = np.dtype(fields)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _header(self, counters: Optional[Dict[str, int]] = None) -> bytes:
+        counters = counters or {}
+        flags = FLAG_TIMESTAMPS if self.with_timestamps else 0
+        return _HEADER.pack(MAGIC, VERSION, self.n_features, flags, 0,
+                            *(int(counters.get(key, 0)) for key in COUNTER_KEYS))
+
+    def _records(self, store: FeatureStore, start: int = 0) -> np.ndarray:
+        records = np.empty(len(store) - start, dtype=self.record_dtype)
+        records["x"] = store.X[start:]
+        records["y"] = store.y[start:]
+        if self.with_timestamps:
+            records["ts"] = store.timestamps[start:]
+        return records
+
+    def read(self) -> Tuple[FeatureStore, Dict[str, int]]:
+        """Load all records; raises ValueError if the file belongs to a different layout."""
+        with open(self.path, "rb") as handle:
+            header = handle.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{self.path}: truncated header")
+            magic, version, n_features, flags, _, *counters = _HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path}: not a learning state file (v{VERSION})")
+            if n_features != self.n_features or bool(flags & FLAG_TIMESTAMPS) != self.with_timestamps:
+                raise ValueError(f"{self.path}: layout mismatch ({n_features} features, flags={flags})")
+            payload = handle.read()
+
+        n = len(payload) // self.record_dtype.itemsize
+        records = np.frombuffer(payload, dtype=self.record_dtype, count=n)
+        store = FeatureStore(self.n_features, capacity=max(n, 64), with_timestamps=self.with_timestamps)
+        store.extend(records["x"], records["y"], records["ts"] if self.with_timestamps else None)
+        return store, dict(zip(COUNTER_KEYS, counters))
+
+    def write(self, store: FeatureStore, counters: Optional[Dict[str, int]] = None):
+        """Rewrite the whole file atomically."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".bin", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(self._header(counters))
+                handle.write(self._records(store).tobytes())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def append(self, store: FeatureStore, start: int, counters: Optional[Dict[str, int]] = None):
+        """Append rows ``store[start:]`` and update the header counters in place."""
+        if not self.exists():
+            self.write(store, counters)
+            return
+        with open(self.path, "r+b") as handle:
+            handle.seek(0, os.SEEK_END)
+            size = handle.tell()
+            # Drop a partial record left by an interrupted append
+            misaligned = (size - _HEADER.size) % self.record_dtype.itemsize
+            if misaligned:
+                handle.truncate(size - misaligned)
+                handle.seek(0, os.SEEK_END)
+            handle.write(self._records(store, start).tobytes())
+            if counters is not None:
+                handle.seek(_COUNTERS_OFFSET)
+                handle.write(_COUNTERS.pack(*(int(counters.get(key, 0)) for key in COUNTER_KEYS)))
+
+    def update_counters(self, counters: Dict[str, int]):
+        if not self.exists():
+            return
+        with open(self.path, "r+b") as handle:
+            handle.seek(_COUNTERS_OFFSET)
+            handle.write(_COUNTERS.pack(*(int(counters.get(key, 0)) for key in COUNTER_KEYS)))
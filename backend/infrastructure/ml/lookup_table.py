@@ -0,0 +1,167 @@
+"""Precomputed lookup tables for the 5-input logistic models (risk LR, injury LR).
+
+Both models are ``StandardScaler -> LogisticRegression`` pipelines over
+``Sleep_Duration, Stress, Distance_km, Soreness, RPE``. The table holds the
+class logits for every point of a (sleep x stress x soreness x rpe) grid; the
+distance term is added at runtime. Because the pipeline's logits are linear in
+every input, indexing the grid and adding ``distance * w_distance`` gives the
+same logits as the pipeline (up to float32 rounding). Rows that do not fall on
+the grid (e.g. sleep 7.3 h) are evaluated with the same folded weights, so the
+table mode never changes a prediction class except through rounding.
+"""
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+LOGIT_FEATURES = ["Sleep_Duration", "Stress", "Distance_km", "Soreness", "RPE"]
+
+# Grid axes (start, stop, step); distance is the interpolated (linear) axis
+GRID_AXES = {
+    "Sleep_Duration": (0.0, 12.0, 0.25),
+    "Stress": (1.0, 10.0, 1.0),
+    "Soreness": (1.0, 10.0, 1.0),
+    "RPE": (1.0, 10.0, 1.0),
+}
+
+
+@dataclass
+class DriftReport:
+    """Accuracy of the table vs. the exact pipeline on a fixed probe set."""
+    samples: int
+    on_grid_fraction: float
+    max_abs_logit_diff: float
+    max_abs_proba_diff: float
+    class_agreement: float
+    build_ms: float
+    table_bytes: int
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class LogitLookupTable:
+    """Compiled form of a scaler + logistic regression pipeline."""
+
+    def __init__(self, pipeline, feature_columns: Sequence[str]):
+        started = time.perf_counter()
+        scaler = pipeline.named_steps["scaler"]
+        clf = pipeline.named_steps["clf"]
+        columns = list(feature_columns)
+        if sorted(columns) != sorted(LOGIT_FEATURES):
+            raise ValueError(f"Lookup table needs columns {LOGIT_FEATURES}, got {columns}")
+
+        # Fold the scaler into the linear model: z = x @ W.T + b
+        order = [columns.index(name) for name in LOGIT_FEATURES]
+        mean = np.asarray(scaler.mean_, dtype=np.float64)[order]
+        scale = np.asarray(scaler.scale_, dtype=np.float64)[order]
+        coef = np.asarray(clf.coef_, dtype=np.float64)[:, order]
+        self.weights = coef / scale
+        self.bias = np.asarray(clf.intercept_, dtype=np.float64) - self.weights @ mean
+        self.classes = np.asarray(clf.classes_)
+        self.binary = len(self.classes) == 2
+
+        axes = [np.arange(lo, hi + step / 2, step) for lo, hi, step in GRID_AXES.values()]
+        self._lo = np.array([spec[0] for spec in GRID_AXES.values()])
+        self._step = np.array([spec[2] for spec in GRID_AXES.values()])
+        self._shape = np.array([len(axis) for axis in axes])
+
+        # table[i_sleep, i_stress, i_soreness, i_rpe, :] = bias + grid terms (no distance)
+        w = self.weights
+        table = np.broadcast_to(self.bias, tuple(self._shape) + (len(self.bias),)).copy()
+        grid_cols = [0, 1, 3, 4]  # sleep, stress, soreness, rpe in LOGIT_FEATURES order
+        for axis_pos, (col, values) in enumerate(zip(grid_cols, axes)):
+            shape = [1, 1, 1, 1, len(self.bias)]
+            shape[axis_pos] = len(values)
+            table += (values[:, None] * w[:, col][None, :]).reshape(shape)
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.distance_weights = w[:, 2].astype(np.float32)
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.table.nbytes)
+
+    def logits(self, X: np.ndarray) -> np.ndarray:
+        """Logits for rows in ``LOGIT_FEATURES`` order; shape (n, n_classes)."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        grid_values = X[:, [0, 1, 3, 4]]
+        pos = (grid_values - self._lo) / self._step
+        idx = np.rint(pos).astype(np.int64)
+        on_grid = (np.all(np.abs(pos - idx) < 1e-9, axis=1)
+                   & np.all((idx >= 0) & (idx < self._shape), axis=1))
+
+        out = np.empty((len(X), len(self.bias)), dtype=np.float64)
+        if on_grid.any():
+            i = idx[on_grid]
+            out[on_grid] = (self.table[i[:, 0], i[:, 1], i[:, 2], i[:, 3]]
+                            + X[on_grid, 2:3] * self.distance_weights)
+        off = ~on_grid
+        if off.any():
+            out[off] = X[off] @ self.weights.T + self.bias
+        return out
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        z = self.logits(X)
+        if self.binary:
+            return self.classes[(z[:, 0] > 0).astype(int)]
+        return self.classes[np.argmax(z, axis=1)]
+
+    def predict_proba_positive(self, X: np.ndarray) -> np.ndarray:
+        """P(class 1) for a binary model."""
+        z = self.logits(X)[:, 0]
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def on_grid_fraction(self, X: np.ndarray) -> float:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        pos = (X[:, [0, 1, 3, 4]] - self._lo) / self._step
+        idx = np.rint(pos)
+        ok = np.all(np.abs(pos - idx) < 1e-9, axis=1) & np.all((idx >= 0) & (idx < self._shape), axis=1)
+        return float(ok.mean()) if len(ok) else 0.0
+
+    def drift_report(self, pipeline, feature_columns: Sequence[str],
+                     X: Optional[np.ndarray] = None, seed: int = 42) -> DriftReport:
+        """Compare against the exact pipeline (default probe: 2000 realistic rows)."""
+        if X is None:
+            X = probe_rows(seed=seed)
+        X = np.asarray(X, dtype=np.float64)
+        frame = pd.DataFrame(X, columns=LOGIT_FEATURES)[list(feature_columns)]
+        exact_z = pipeline.decision_function(frame)
+        exact_z = exact_z.reshape(len(X), -1)
+        table_z = self.logits(X)
+
+        if self.binary:
+            exact_p = pipeline.predict_proba(frame)[:, 1]
+            table_p = 1.0 / (1.0 + np.exp(-table_z[:, 0]))
+        else:
+            exact_p = pipeline.predict_proba(frame)
+            shifted = table_z - table_z.max(axis=1, keepdims=True)
+            table_p = np.exp(shifted) / np.exp(shifted).sum(axis=1, keepdims=True)
+
+        return DriftReport(
+            samples=len(X),
+            on_grid_fraction=self.on_grid_fraction(X),
+            max_abs_logit_diff=float(np.max(np.abs(exact_z - table_z))),
+            max_abs_proba_diff=float(np.max(np.abs(exact_p - table_p))),
+            class_agreement=float(np.mean(pipeline.predict(frame) == self.predict(X))),
+            build_ms=self.build_ms,
+            table_bytes=self.nbytes,
+        )
+
+
+def probe_rows(n: int = 2000, seed: int = 42) -> np.ndarray:
+    """Realistic inputs: integer scales, quarter-hour sleep, some off-grid sleep values."""
+    rng = np.random.default_rng(seed)
+    sleep = rng.integers(16, 41, n) * 0.25
+    off = rng.random(n) < 0.1
+    sleep[off] = rng.uniform(4.0, 10.0, off.sum())
+    return np.column_stack([
+        sleep,
+        rng.integers(1, 11, n),
+        rng.uniform(0.0, 14.0, n),
+        rng.integers(1, 11, n),
+        rng.integers(1, 11, n),
+    ]).astype(np.float64)
+
@@ -0,0 +1,120 @@
+"""Pure-NumPy forward pass for the fitted fatigue ``MLPRegressor``.
+
+For an 8-input ``(100, 50)`` network almost all of ``MLPRegressor.predict``
+time is input validation and dispatch. ``MLPKernel`` copies ``coefs_`` /
+``intercepts_`` once into contiguous float32 arrays, folds the optional
+``StandardScaler`` into the first layer and runs the forward pass into
+preallocated buffers (one set for single rows, a growable set for batches).
+"""
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+
+def _relu(x: np.ndarray):
+    np.maximum(x, 0.0, out=x)
+
+
+def _tanh(x: np.ndarray):
+    np.tanh(x, out=x)
+
+
+def _logistic(x: np.ndarray):
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    np.reciprocal(x, out=x)
+
+
+def _identity(x: np.ndarray):
+    pass
+
+
+ACTIVATIONS = {
+    "relu": _relu,
+    "tanh": _tanh,
+    "logistic": _logistic,
+    "identity": _identity,
+}
+
+
+class MLPKernel:
+    """Inference-only copy of a fitted MLPRegressor (+ scaler)."""
+
+    def __init__(self, model, scaler=None, dtype=np.float32):
+        if model.activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {model.activation}")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("MLPKernel supports single-output regressors only")
+
+        coefs = [np.asarray(c, dtype=np.float64) for c in model.coefs_]
+        intercepts = [np.asarray(b, dtype=np.float64) for b in model.intercepts_]
+        if scaler is not None:
+            # (x - mean) / scale @ W + b  ==  x @ (W / scale) + (b - (mean / scale) @ W)
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+            intercepts[0] = intercepts[0] - (mean / scale) @ coefs[0]
+            coefs[0] = coefs[0] / scale[:, None]
+
+        self.dtype = np.dtype(dtype)
+        self.weights: List[np.ndarray] = [np.ascontiguousarray(w, dtype=self.dtype) for w in coefs]
+        self.biases: List[np.ndarray] = [np.ascontiguousarray(b, dtype=self.dtype) for b in intercepts]
+        self.activation = ACTIVATIONS[model.activation]
+        self.n_features = self.weights[0].shape[0]
+
+        self._row_input = np.empty((1, self.n_features), dtype=self.dtype)
+        self._row_buffers = self._allocate(1)
+        self._batch_input: Optional[np.ndarray] = None
+        self._batch_buffers: List[np.ndarray] = []
+        self._batch_capacity = 0
+        self._lock = threading.Lock()
+
+    def _allocate(self, rows: int) -> List[np.ndarray]:
+        return [np.empty((rows, w.shape[1]), dtype=self.dtype) for w in self.weights]
+
+    def _forward(self, x: np.ndarray, buffers: List[np.ndarray]) -> np.ndarray:
+        h = x
+        last = len(self.weights) - 1
+        for i, (w, b, out) in enumerate(zip(self.weights, self.biases, buffers)):
+            np.matmul(h, w, out=out)
+            out += b
+            if i < last:
+                self.activation(out)
+            h = out
+        return h[:, 0]
+
+    def predict_one(self, encoded: np.ndarray) -> float:
+        """Single encoded (unscaled) row -> raw regressor output."""
+        with self._lock:
+            self._row_input[0] = encoded
+            return float(self._forward(self._row_input, self._row_buffers)[0])
+
+    def predict(self, X_encoded: np.ndarray) -> np.ndarray:
+        """Batch of encoded (unscaled) rows -> raw outputs (float64 copy)."""
+        X_encoded = np.asarray(X_encoded)
+        n = X_encoded.shape[0]
+        if n == 0:
+            return np.empty(0)
+        with self._lock:
+            if n > self._batch_capacity:
+                capacity = 1 << (n - 1).bit_length()
+                self._batch_input = np.empty((capacity, self.n_features), dtype=self.dtype)
+                self._batch_buffers = self._allocate(capacity)
+                self._batch_capacity = capacity
+            x = self._batch_input[:n]
+            x[...] = X_encoded
+            out = self._forward(x, [buf[:n] for buf in self._batch_buffers])
+            return out.astype(np.float64)
+
+    def max_abs_diff(self, model, scaler, X_encoded: np.ndarray) -> float:
+        """Largest |kernel - sklearn| over ``X_encoded`` (sklearn output is the reference)."""
+        X_encoded = np.asarray(X_encoded, dtype=np.float64)
+        if len(X_encoded) == 0:
+            return 0.0
+        X = scaler.transform(X_encoded) if scaler is not None else X_encoded
+        return float(np.max(np.abs(model.predict(X) - self.predict(X_encoded))))
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(w.nbytes for w in self.weights) + sum(b.nbytes for b in self.biases))
@@ -0,0 +1,45 @@
+"""Serialization helpers shared by the classifiers and the retrain executor."""
+import io
+import os
+import tempfile
+from typing import Any
+
+import joblib
+
+
+def dumps_bundle(bundle: Any) -> bytes:
+    """Serialize a model bundle to bytes (joblib format)."""
+    buffer = io.BytesIO()
+    joblib.dump(bundle, buffer)
+    return buffer.getvalue()
+
+
+def loads_bundle(payload: bytes) -> Any:
+    """Inverse of :func:`dumps_bundle`."""
+    return joblib.load(io.BytesIO(payload))
+
+
+def model_fingerprint(*objects: Any) -> str:
+    """Short content hash of fitted estimators, used as a model version tag.
+
+    Identical weights give the same tag across processes and restarts.
+    """
+    return joblib.hash(objects)[:12]
+
+
+def atomic_dump(obj: Any, path: str) -> None:
+    """Write ``obj`` with joblib to a temp file and rename it over ``path``.
+
+    Readers (other processes loading the bundle) never observe a half-written
+    file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".joblib", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            joblib.dump(obj, handle)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,383 @@
+"""Per-player rolling workload aggregates (acute:chronic workload ratio).
+
+Every session adds its distance and internal load to the player's daily
+totals. Internal load is RPE x distance_km: the session table has no
+duration column, so distance stands in for minutes in the usual
+session-RPE formula.
+
+Each player owns two 28-slot ring buffers of daily totals (distance, load),
+indexed by ``day % CHRONIC_DAYS``, plus running sums over the acute (7-day)
+and chronic (28-day) windows. An update touches a bounded number of slots
+however long the history is:
+
+* same day: add to the day's bin and to the running sums;
+* later day: days that fall out of the windows are subtracted from the sums
+  and their bins cleared (at most 28; a gap of 28+ days resets the player);
+* earlier day still inside the chronic window: add to that day's bin;
+  anything older is ignored.
+
+Features (``PLAYER_LOAD_FEATURES``), as of the player's latest session day:
+
+* ``acute_distance_km`` - distance over the last 7 days;
+* ``acwr_distance`` / ``acwr_load`` - mean daily value over 7 days divided
+  by the mean daily value over 28 days;
+* ``monotony`` - mean / standard deviation of the daily load over 7 days
+  (rest days count as zero; capped at ``MAX_MONOTONY``);
+* ``strain`` - weekly load x monotony.
+
+Until a player has 7/28 days of history the windows are averaged over the
+days since their first session, so a new player starts at an ACWR of 1.0
+instead of an inflated ratio. A player back after 28+ days off starts over the
+same way. Unknown players get ``NEUTRAL_LOAD_FEATURES``.
+
+The aggregates of a day therefore depend only on the sessions of the
+``2 * CHRONIC_DAYS`` days up to it (``LOOKBACK_DAYS``): an earlier session
+either falls out of the 28-day window or is followed by a 28+ day break.
+"""
+import math
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+MAX_MONOTONY = 10.0
+LOOKBACK_DAYS = 2 * CHRONIC_DAYS
+PLAYER_LOAD_FEATURES = ["acute_distance_km", "acwr_distance", "acwr_load", "monotony", "strain"]
+NEUTRAL_LOAD_FEATURES = (0.0, 1.0, 1.0, 0.0, 0.0)
+
+SNAPSHOT_VERSION = 2
+_EPS = 1e-9
+
+# Columns of the per-player running sums
+_ACUTE_DISTANCE, _CHRONIC_DISTANCE, _ACUTE_LOAD, _CHRONIC_LOAD, _ACUTE_LOAD_SQ = range(5)
+
+
+def session_day(timestamp) -> int:
+    """Calendar day (proleptic ordinal) of a session timestamp."""
+    if isinstance(timestamp, (datetime, date)):
+        return timestamp.toordinal()
+    return datetime.fromtimestamp(float(timestamp)).toordinal()
+
+
+def session_load(distance_km: float, rpe: Optional[float]) -> float:
+    """Internal load of one session (RPE x distance_km; missing RPE counts as 5)."""
+    return float(rpe if rpe is not None else 5.0) * float(distance_km or 0.0)
+
+
+def _advance(distances: np.ndarray, loads: np.ndarray, sums: np.ndarray, last: int, day: int):
+    """Move one player's windows from ``last`` to the later ``day``."""
+    gap = day - last
+    if gap >= CHRONIC_DAYS:
+        distances[:] = 0.0
+        loads[:] = 0.0
+        sums[:] = 0.0
+        return
+    if gap >= ACUTE_DAYS:
+        sums[_ACUTE_DISTANCE] = sums[_ACUTE_LOAD] = sums[_ACUTE_LOAD_SQ] = 0.0
+    else:
+        for old in range(last - ACUTE_DAYS + 1, day - ACUTE_DAYS + 1):
+            i = old % CHRONIC_DAYS
+            sums[_ACUTE_DISTANCE] -= distances[i]
+            sums[_ACUTE_LOAD] -= loads[i]
+            sums[_ACUTE_LOAD_SQ] -= loads[i] * loads[i]
+    # The bin of each new day still holds day - 28, which leaves the chronic window
+    for new in range(last + 1, day + 1):
+        i = new % CHRONIC_DAYS
+        sums[_CHRONIC_DISTANCE] -= distances[i]
+        sums[_CHRONIC_LOAD] -= loads[i]
+        distances[i] = 0.0
+        loads[i] = 0.0
+
+
+def _add(distances: np.ndarray, loads: np.ndarray, sums: np.ndarray, last: int, day: int,
+         distance: float, load: float):
+    """Add one session on ``day`` (``last - CHRONIC_DAYS < day <= last``)."""
+    i = day % CHRONIC_DAYS
+    old = loads[i]
+    new = old + load
+    distances[i] += distance
+    loads[i] = new
+    sums[_CHRONIC_DISTANCE] += distance
+    sums[_CHRONIC_LOAD] += load
+    if day > last - ACUTE_DAYS:
+        sums[_ACUTE_DISTANCE] += distance
+        sums[_ACUTE_LOAD] += load
+        sums[_ACUTE_LOAD_SQ] += new * new - old * old
+
+
+def _features(sums: np.ndarray, first: int, last: int) -> List[float]:
+    span = last - first + 1
+    acute_days = min(ACUTE_DAYS, span)
+    chronic_days = min(CHRONIC_DAYS, span)
+    acute_distance, chronic_distance, acute_load, chronic_load, acute_sq = (max(float(v), 0.0) for v in sums)
+
+    def ratio(acute: float, chronic: float) -> float:
+        chronic_mean = chronic / chronic_days
+        return (acute / acute_days) / chronic_mean if chronic_mean > _EPS else 1.0
+
+    mean = acute_load / acute_days
+    if mean <= _EPS:
+        monotony = 0.0
+    elif acute_days < 2:
+        monotony = 1.0
+    else:
+        std = math.sqrt(max(acute_sq / acute_days - mean * mean, 0.0))
+        monotony = min(mean / std, MAX_MONOTONY) if std > _EPS else MAX_MONOTONY
+
+    return [
+        acute_distance,
+        ratio(acute_distance, chronic_distance),
+        ratio(acute_load, chronic_load),
+        monotony,
+        acute_load * monotony,
+    ]
+
+
+class PlayerLoadStore:
+    """Rolling 7/28-day workload windows for every player, updated in O(1) per session."""
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(int(capacity), 1)
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._distance = np.zeros((capacity, CHRONIC_DAYS), dtype=np.float64)
+        self._load = np.zeros((capacity, CHRONIC_DAYS), dtype=np.float64)
+        self._sums = np.zeros((capacity, 5), dtype=np.float64)
+        self._first_day = np.zeros(capacity, dtype=np.int64)
+        self._last_day = np.zeros(capacity, dtype=np.int64)
+        self._lock = threading.Lock()
+
+        # Highest TrainingSessions.Id already observed (set by the caller that feeds the store)
+        self.last_session_id = 0
+        # First day the caller fed sessions from (0 = complete history)
+        self.history_start = 0
+        self.observed = 0
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, player: str) -> bool:
+        return player in self._index
+
+    @property
+    def capacity(self) -> int:
+        return self._sums.shape[0]
+
+    def _reserve(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        size = len(self._names)
+        for name in ("_distance", "_load", "_sums", "_first_day", "_last_day"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:size] = old[:size]
+            setattr(self, name, grown)
+
+    def _slot(self, player: str, day: int) -> int:
+        slot = self._index.get(player)
+        if slot is None:
+            slot = len(self._names)
+            self._reserve(slot + 1)
+            self._index[player] = slot
+            self._names.append(player)
+            self._first_day[slot] = day
+            self._last_day[slot] = day
+        return slot
+
+    def observe(self, player: str, timestamp, distance_km: float, rpe: Optional[float]) -> bool:
+        """Add one session; False if it is older than the chronic window."""
+        day = session_day(timestamp)
+        distance = float(distance_km or 0.0)
+        load = session_load(distance, rpe)
+        with self._lock:
+            slot = self._slot(player, day)
+            distances, loads, sums = self._distance[slot], self._load[slot], self._sums[slot]
+            last = int(self._last_day[slot])
+            if day > last:
+                _advance(distances, loads, sums, last, day)
+                if day - last >= CHRONIC_DAYS:
+                    self._first_day[slot] = day
+                self._last_day[slot] = last = day
+            elif day <= last - CHRONIC_DAYS:
+                self.stale += 1
+                return False
+            _add(distances, loads, sums, last, day, distance, load)
+            if day < self._first_day[slot]:
+                self._first_day[slot] = day
+            self.observed += 1
+            return True
+
+    def observe_features(self, player: str, timestamp, distance_km: float,
+                         rpe: Optional[float]) -> Optional[List[float]]:
+        """Add one session and return the aggregates right after it.
+
+        None if the session was not stored, is older than the player's latest
+        day, or the store does not hold the ``LOOKBACK_DAYS`` before it (the
+        aggregates would then not be the ones as of its own day).
+        """
+        if not self.observe(player, timestamp, distance_km, rpe):
+            return None
+        day = session_day(timestamp)
+        if day - LOOKBACK_DAYS + 1 < self.history_start:
+            return None
+        with self._lock:
+            slot = self._index[player]
+            if day != self._last_day[slot]:
+                return None
+            return _features(self._sums[slot], int(self._first_day[slot]), int(self._last_day[slot]))
+
+    def features(self, player: str) -> List[float]:
+        """Aggregates as of the player's latest session day."""
+        with self._lock:
+            slot = self._index.get(player)
+            if slot is None:
+                return list(NEUTRAL_LOAD_FEATURES)
+            return _features(self._sums[slot], int(self._first_day[slot]), int(self._last_day[slot]))
+
+    def preview(self, player: str, timestamp, distance_km: float, rpe: Optional[float]) -> List[float]:
+        """Aggregates including one more session, without storing it."""
+        day = session_day(timestamp)
+        distance = float(distance_km or 0.0)
+        load = session_load(distance, rpe)
+        with self._lock:
+            slot = self._index.get(player)
+            if slot is None:
+                distances = np.zeros(CHRONIC_DAYS)
+                loads = np.zeros(CHRONIC_DAYS)
+                sums = np.zeros(5)
+                first = last = day
+            else:
+                distances = self._distance[slot].copy()
+                loads = self._load[slot].copy()
+                sums = self._sums[slot].copy()
+                first, last = int(self._first_day[slot]), int(self._last_day[slot])
+        if day > last:
+            _advance(distances, loads, sums, last, day)
+            if day - last >= CHRONIC_DAYS:
+                first = day
+            last = day
+        elif day <= last - CHRONIC_DAYS:
+            return _features(sums, first, last)
+        _add(distances, loads, sums, last, day, distance, load)
+        return _features(sums, min(first, day), last)
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        """Write an .npz snapshot atomically (temp file + rename)."""
+        with self._lock:
+            n = len(self._names)
+            arrays = {
+                "meta": np.array([SNAPSHOT_VERSION, ACUTE_DAYS, CHRONIC_DAYS, self.last_session_id,
+                                  self.history_start], dtype=np.int64),
+                "names": np.array(self._names, dtype=str),
+                "distance": self._distance[:n].copy(),
+                "load": self._load[:n].copy(),
+                "sums": self._sums[:n].copy(),
+                "first_day": self._first_day[:n].copy(),
+                "last_day": self._last_day[:n].copy(),
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.savez(handle, **arrays)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "PlayerLoadStore":
+        """Read a snapshot; raises ValueError if it was written with different windows."""
+        with np.load(path, allow_pickle=False) as data:
+            version, acute_days, chronic_days, *counters = (int(v) for v in data["meta"])
+            if version != SNAPSHOT_VERSION or (acute_days, chronic_days) != (ACUTE_DAYS, CHRONIC_DAYS):
+                raise ValueError(f"{path}: snapshot v{version} with {acute_days}/{chronic_days}-day windows")
+            last_session_id, history_start = counters
+            names = [str(name) for name in data["names"]]
+            store = cls(capacity=max(len(names), 64))
+            n = len(names)
+            store._names = names
+            store._index = {name: i for i, name in enumerate(names)}
+            store._distance[:n] = data["distance"]
+            store._load[:n] = data["load"]
+            store._sums[:n] = data["sums"]
+            store._first_day[:n] = data["first_day"]
+            store._last_day[:n] = data["last_day"]
+        store.last_session_id = last_session_id
+        store.history_start = history_start
+        return store
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._distance.nbytes + self._load.nbytes + self._sums.nbytes
+                   + self._first_day.nbytes + self._last_day.nbytes)
+
+    def get_status(self) -> dict:
+        return {
+            "players": len(self._names),
+            "observed": self.observed,
+            "stale": self.stale,
+            "last_session_id": self.last_session_id,
+            "bytes": self.nbytes,
+        }
+
+
+def player_load_as_of(sessions: Sequence[tuple], timestamp) -> List[float]:
+    """``PLAYER_LOAD_FEATURES`` as of ``timestamp``'s day from one player's sessions.
+
+    ``sessions`` are ``(timestamp, distance_km, rpe)`` in Id order, cover at
+    least the ``LOOKBACK_DAYS`` up to that day and should include the session
+    being described. Sessions after that day are skipped and the rest are
+    replayed in date order, exactly like ``player_load_feature_frame`` does
+    for the training CSV.
+    """
+    day = session_day(timestamp)
+    days = [session_day(ts) for ts, _, _ in sessions]
+    store = PlayerLoadStore(capacity=1)
+    for i in sorted(range(len(sessions)), key=days.__getitem__):
+        if day - LOOKBACK_DAYS < days[i] <= day:
+            ts, distance_km, rpe = sessions[i]
+            store.observe("", ts, distance_km, rpe)
+    return store.features("")
+
+
+def player_load_feature_frame(frame: pd.DataFrame) -> np.ndarray:
+    """``PLAYER_LOAD_FEATURES`` for every row of a CSV feature frame.
+
+    Rows are replayed in date order (stable, so same-day sessions keep their
+    CSV order) through a fresh ``PlayerLoadStore``; each row gets the
+    aggregates right after its own session, as in live scoring. Rows without
+    a player or date get ``NEUTRAL_LOAD_FEATURES``.
+    """
+    X = np.tile(np.asarray(NEUTRAL_LOAD_FEATURES, dtype=float), (len(frame), 1))
+    if "player_name" not in frame.columns or "session_date" not in frame.columns:
+        return X
+    store = PlayerLoadStore()
+    dates = pd.to_datetime(frame["session_date"], errors="coerce")
+    players = frame["player_name"].to_numpy()
+    distance = frame["distance_km"].to_numpy(dtype=float)
+    rpe = frame["rpe"].to_numpy(dtype=float)
+    for i in np.argsort(dates.to_numpy(), kind="stable"):
+        timestamp = dates.iat[i]
+        player = players[i]
+        if pd.isna(timestamp) or not isinstance(player, str) or not player:
+            continue
+        if store.observe(player, timestamp.to_pydatetime(), distance[i], rpe[i]):
+            X[i] = store.features(player)
+    return X
+
@@ -0,0 +1,154 @@
+"""Retention policy for the classifiers' feedback history.
+
+The history (``FatigueClassifier.training_history``,
+``RiskClassifier.feedback_examples``) is re-encoded on every retrain, so it
+must not grow for the lifetime of the process. ``RetentionManager`` bounds a
+``FeatureStore`` by:
+
+- age: rows older than ``max_age_days`` (by stored timestamp) are dropped;
+- size: at most ``max_size`` rows, chosen by ``strategy``:
+    * ``fifo``       - keep the newest rows;
+    * ``reservoir``  - uniform sample of everything ever offered (Algorithm R);
+    * ``stratified`` - equal quota per risk level, newest first within a level,
+                       unused quota goes to the newest remaining rows.
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from infrastructure.ml.feature_store import FeatureStore
+
+RETENTION_STRATEGIES = ("fifo", "reservoir", "stratified")
+
+
+@dataclass
+class RetentionPolicy:
+    max_size: Optional[int] = 5000
+    max_age_days: Optional[float] = None
+    strategy: str = "fifo"
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.strategy not in RETENTION_STRATEGIES:
+            raise ValueError(f"Unknown retention strategy {self.strategy!r}, expected one of {RETENTION_STRATEGIES}")
+        if self.max_size is not None and self.max_size < 1:
+            raise ValueError("max_size must be >= 1 (or None for unbounded)")
+
+
+def fatigue_risk_labels(scores: np.ndarray) -> np.ndarray:
+    """Fatigue score -> risk level index (0=LOW .. 3=CRITICAL), same thresholds as RiskClassifier."""
+    return np.digitize(np.asarray(scores, dtype=float), [40.0, 60.0, 80.0])
+
+
+class RetentionManager:
+    """Applies a RetentionPolicy to a FeatureStore and keeps eviction counters."""
+
+    def __init__(self, policy: Optional[RetentionPolicy] = None):
+        self.policy = policy or RetentionPolicy()
+        self._rng = np.random.default_rng(self.policy.seed)
+        self.seen = 0
+        self.evicted_by_age = 0
+        self.evicted_by_size = 0
+        self.rejected = 0
+        self.last_eviction_at: Optional[float] = None
+
+    def offer(self, store: FeatureStore, x, y: float, timestamp: Optional[float] = None) -> bool:
+        """Add a row subject to the policy. Returns False if reservoir sampling dropped it."""
+        self.seen += 1
+        max_size = self.policy.max_size
+        if self.policy.strategy == "reservoir" and max_size is not None and len(store) >= max_size:
+            slot = int(self._rng.integers(0, self.seen))
+            if slot >= max_size:
+                self.rejected += 1
+                return False
+            store.replace(slot, x, y, timestamp)
+            self.evicted_by_size += 1
+            self.last_eviction_at = time.time()
+            return True
+        store.append(x, y, timestamp)
+        return True
+
+    def enforce(self, store: FeatureStore, labels: Optional[np.ndarray] = None,
+                now: Optional[float] = None) -> int:
+        """Drop expired / excess rows in place. Returns the number of evicted rows."""
+        n = len(store)
+        if n == 0:
+            return 0
+        keep = np.ones(n, dtype=bool)
+
+        timestamps = store.timestamps
+        if self.policy.max_age_days is not None and timestamps is not None:
+            cutoff = (now if now is not None else time.time()) - self.policy.max_age_days * 86400.0
+            keep &= timestamps >= cutoff
+            self.evicted_by_age += int(n - keep.sum())
+
+        max_size = self.policy.max_size
+        if max_size is not None and keep.sum() > max_size:
+            candidates = np.flatnonzero(keep)
+            chosen = self._select(candidates, store, labels, max_size)
+            self.evicted_by_size += len(candidates) - len(chosen)
+            keep[:] = False
+            keep[chosen] = True
+
+        evicted = int(n - keep.sum())
+        if evicted:
+            store.keep(np.flatnonzero(keep))
+            self.last_eviction_at = time.time()
+        return evicted
+
+    def _select(self, candidates: np.ndarray, store: FeatureStore,
+                labels: Optional[np.ndarray], max_size: int) -> np.ndarray:
+        # Newest first: by timestamp when stored, otherwise by insertion order
+        timestamps = store.timestamps
+        if timestamps is not None:
+            newest_first = candidates[np.argsort(-timestamps[candidates], kind="stable")]
+        else:
+            newest_first = candidates[::-1]
+
+        if self.policy.strategy == "reservoir":
+            return np.sort(self._rng.choice(candidates, size=max_size, replace=False))
+        if self.policy.strategy == "stratified" and labels is not None:
+            cand_labels = np.asarray(labels)[newest_first]
+            classes = np.unique(cand_labels)
+            quota = max_size // len(classes)
+            chosen = [newest_first[cand_labels == c][:quota] for c in classes]
+            picked = np.concatenate(chosen)
+            if len(picked) < max_size:
+                rest = newest_first[~np.isin(newest_first, picked)]
+                picked = np.concatenate([picked, rest[:max_size - len(picked)]])
+            return np.sort(picked)
+        return np.sort(newest_first[:max_size])
+
+    def state(self) -> dict:
+        """Counters persisted next to the retained window."""
+        return {
+            "seen": self.seen,
+            "evicted_by_age": self.evicted_by_age,
+            "evicted_by_size": self.evicted_by_size,
+            "rejected": self.rejected,
+        }
+
+    def restore(self, state: dict):
+        for key in ("seen", "evicted_by_age", "evicted_by_size", "rejected"):
+            if key in state:
+                setattr(self, key, int(state[key]))
+
+    def get_stats(self, store: Optional[FeatureStore] = None) -> dict:
+        stats = {
+            "strategy": self.policy.strategy,
+            "max_size": self.policy.max_size,
+            "max_age_days": self.policy.max_age_days,
+            "seen": self.seen,
+            "evicted_by_age": self.evicted_by_age,
+            "evicted_by_size": self.evicted_by_size,
+            "rejected": self.rejected,
+            "last_eviction_at": self.last_eviction_at,
+        }
+        if store is not None:
+            stats["retained"] = len(store)
+            timestamps = store.timestamps
+            if timestamps is not None and len(store):
+                stats["oldest_age_days"] = float((time.time() - timestamps.min()) / 86400.0)
+        return stats
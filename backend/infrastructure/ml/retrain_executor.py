@@ -0,0 +1,158 @@
+"""Run CPU-bound model fitting in worker processes instead of the API process.
+
+The training matrices are pickled to a worker, the worker fits the model and
+returns a serialized bundle (``bytes``); the caller deserializes it and swaps it
+into the live classifier with ``install_*``. Fitting therefore never holds the
+GIL of the process that serves HTTP requests and runs the scoring loop, and the
+fatigue, injury and risk models can fit concurrently.
+"""
+import copy
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from infrastructure.ml.model_io import dumps_bundle, loads_bundle
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Worker-side jobs (top-level so they can be pickled by reference)
+# ---------------------------------------------------------------------------
+
+def fit_fatigue_job(model, X_encoded: np.ndarray, y: np.ndarray, scaler=None) -> bytes:
+    from infrastructure.ml.classifier import fit_fatigue_regressor
+    started = time.perf_counter()
+    fitted = fit_fatigue_regressor(model, X_encoded, y, scaler)
+    return dumps_bundle({"model": fitted, "X_encoded": X_encoded, "y": y,
+                         "fit_seconds": time.perf_counter() - started})
+
+
+def fit_fatigue_csv_job(X_encoded: np.ndarray, y: np.ndarray) -> bytes:
+    from infrastructure.ml.classifier import fit_fatigue_csv_model
+    started = time.perf_counter()
+    model, scaler, metrics = fit_fatigue_csv_model(X_encoded, y)
+    return dumps_bundle({"model": model, "scaler": scaler, "metrics": metrics,
+                         "X_encoded": X_encoded, "y": y,
+                         "fit_seconds": time.perf_counter() - started})
+
+
+def fit_injury_job(X: pd.DataFrame, y: pd.Series) -> bytes:
+    from infrastructure.ml.classifier import fit_injury_pipeline
+    started = time.perf_counter()
+    pipeline, metrics = fit_injury_pipeline(X, y)
+    return dumps_bundle({"pipeline": pipeline, "feature_columns": list(X.columns), "metrics": metrics,
+                         "fit_seconds": time.perf_counter() - started})
+
+
+def fit_risk_job(X: pd.DataFrame, y: pd.Series) -> bytes:
+    from infrastructure.ml.risk_classifier import fit_risk_pipeline
+    started = time.perf_counter()
+    pipeline, metrics = fit_risk_pipeline(X, y)
+    return dumps_bundle({"pipeline": pipeline, "feature_columns": list(X.columns), "metrics": metrics,
+                         "fit_seconds": time.perf_counter() - started})
+
+
+JOBS: Dict[str, Callable[..., bytes]] = {
+    "fatigue": fit_fatigue_job,
+    "fatigue_csv": fit_fatigue_csv_job,
+    "injury": fit_injury_job,
+    "risk": fit_risk_job,
+}
+
+
+# ---------------------------------------------------------------------------
+# Executor
+# ---------------------------------------------------------------------------
+
+class RetrainExecutor:
+    """Process pool for model fitting (one worker per model type by default).
+
+    Workers are started with the ``spawn`` method by default so a fork never
+    copies the web server's threads and locks; single-threaded CLI scripts can
+    pass ``start_method="fork"`` to skip the interpreter start-up cost. If the
+    pool cannot be used the job runs inline, which is what the old code did.
+    """
+
+    def __init__(self, max_workers: int = 3, inline: bool = False, start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.inline = inline
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.jobs_submitted = 0
+        self.jobs_inline = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+        return self._pool
+
+    def submit(self, kind: str, *args) -> Future:
+        """Pošalji fit posao (ključ iz JOBS) u worker proces."""
+        self.jobs_submitted += 1
+        if not self.inline:
+            try:
+                return self._get_pool().submit(JOBS[kind], *args)
+            except (BrokenProcessPool, RuntimeError, OSError) as e:
+                logger.warning("⚠️ Retrain pool unavailable (%s) - fitting inline", e)
+                self.discard_pool()
+
+        future: Future = Future()
+        try:
+            future.set_result(self.run_inline(kind, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run_inline(self, kind: str, *args) -> bytes:
+        """Isti posao, ali u pozivajućem procesu (fallback kad pool ne radi).
+
+        Radi nad kopijama argumenata da se živi model ne mijenja dok se trenira.
+        """
+        self.jobs_inline += 1
+        return JOBS[kind](*copy.deepcopy(args))
+
+    def submit_fatigue(self, model, X_encoded: np.ndarray, y: np.ndarray, scaler=None) -> Future:
+        return self.submit("fatigue", model, X_encoded, y, scaler)
+
+    def submit_injury(self, X: pd.DataFrame, y: pd.Series) -> Future:
+        return self.submit("injury", X, y)
+
+    def submit_risk(self, X: pd.DataFrame, y: pd.Series) -> Future:
+        return self.submit("risk", X, y)
+
+    def discard_pool(self):
+        """Odbaci (npr. pokvaren) pool; sljedeći submit pokreće novi."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def load_bundle(payload: bytes) -> Dict[str, Any]:
+        return loads_bundle(payload)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "inline": self.inline,
+            "start_method": self.start_method,
+            "pool_started": self._pool is not None,
+            "jobs_submitted": self.jobs_submitted,
+            "jobs_inline": self.jobs_inline,
+        }
+
+    def shutdown(self, wait: bool = True):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -1,4 +1,6 @@
+import logging
 import os
+import threading
 import joblib
 import pandas as pd
 import numpy as np
@@ -9,15 +11,99 @@ from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, balanced_accuracy_score, f1_score
 from domain.entities import RiskLevel
-from infrastructure.database import get_connection
+from infrastructure.ml.training_data import (
+    read_risk_training_arrays,
+    load_csv_feature_frame,
+    risk_training_set,
+    DEFAULT_CHUNK_SIZE,
+)
 from infrastructure.ml.preprocessing import distance_to_km
 from infrastructure.ml.metrics_store import save_metrics, load_metrics
+from infrastructure.ml.model_io import atomic_dump, model_fingerprint
+from infrastructure.ml.lookup_table import LogitLookupTable
+from infrastructure.ml.feature_store import FeatureStore
+from infrastructure.ml.retention import RetentionManager, RetentionPolicy
+from infrastructure.ml.learning_state import LearningStateFile
+
+logger = logging.getLogger(__name__)
+
+
+def fit_risk_pipeline(X: pd.DataFrame, y: pd.Series) -> Tuple[Pipeline, Dict[str, Any]]:
+    """Fit the scaler + multinomial LR pipeline and evaluate it on a held-out split.
+
+    Pure function (no classifier state, no I/O) so it can run in a worker process.
+    """
+    X_clean = X.fillna(X.median()).astype(float)
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_clean,
+            y,
+            test_size=0.2,
+            random_state=42,
+            stratify=y if y.nunique() > 1 else None,
+        )
+    except ValueError:
+        X_train, X_test, y_train, y_test = X_clean, X_clean, y, y
+
+    # Optionally apply SMOTE if training data is highly imbalanced
+    smote_applied = False
+    try:
+        counts = y_train.value_counts()
+        if counts.max() / max(counts.min(), 1) > 3.0:
+            try:
+                from imblearn.over_sampling import SMOTE
+                sm = SMOTE(random_state=42)
+                X_res, y_res = sm.fit_resample(X_train, y_train)
+                X_train, y_train = X_res, y_res
+                smote_applied = True
+                logger.info("⚡ Applied SMOTE to balance risk training data")
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+    pipeline = Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", LogisticRegression(max_iter=2000, solver="lbfgs", class_weight="balanced")),
+    ])
+    pipeline.fit(X_train, y_train)
+
+    if len(X_test) > 0:
+        preds = pipeline.predict(X_test)
+        acc = float(accuracy_score(y_test, preds))
+        balanced_acc = float(balanced_accuracy_score(y_test, preds))
+        macro_f1 = float(f1_score(y_test, preds, average="macro", zero_division=0))
+    else:
+        acc = 1.0
+        balanced_acc = 1.0
+        macro_f1 = 1.0
+
+    metrics = {
+        "accuracy": acc,
+        "balanced_accuracy": balanced_acc,
+        "macro_f1": macro_f1,
+        "train_size": int(len(y_train)),
+        "test_size": int(len(y_test)),
+        "smote_applied": smote_applied,
+    }
+    return pipeline, metrics
 
 
 class RiskClassifier:
-    """Logistic regression (multinomial) for LOW/MEDIUM/HIGH/CRITICAL risk levels."""
+    """Logistic regression (multinomial) for LOW/MEDIUM/HIGH/CRITICAL risk levels.
+
+    Construction only loads an existing bundle; use ``RiskClassifier.load()``,
+    ``RiskClassifier.empty()`` and ``train()`` to control when fitting happens.
+    ``auto_train=True`` keeps the old train-on-construct behaviour.
 
-    def __init__(self, model_file: str = "risk_model.joblib", auto_train: bool = True):
+    ``lookup_table=True`` enables the compiled mode: predictions come from a
+    precomputed logit table (see ``infrastructure.ml.lookup_table``) that is
+    rebuilt whenever a new pipeline is loaded or trained.
+    """
+
+    def __init__(self, model_file: str = "risk_model.joblib", auto_train: bool = False,
+                 db_chunk_size: int = DEFAULT_CHUNK_SIZE, load: bool = True,
+                 lookup_table: bool = False, retention: Optional[RetentionPolicy] = None):
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
         self.model_file = os.path.join(base_dir, model_file) if not os.path.isabs(model_file) else model_file
         self.model: Optional[Pipeline] = None
@@ -30,15 +116,79 @@ class RiskClassifier:
         ]
         self.risk_metrics: Dict[str, Any] = {}
         self.trained_columns: Optional[list] = None
-        self.feedback_examples: List[Tuple[List[float], int]] = []
-        self._load_or_create()
+        # Feedback examples: [sleep, stress, distance_km, soreness, rpe] -> risk label (0-3),
+        # persisted next to the model and read lazily on first access
+        self.retention = RetentionManager(retention)
+        self._feedback_state = LearningStateFile(
+            os.path.splitext(self.model_file)[0] + ".feedback.bin", len(self.feature_cols), with_timestamps=True
+        )
+        self._feedback_examples: Optional[FeatureStore] = None if load else self._empty_feedback()
+        self.db_chunk_size = db_chunk_size
+        self._lock = threading.RLock()
+        self._version: Optional[str] = None
+        self.last_db_read: Dict[str, Any] = {}
+        self.use_lookup_table = lookup_table
+        self.lookup_table: Optional[LogitLookupTable] = None
+        self.lookup_drift: Dict[str, Any] = {}
+        if load:
+            self._load_or_create()
 
         if self.model is None and auto_train:
-            trained_from_db = self.train_from_db()
-            if not trained_from_db:
-                self.train_from_csv()
+            self.train()
+
+    @classmethod
+    def load(cls, model_file: str = "risk_model.joblib", **kwargs) -> "RiskClassifier":
+        """Load a trained bundle from disk; never trains."""
+        classifier = cls(model_file=model_file, **kwargs)
+        if classifier.model is None:
+            raise FileNotFoundError(f"Risk model not found or unusable: {classifier.model_file}")
+        return classifier
+
+    @classmethod
+    def empty(cls, model_file: str = "risk_model.joblib", **kwargs) -> "RiskClassifier":
+        """Classifier with nothing loaded, for callers that train right away."""
+        return cls(model_file=model_file, load=False, **kwargs)
+
+    def reload_from_disk(self) -> str:
+        """Swap in the bundle another process wrote (cluster mode: only the retrain leader fits).
+
+        The feedback window is re-read lazily. Returns the new model version.
+        """
+        fresh = RiskClassifier(model_file=self.model_file, db_chunk_size=self.db_chunk_size,
+                               lookup_table=self.use_lookup_table)
+        if fresh.model is None:
+            raise FileNotFoundError(f"Risk model not found or unusable: {self.model_file}")
+        with self._lock:
+            self._version = None
+            self.model = fresh.model
+            self.trained_columns = fresh.trained_columns
+            self.risk_metrics = fresh.risk_metrics
+            self.lookup_table = fresh.lookup_table
+            self.lookup_drift = fresh.lookup_drift
+            self._feedback_examples = None
+        return self.model_version()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.model is not None
+
+    def model_version(self) -> str:
+        """Content hash of the current pipeline (changes on every retrain/reload)."""
+        with self._lock:
+            if self._version is None:
+                self._version = model_fingerprint(self.model, self.trained_columns)
+            return self._version
+
+    def train(self, csv_path: Optional[str] = None) -> "RiskClassifier":
+        """Explicit training: processed DB sessions first, CSV as fallback (or ``csv_path`` only)."""
+        if csv_path is not None:
+            self.train_from_csv(csv_path)
+        elif not self.train_from_db():
+            self.train_from_csv()
+        return self
 
     def _load_or_create(self):
+        self._version = None
         if os.path.exists(self.model_file):
             try:
                 bundle = joblib.load(self.model_file)
@@ -46,178 +196,145 @@ class RiskClassifier:
                     self.model = bundle["pipeline"]
                     self.trained_columns = bundle.get("feature_columns", self.feature_cols)
                     self.risk_metrics = bundle.get("metrics", {})
+                    self._rebuild_lookup_table()
                 else:
                     self.model = None
-                    print("[WARN] Old risk model format - will retrain")
+                    logger.warning("[WARN] Old risk model format - will retrain")
                     return
-                print(f"[OK] Risk model loaded from {self.model_file}")
+                logger.info(f"[OK] Risk model loaded from {self.model_file}")
             except Exception as e:
-                print(f"[WARN] Failed to load risk model: {e}")
+                logger.warning(f"[WARN] Failed to load risk model: {e}")
                 self.model = None
         else:
             self.model = None
 
+    def set_lookup_table(self, enabled: bool):
+        """Switch the compiled (lookup table) mode on or off at runtime."""
+        with self._lock:
+            self.use_lookup_table = enabled
+            self._rebuild_lookup_table()
+
+    def _rebuild_lookup_table(self):
+        """Regenerate the table for the current pipeline and measure drift vs. the exact model."""
+        with self._lock:
+            self.lookup_table = None
+            self.lookup_drift = {}
+            if not self.use_lookup_table or self.model is None:
+                return
+            columns = self.trained_columns if self.trained_columns is not None else self.feature_cols
+            try:
+                table = LogitLookupTable(self.model, columns)
+                self.lookup_drift = table.drift_report(self.model, columns).to_dict()
+                self.lookup_table = table
+            except Exception as e:
+                logger.warning(f"⚠️ Risk lookup table unavailable, using exact model: {e}")
+                return
+        drift = self.lookup_drift
+        logger.info(f"📋 Risk lookup table: {drift['table_bytes'] // 1024} KB in {drift['build_ms']:.0f}ms, "
+                    f"class agreement={drift['class_agreement']:.4f}, "
+                    f"max |Δp|={drift['max_abs_proba_diff']:.2e}")
+
     def train_from_csv(self, csv_path: str = "data/Workout_Routine_Dirty.csv") -> bool:
         if not os.path.isabs(csv_path):
             csv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", csv_path))
         if not os.path.exists(csv_path):
-            print(f"⚠️ CSV not found: {csv_path}")
+            logger.warning(f"⚠️ CSV not found: {csv_path}")
             return False
 
-        df = pd.read_csv(csv_path)
-
-        if "RiskLevel" in df.columns:
-            y_raw = df["RiskLevel"].astype(str).str.lower()
-            mapping = {"low": 0, "medium": 1, "high": 2, "critical": 3}
-            y = y_raw.map(mapping).fillna(0).astype(int)
-        elif "Fatigue" in df.columns or "FatigueScore" in df.columns or "ProxyFatigue" in df.columns:
-            if "Fatigue" in df.columns:
-                col = "Fatigue"
-            elif "FatigueScore" in df.columns:
-                col = "FatigueScore"
-            else:
-                col = "ProxyFatigue"
-            fatigue = pd.to_numeric(df[col], errors="coerce").fillna(0)
-            y = pd.cut(fatigue, bins=[-1, 40, 60, 80, 100], labels=[0, 1, 2, 3]).astype(int)
-        else:
-            print("⚠️ CSV missing RiskLevel or Fatigue columns - cannot create labels")
+        frame = load_csv_feature_frame(csv_path)
+        if not frame.attrs.get("risk_from_labels") and frame.attrs.get("fatigue_is_proxy"):
+            logger.warning("⚠️ CSV missing RiskLevel or Fatigue columns - cannot create labels")
             return False
+        return self.train_from_frame(frame)
 
-        if "Sleep_Duration" not in df.columns:
-            print("⚠️ No available feature columns for risk training")
-            return False
-
-        X = pd.DataFrame({
-            "Sleep_Duration": pd.to_numeric(df["Sleep_Duration"], errors="coerce").fillna(7),
-            "Stress": pd.to_numeric(df["Stress"], errors="coerce").fillna(5),
-            "Distance_km": df["Distance"].apply(distance_to_km) if "Distance" in df.columns else 5.0,
-            "Soreness": pd.to_numeric(df["Soreness"], errors="coerce").fillna(5),
-            "RPE": pd.to_numeric(df["RPE"], errors="coerce").fillna(5),
-        })
+    def train_from_frame(self, frame: pd.DataFrame) -> bool:
+        """Train from a feature frame already parsed by training_data.load_csv_feature_frame."""
+        X, y = risk_training_set(frame)
         return self._train_model(X, y)
 
-    def train_from_db(self, min_examples: int = 16) -> bool:
+    def train_from_db(self, min_examples: int = 16, chunk_size: Optional[int] = None) -> bool:
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT SleepHours, StressLevel, DistanceKm, Soreness, RPE,
-                       RiskLevel, FatigueScore
-                FROM TrainingSessions
-                WHERE Status = 'processed'
-                  AND (RiskLevel IS NOT NULL OR FatigueScore IS NOT NULL)
-            """)
-            rows = cursor.fetchall()
-            conn.close()
+            X_arr, y_arr = self._read_db_examples(chunk_size)
         except Exception as e:
-            print(f"⚠️ RiskClassifier DB training unavailable: {e}")
+            logger.warning(f"⚠️ RiskClassifier DB training unavailable: {e}")
             return False
 
-        if not rows:
+        if len(y_arr) == 0:
             return False
 
-        X_rows = []
-        y_rows = []
-        for row in rows:
-            sleep, stress, distance, soreness, rpe, risk_raw, fatigue_score = row
-            soreness_val = float(soreness) if soreness is not None else 5.0
-            rpe_val = float(rpe) if rpe is not None else 5.0
-            label = self._parse_risk_label(risk_raw)
-            if label is None and fatigue_score is not None:
-                label = self._fatigue_score_to_risk(float(fatigue_score))
-            if label is None:
-                continue
-            X_rows.append([
-                float(sleep), float(stress), distance_to_km(distance), soreness_val, rpe_val
-            ])
-            y_rows.append(label)
-
-        if len(y_rows) < min_examples:
-            print(f"⚠️ Not enough DB risk examples ({len(y_rows)}) to train")
+        if len(y_arr) < min_examples:
+            logger.warning(f"⚠️ Not enough DB risk examples ({len(y_arr)}) to train")
             return False
 
-        X = pd.DataFrame(X_rows, columns=self.feature_cols)
-        y = pd.Series(y_rows, dtype=int)
+        X = pd.DataFrame(X_arr, columns=self.feature_cols, copy=False)
+        y = pd.Series(y_arr, dtype=int)
         return self._train_model(X, y)
 
+    def _read_db_examples(self, chunk_size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Stream processed sessions into typed arrays (fetchmany, no list-of-lists)."""
+        X_arr, y_arr, stats = read_risk_training_arrays(
+            self._db_row_label,
+            chunk_size=chunk_size or self.db_chunk_size,
+        )
+        self.last_db_read = stats.to_dict()
+        logger.info(f"📥 Risk DB read: {stats.summary()}")
+        return X_arr, y_arr
+
+    def _db_row_label(self, risk_raw, fatigue_score: Optional[float]) -> Optional[int]:
+        label = self._parse_risk_label(risk_raw)
+        if label is None and fatigue_score is not None:
+            label = self._fatigue_score_to_risk(fatigue_score)
+        return label
+
     def _train_model(self, X: pd.DataFrame, y: pd.Series) -> bool:
-        if X.empty or y.empty or len(y) < 4:
-            print("⚠️ Risk classifier training skipped due to insufficient data")
+        bundle = self.fit_bundle(X, y)
+        if bundle is None:
             return False
+        self.install_bundle(bundle)
+        return True
 
-        X_clean = X.fillna(X.median()).astype(float)
-        try:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_clean,
-                y,
-                test_size=0.2,
-                random_state=42,
-                stratify=y if y.nunique() > 1 else None,
-            )
-        except ValueError:
-            X_train, X_test, y_train, y_test = X_clean, X_clean, y, y
-
-        # Optionally apply SMOTE if training data is highly imbalanced
-        smote_applied = False
-        try:
-            counts = y_train.value_counts()
-            if counts.max() / max(counts.min(), 1) > 3.0:
-                try:
-                    from imblearn.over_sampling import SMOTE
-                    sm = SMOTE(random_state=42)
-                    X_res, y_res = sm.fit_resample(X_train, y_train)
-                    X_train, y_train = X_res, y_res
-                    smote_applied = True
-                    print("⚡ Applied SMOTE to balance risk training data")
-                except Exception:
-                    pass
-        except Exception:
-            pass
-
-        pipeline = Pipeline([
-            ("scaler", StandardScaler()),
-            ("clf", LogisticRegression(max_iter=2000, solver="lbfgs", class_weight="balanced")),
-        ])
-        pipeline.fit(X_train, y_train)
-
-        if len(X_test) > 0:
-            preds = pipeline.predict(X_test)
-            acc = float(accuracy_score(y_test, preds))
-            balanced_acc = float(balanced_accuracy_score(y_test, preds))
-            macro_f1 = float(f1_score(y_test, preds, average="macro", zero_division=0))
-        else:
-            acc = 1.0
-            balanced_acc = 1.0
-            macro_f1 = 1.0
-
-        self.model = pipeline
-        self.trained_columns = list(X.columns)
-        self.risk_metrics = {
-            "accuracy": acc,
-            "balanced_accuracy": balanced_acc,
-            "macro_f1": macro_f1,
-            "train_size": int(len(y_train)),
-            "test_size": int(len(y_test)),
-            "smote_applied": smote_applied,
+    def fit_bundle(self, X: pd.DataFrame, y: pd.Series) -> Optional[Dict[str, Any]]:
+        """Fit a bundle for install_bundle without touching the live model (None if too little data)."""
+        if X.empty or y.empty or len(y) < 4:
+            logger.warning("⚠️ Risk classifier training skipped due to insufficient data")
+            return None
+
+        pipeline, metrics = fit_risk_pipeline(X, y)
+        return {
+            "pipeline": pipeline,
+            "feature_columns": list(X.columns),
+            "metrics": metrics,
         }
+
+    def install_bundle(self, bundle: Dict[str, Any]):
+        """Atomically swap in a trained bundle (e.g. from a retrain worker) and persist it."""
+        with self._lock:
+            self._version = None
+            self.model = bundle["pipeline"]
+            self.trained_columns = list(bundle.get("feature_columns", self.feature_cols))
+            self.risk_metrics = bundle.get("metrics", {})
+            self._rebuild_lookup_table()
         try:
-            joblib.dump({
-                "pipeline": pipeline,
+            atomic_dump({
+                "pipeline": self.model,
                 "feature_columns": self.trained_columns,
                 "metrics": self.risk_metrics,
             }, self.model_file)
         except Exception as e:
-            print(f"⚠️ Unable to save risk model: {e}")
+            logger.warning(f"⚠️ Unable to save risk model: {e}")
 
         all_metrics = load_metrics()
         all_metrics["risk_logistic_regression"] = self.risk_metrics
         save_metrics(all_metrics)
 
-        print(f"✅ Risk LR: accuracy={acc:.2f}, balanced_accuracy={balanced_acc:.2f}, macro-F1={macro_f1:.2f}, smote_applied={smote_applied}")
-        print(f"   Features used: {self.trained_columns}")
-        return True
+        metrics = self.risk_metrics
+        logger.info(f"✅ Risk LR: accuracy={metrics.get('accuracy', 0):.2f}, "
+                    f"balanced_accuracy={metrics.get('balanced_accuracy', 0):.2f}, "
+                    f"macro-F1={metrics.get('macro_f1', 0):.2f}, smote_applied={metrics.get('smote_applied')}")
+        logger.info(f"   Features used: {self.trained_columns}")
 
-    def add_feedback_example(self, features: List, user_label: str) -> bool:
+    def add_feedback_example(self, features: List, user_label: str, persist: bool = True) -> bool:
+        """Retain a feedback example; ``persist=False`` defers the file write to save_feedback."""
         risk_label = self._parse_risk_label(user_label)
         if risk_label is None:
             return False
@@ -231,49 +348,92 @@ class RiskClassifier:
         except Exception:
             return False
 
-        self.feedback_examples.append(([sleep, stress, distance, soreness, rpe], risk_label))
+        feedback = self.feedback_examples
+        before = len(feedback)
+        accepted = self.retention.offer(feedback, [sleep, stress, distance, soreness, rpe], risk_label)
+        evicted = self.retention.enforce(feedback, feedback.y)
+        if evicted:
+            logger.info(f"🧹 Risk feedback retention: evicted {evicted}, kept {len(feedback)}")
+        if not persist:
+            return True
+        try:
+            if evicted or (accepted and len(feedback) == before):
+                self._feedback_state.write(feedback, self.retention.state())
+            elif accepted:
+                self._feedback_state.append(feedback, before, self.retention.state())
+            else:
+                self._feedback_state.update_counters(self.retention.state())
+        except Exception as e:
+            logger.warning(f"⚠️ Unable to save risk feedback: {e}")
         return True
 
+    def save_feedback(self):
+        """Write the whole retained feedback window (after add_feedback_example(persist=False))."""
+        try:
+            self._feedback_state.write(self.feedback_examples, self.retention.state())
+        except Exception as e:
+            logger.warning(f"⚠️ Unable to save risk feedback: {e}")
+
+    def discard_unsaved_feedback(self):
+        """Drop unsaved feedback; the window and retention counters are re-read from disk."""
+        with self._lock:
+            self._feedback_examples = None
+
+    def _empty_feedback(self) -> FeatureStore:
+        return FeatureStore(len(self.feature_cols), with_timestamps=True)
+
+    @property
+    def feedback_examples(self) -> FeatureStore:
+        """Retained feedback window; loaded from disk on first access."""
+        if self._feedback_examples is None:
+            with self._lock:
+                if self._feedback_examples is None:
+                    self._feedback_examples = self._read_feedback()
+        return self._feedback_examples
+
+    def _read_feedback(self) -> FeatureStore:
+        if not self._feedback_state.exists():
+            return self._empty_feedback()
+        try:
+            store, counters = self._feedback_state.read()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load risk feedback: {e}")
+            return self._empty_feedback()
+        self.retention.restore(counters)
+        if self.retention.enforce(store, store.y):
+            self._feedback_state.write(store, self.retention.state())
+        return store
+
+    def get_learning_stats(self) -> Dict[str, Any]:
+        return {
+            "feedback_examples": len(self.feedback_examples),
+            "retention": self.retention.get_stats(self.feedback_examples),
+        }
+
     def retrain_on_feedback(self) -> bool:
-        if not self.feedback_examples:
+        training_set = self.build_retrain_frame()
+        if training_set is None:
             return False
+        X, y = training_set
+        return self._train_model(X, y)
+
+    def build_retrain_frame(self) -> Optional[Tuple[pd.DataFrame, pd.Series]]:
+        """Feedback examples plus processed DB sessions, ready for fit_risk_pipeline."""
+        if not self.feedback_examples:
+            return None
 
-        X_rows = [example[0] for example in self.feedback_examples]
-        y_rows = [example[1] for example in self.feedback_examples]
-        X = pd.DataFrame(X_rows, columns=self.feature_cols)
-        y = pd.Series(y_rows, dtype=int)
+        X_fb = self.feedback_examples.X.astype(np.float64)
+        y_fb = self.feedback_examples.y.astype(np.int8)
 
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT SleepHours, StressLevel, DistanceKm, Soreness, RPE, RiskLevel, FatigueScore
-                FROM TrainingSessions
-                WHERE Status = 'processed'
-                  AND (RiskLevel IS NOT NULL OR FatigueScore IS NOT NULL)
-            """)
-            rows = cursor.fetchall()
-            conn.close()
+            X_db, y_db = self._read_db_examples()
         except Exception:
-            rows = []
-
-        db_rows = []
-        db_y = []
-        for row in rows:
-            sleep, stress, distance, soreness, rpe, risk_raw, fatigue_score = row
-            label = self._parse_risk_label(risk_raw)
-            if label is None and fatigue_score is not None:
-                label = self._fatigue_score_to_risk(float(fatigue_score))
-            if label is None:
-                continue
-            db_rows.append([float(sleep), float(stress), float(distance), float(soreness) if soreness is not None else 5.0, float(rpe) if rpe is not None else 5.0])
-            db_y.append(label)
-
-        if db_rows:
-            X = pd.concat([X, pd.DataFrame(db_rows, columns=self.feature_cols)], ignore_index=True)
-            y = pd.concat([y, pd.Series(db_y, dtype=int)], ignore_index=True)
+            X_db = np.empty((0, len(self.feature_cols)), dtype=np.float64)
+            y_db = np.empty(0, dtype=np.int8)
 
-        return self._train_model(X, y)
+        X = pd.DataFrame(np.concatenate([X_fb, X_db]), columns=self.feature_cols, copy=False)
+        y = pd.Series(np.concatenate([y_fb, y_db]), dtype=int)
+        return X, y
 
     def _parse_risk_label(self, raw_label) -> Optional[int]:
         if raw_label is None:
@@ -324,12 +484,19 @@ class RiskClassifier:
         except Exception:
             return RiskLevel.LOW
 
-        X = np.array([[sleep, stress, distance, soreness, rpe]])
-        if self.model is not None:
+        with self._lock:
+            model = self.model
             columns = self.trained_columns if self.trained_columns is not None else self.feature_cols
+            table = self.lookup_table
+
+        X = np.array([[sleep, stress, distance, soreness, rpe]])
+        mapping = {0: RiskLevel.LOW, 1: RiskLevel.MEDIUM, 2: RiskLevel.HIGH, 3: RiskLevel.CRITICAL}
+        if table is not None:
+            return mapping.get(int(table.predict(X)[0]), RiskLevel.LOW)
+        if model is not None:
             X = pd.DataFrame(X, columns=columns)
 
-        if self.model is None:
+        if model is None:
             # fallback simple rule
             # compute a fatigue-like proxy
             score = ( (10 - sleep) * 5 ) + (stress * 5) + (rpe * 3) + (soreness * 2)
@@ -341,10 +508,44 @@ class RiskClassifier:
                 return RiskLevel.HIGH
             return RiskLevel.CRITICAL
 
-        pred = self.model.predict(X)[0]
-        mapping = {0: RiskLevel.LOW, 1: RiskLevel.MEDIUM, 2: RiskLevel.HIGH, 3: RiskLevel.CRITICAL}
+        pred = model.predict(X)[0]
         return mapping.get(int(pred), RiskLevel.LOW)
 
+    def predict_risk_levels(self, features_list: List[List]) -> List[RiskLevel]:
+        """Batch version of predict_risk_level: one pipeline.predict for all rows."""
+        rows = []
+        valid = []
+        for features in features_list:
+            try:
+                rows.append([
+                    float(features[2]),
+                    float(features[3]),
+                    distance_to_km(features[4]),
+                    float(features[6]) if len(features) > 6 else 5.0,
+                    float(features[7]) if len(features) > 7 else 5.0,
+                ])
+                valid.append(True)
+            except Exception:
+                rows.append([0.0] * 5)
+                valid.append(False)
+
+        with self._lock:
+            model = self.model
+            columns = self.trained_columns if self.trained_columns is not None else self.feature_cols
+            table = self.lookup_table
+
+        if model is None or not rows:
+            return [self.predict_risk_level(f) if ok else RiskLevel.LOW
+                    for f, ok in zip(features_list, valid)]
+
+        mapping = {0: RiskLevel.LOW, 1: RiskLevel.MEDIUM, 2: RiskLevel.HIGH, 3: RiskLevel.CRITICAL}
+        if table is not None:
+            preds = table.predict(np.array(rows))
+        else:
+            preds = model.predict(pd.DataFrame(np.array(rows), columns=columns))
+        return [mapping.get(int(p), RiskLevel.LOW) if ok else RiskLevel.LOW
+                for p, ok in zip(preds, valid)]
+
     def get_feature_importance(self):
         if self.model is None:
             return {}
@@ -363,6 +564,13 @@ class RiskClassifier:
             "trained_columns": self.trained_columns,
             "model_exists": self.model is not None,
             "feedback_examples": len(self.feedback_examples),
+            "feedback_retention": self.retention.get_stats(self.feedback_examples),
             "metrics": self.risk_metrics,
+            "last_db_read": self.last_db_read,
             "feature_importance": self.get_feature_importance(),
+            "lookup_table": {
+                "enabled": self.use_lookup_table,
+                "active": self.lookup_table is not None,
+                "drift": self.lookup_drift,
+            },
         }
\ No newline at end of file
@@ -0,0 +1,232 @@
+"""Training-data loaders shared by the fatigue, injury and risk models.
+
+* DB rows are pulled with ``fetchmany`` and written straight into preallocated
+  arrays, so peak memory stays proportional to the final array size instead
+  of a Python list-of-lists plus a DataFrame copy.
+* The CSV is parsed once into a canonical feature frame; each model derives
+  its own ``(X, y)`` from that frame instead of re-reading the file.
+"""
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.perf import peak_rss_mb
+from infrastructure.database import get_connection, fetch_in_chunks
+from infrastructure.ml.preprocessing import normalize_position, normalize_activity
+
+DEFAULT_CHUNK_SIZE = 5000
+
+RISK_FEATURE_COLUMNS = ["Sleep_Duration", "Stress", "Distance_km", "Soreness", "RPE"]
+
+_RISK_WHERE = """
+    FROM TrainingSessions
+    WHERE Status = 'processed'
+      AND (RiskLevel IS NOT NULL OR FatigueScore IS NOT NULL)
+"""
+
+
+@dataclass
+class ReadStats:
+    """Throughput and memory figures for one chunked read."""
+    rows_read: int
+    rows_kept: int
+    seconds: float
+    rows_per_sec: float
+    peak_rss_mb: Optional[float]
+    chunk_size: int
+
+    def to_dict(self):
+        return asdict(self)
+
+    def summary(self) -> str:
+        rss = f"{self.peak_rss_mb:.1f} MB" if self.peak_rss_mb is not None else "n/a"
+        return (f"{self.rows_kept}/{self.rows_read} rows in {self.seconds:.2f}s "
+                f"({self.rows_per_sec:.0f} rows/s, chunk={self.chunk_size}, peak RSS {rss})")
+
+
+def _grow(array: np.ndarray, min_rows: int) -> np.ndarray:
+    capacity = max(min_rows, 2 * len(array), 1)
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def read_risk_training_arrays(
+    label_fn: Callable[[object, Optional[float]], Optional[int]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[np.ndarray, np.ndarray, ReadStats]:
+    """Stream processed sessions into ``(X float64[n, 5], y int8[n], stats)``.
+
+    ``label_fn(risk_raw, fatigue_score)`` maps the stored labels to a class
+    index; rows it returns ``None`` for are skipped. Missing soreness/RPE
+    default to 5 and distances are normalised to km, as in CSV training.
+    """
+    chunk_size = max(int(chunk_size), 1)
+    start = time.perf_counter()
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) {_RISK_WHERE}")
+        expected = int(cursor.fetchone()[0] or 0)
+
+        X = np.empty((expected, len(RISK_FEATURE_COLUMNS)), dtype=np.float64)
+        y = np.empty(expected, dtype=np.int8)
+        filled = 0
+        rows_read = 0
+
+        cursor.execute(f"""
+            SELECT SleepHours, StressLevel, DistanceKm, Soreness, RPE,
+                   RiskLevel, FatigueScore
+            {_RISK_WHERE}
+        """)
+        for chunk in fetch_in_chunks(cursor, chunk_size):
+            rows_read += len(chunk)
+            labels = np.empty(len(chunk), dtype=np.int8)
+            keep = np.zeros(len(chunk), dtype=bool)
+            for i, row in enumerate(chunk):
+                fatigue = float(row[6]) if row[6] is not None else None
+                label = label_fn(row[5], fatigue)
+                if label is not None:
+                    labels[i] = label
+                    keep[i] = True
+
+            kept = int(keep.sum())
+            if kept == 0:
+                continue
+
+            block = np.array([tuple(row[:5]) for row in chunk], dtype=np.float64)[keep]
+            np.nan_to_num(block[:, 3:5], copy=False, nan=5.0)
+            distance = block[:, 2]
+            distance[np.isnan(distance)] = 5.0
+            np.divide(distance, 1000.0, out=distance, where=distance > 100)
+
+            if filled + kept > len(X):
+                X = _grow(X, filled + kept)
+                y = _grow(y, filled + kept)
+            X[filled:filled + kept] = block
+            y[filled:filled + kept] = labels[keep]
+            filled += kept
+    finally:
+        conn.close()
+
+    if filled < len(X):
+        X = X[:filled].copy()
+        y = y[:filled].copy()
+
+    seconds = time.perf_counter() - start
+    stats = ReadStats(
+        rows_read=rows_read,
+        rows_kept=filled,
+        seconds=seconds,
+        rows_per_sec=rows_read / seconds if seconds > 0 else 0.0,
+        peak_rss_mb=peak_rss_mb(),
+        chunk_size=chunk_size,
+    )
+    return X, y, stats
+
+
+# ---------------------------------------------------------------------------
+# CSV feature frame
+# ---------------------------------------------------------------------------
+
+RISK_LABELS = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def _numeric(df: pd.DataFrame, column: str, default: float) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=float)
+    return pd.to_numeric(df[column], errors="coerce").fillna(default).astype(float)
+
+
+def load_csv_feature_frame(csv_path: str) -> pd.DataFrame:
+    """Parse the workout CSV once into canonical columns for all three models.
+
+    Columns: ``position, activity_type, sleep_hours, stress_level, distance_km,
+    sprint_count, soreness, rpe, injury, fatigue, risk_label, player_name,
+    session_date`` (the last two feed the player load features).
+    ``frame.attrs`` records where the targets came from (``fatigue_column``,
+    ``fatigue_is_proxy``, ``risk_from_labels``).
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+    df = pd.read_csv(csv_path)
+
+    if "Session_Type" in df.columns:
+        activity_raw = df["Session_Type"]
+    elif "Activity" in df.columns:
+        activity_raw = df["Activity"]
+    else:
+        activity_raw = pd.Series("practice", index=df.index)
+
+    if "SprintCount" in df.columns:
+        sprint = _numeric(df, "SprintCount", 10)
+    else:
+        sprint = _numeric(df, "Acceleration_Count", 10)
+
+    distance = _numeric(df, "Distance", 5.0)
+    distance = distance.where(distance <= 100, distance / 1000.0)
+
+    sleep = _numeric(df, "Sleep_Duration", 7)
+    stress = _numeric(df, "Stress", 5)
+    soreness = _numeric(df, "Soreness", 5)
+    rpe = _numeric(df, "RPE", 5)
+
+    if "Injury_Illness" in df.columns:
+        injury = df["Injury_Illness"].astype(str).str.strip().str.lower().isin(("yes", "1", "true"))
+    else:
+        injury = pd.Series(False, index=df.index)
+
+    fatigue_column = next((c for c in ("Fatigue", "FatigueScore", "ProxyFatigue") if c in df.columns), None)
+    if fatigue_column is not None:
+        fatigue = pd.to_numeric(df[fatigue_column], errors="coerce").fillna(0).astype(float)
+    else:
+        fatigue = (((10 - sleep) * 5) + (stress * 5) + (rpe * 3) + (soreness * 2)).clip(0, 100)
+
+    if "RiskLevel" in df.columns:
+        risk = df["RiskLevel"].astype(str).str.lower().map(RISK_LABELS).fillna(0)
+    else:
+        risk = pd.cut(fatigue, bins=[-1, 40, 60, 80, 100], labels=[0, 1, 2, 3]).astype(float).fillna(0)
+
+    frame = pd.DataFrame({
+        "position": df["Position"].map(normalize_position) if "Position" in df.columns else "midfielder",
+        "activity_type": activity_raw.map(normalize_activity),
+        "sleep_hours": sleep,
+        "stress_level": stress,
+        "distance_km": distance,
+        "sprint_count": sprint.astype(int).replace(0, 10),
+        "soreness": soreness,
+        "rpe": rpe,
+        "injury": injury.astype(np.int8),
+        "fatigue": fatigue,
+        "risk_label": risk.astype(np.int8),
+        "player_name": df["Name"].astype(str).str.strip() if "Name" in df.columns else None,
+        "session_date": pd.to_datetime(df["Date"], errors="coerce") if "Date" in df.columns else pd.NaT,
+    })
+    frame.attrs["fatigue_column"] = fatigue_column or "ProxyFatigue"
+    frame.attrs["fatigue_is_proxy"] = fatigue_column is None
+    frame.attrs["risk_from_labels"] = "RiskLevel" in df.columns
+    return frame
+
+
+def lr_feature_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """The 5-column input shared by the injury and risk logistic regressions."""
+    return pd.DataFrame({
+        "Sleep_Duration": frame["sleep_hours"],
+        "Stress": frame["stress_level"],
+        "Distance_km": frame["distance_km"],
+        "Soreness": frame["soreness"],
+        "RPE": frame["rpe"],
+    })
+
+
+def injury_training_set(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    return lr_feature_frame(frame), frame["injury"].astype(int).rename("injury")
+
+
+def risk_training_set(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    return lr_feature_frame(frame), frame["risk_label"].astype(int).rename("risk")
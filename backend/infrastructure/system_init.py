@@ -10,7 +10,7 @@ Odgovornosti:
 import logging
 from typing import Optional
 from .database import init_database
-from .ml.classifier import FatigueClassifier
+from .ml.classifier import FatigueClassifier, player_load_model_file
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +21,12 @@ class SystemContainer:
     Web layer samo koristi ovaj kontejner.
     """
     
-    def __init__(self, classifier: FatigueClassifier):
+    def __init__(self, classifier: Optional[FatigueClassifier], queue_service=None):
         self.classifier = classifier
         self._agent_manager = None
+        # Enqueue-only mod (web proces bez agenata): samo queue + pregled clustera
+        self.queue_service = queue_service
+        self.cluster_view = None
     
     def set_agent_manager(self, agent_manager):
         """Postavi agent manager (post-construct pattern)"""
@@ -33,13 +36,23 @@ class SystemContainer:
         """Vrati agent manager"""
         return self._agent_manager
 
-    def get_classifier(self) -> FatigueClassifier:
-        """Vrati fatigue/injury ML klasifikator"""
+    def get_classifier(self) -> Optional[FatigueClassifier]:
+        """Vrati fatigue/injury ML klasifikator (None u enqueue-only modu)"""
         return self.classifier
     
+    def get_queue_service(self):
+        """Vrati queue service - od agent manager-a ili samostalni (enqueue-only)"""
+        if self._agent_manager is not None:
+            return self._agent_manager.get_queue_service()
+        return self.queue_service
+    
+    def is_enqueue_only(self) -> bool:
+        """Web proces bez modela i agenata - sesije boduju zasebni worker procesi"""
+        return self._agent_manager is None and self.queue_service is not None
+    
     def is_ready(self) -> bool:
         """Provjeri da li je sistem spreman"""
-        return self._agent_manager is not None
+        return self._agent_manager is not None or self.queue_service is not None
 
 class InfrastructureSystemInit:
     """
@@ -55,10 +68,23 @@ class InfrastructureSystemInit:
     def initialize_system(self, 
                          model_file: str = "fatigue_model.joblib",
                          exploration_rate: float = 0.05,
-                         gold_threshold: int = 10) -> Optional[SystemContainer]:
+                         gold_threshold: int = 10,
+                         cluster_mode: bool = False,
+                         enqueue_only: bool = False,
+                         inference_batching: bool = False,
+                         player_load: bool = False) -> Optional[SystemContainer]:
         """
         GLAVNA METODA: Inicijalizuje CIJELI sistem.
         
+        cluster_mode: više procesa (uvicorn --workers N) dijeli isti red -
+        retrain radi samo izabrani lider (vidi ClusterCoordinator)
+        enqueue_only: samo baza + queue, bez ML modela i agenata (web proces
+        kad scoring/retrain rade zasebni ``python -m backend.worker`` procesi)
+        inference_batching: micro-batcher ispred modela (jedan forward pass za
+        više istovremenih predikcija)
+        player_load: MLP sa player load feature-ima (ACWR, monotonija, strain);
+        model je u zasebnom fajlu i prvi put se trenira iz CSV-a (Date/Name)
+        
         Returns: SystemContainer sa svim komponentama
         """
         logger.info("="*70)
@@ -70,8 +96,11 @@ class InfrastructureSystemInit:
             logger.error("❌ Sistem se ne može pokrenuti bez baze!")
             return None
         
+        if enqueue_only:
+            return self._initialize_enqueue_only()
+        
         # 2. Inicijalizuj ML model
-        if not self._initialize_ml_model(model_file):
+        if not self._initialize_ml_model(model_file, player_load):
             logger.error("❌ Sistem se ne može pokrenuti bez ML modela!")
             return None
         
@@ -79,7 +108,8 @@ class InfrastructureSystemInit:
         container = SystemContainer(self._classifier)
         
         # 4. Kreiraj sve servise, runnere i Agent Manager
-        if not self._initialize_services_and_agents(container, exploration_rate, gold_threshold):
+        if not self._initialize_services_and_agents(container, exploration_rate, gold_threshold,
+                                                    cluster_mode, inference_batching):
             logger.error("❌ Sistem se ne može pokrenuti bez servisa!")
             return None
         
@@ -91,6 +121,24 @@ class InfrastructureSystemInit:
         
         return container
     
+    def _initialize_enqueue_only(self) -> SystemContainer:
+        """Container za web proces koji samo prima sesije - modeli se ne učitavaju"""
+        from application.services.queue_service import QueueService
+        from application.services.cluster_coordinator import ClusterCoordinator
+        
+        queue_service = QueueService()
+        container = SystemContainer(None, queue_service=queue_service)
+        # Samo čitanje heartbeat-a worker procesa (/agent/cluster); lease se ne uzima
+        container.cluster_view = ClusterCoordinator(queue_service.worker_id)
+        self._container = container
+        
+        logger.info("   ✓ Queue Service kreiran (enqueue-only, bez ML modela i agenata)")
+        logger.info("="*70)
+        logger.info("✅ INFRASTRUCTURE: Enqueue-only sistem spreman!")
+        logger.info("="*70)
+        
+        return container
+    
     def _initialize_database(self) -> bool:
         """Inicijalizuj bazu podataka"""
         logger.info("📦 Inicijalizacija baze podataka...")
@@ -110,12 +158,23 @@ class InfrastructureSystemInit:
             logger.error(f"❌ Greška pri inicijalizaciji baze: {e}")
             return False
     
-    def _initialize_ml_model(self, model_file: str) -> bool:
+    def _initialize_ml_model(self, model_file: str, player_load: bool = False) -> bool:
         """Inicijalizuj ML model"""
         logger.info("🤖 Učitavanje ML modela...")
         
         try:
-            self._classifier = FatigueClassifier(model_file=model_file)
+            if player_load:
+                self._classifier = FatigueClassifier(model_file=player_load_model_file(model_file),
+                                                     player_load=True)
+                if not self._classifier.is_trained:
+                    # Baseline primjeri nemaju historiju igrača - load feature-i se uče iz CSV-a
+                    logger.info("   Player load model nije pronađen — treniram iz CSV-a...")
+                    self._classifier.train(csv_path="data/Workout_Routine_Dirty.csv")
+            else:
+                self._classifier = FatigueClassifier(model_file=model_file)
+            if not (self._classifier.is_trained and self._classifier.injury_model is not None):
+                logger.info("   Model nije pronađen na disku — treniram baseline...")
+                self._classifier.train(only_missing=True)
             logger.info("✅ ML model spreman")
             
             # Log info o modelu
@@ -132,7 +191,9 @@ class InfrastructureSystemInit:
     
     def _initialize_services_and_agents(self, container: SystemContainer,
                                       exploration_rate: float, 
-                                      gold_threshold: int) -> bool:
+                                      gold_threshold: int,
+                                      cluster_mode: bool = False,
+                                      inference_batching: bool = False) -> bool:
         """
         Kreiraj sve servise, runnere i Agent Manager.
         OVO JE KLJUČNO: Sve se kreira OVDE, ne u web layeru!
@@ -172,7 +233,9 @@ class InfrastructureSystemInit:
             agent_manager = AgentManager(container.classifier)
             agent_manager.initialize_services(
                 exploration_rate=exploration_rate,
-                gold_threshold=gold_threshold
+                gold_threshold=gold_threshold,
+                cluster_mode=cluster_mode,
+                inference_batching=inference_batching
             )
             
             # 4. Postavi agent manager u container
@@ -196,6 +259,8 @@ class InfrastructureSystemInit:
     
     def is_ready(self) -> bool:
         """Provjeri da li je sistem spreman"""
+        if self._container is not None and self._container.is_enqueue_only():
+            return self._db_initialized
         return (self._db_initialized and 
                 self._classifier is not None and 
                 self._container is not None)
@@ -1,7 +1,10 @@
 from bootstrap import create_app
 # KLJUČNO: Samo jedna linija koda!
 # Bootstrap kreira CIJELU aplikaciju, web layer samo konfiguriše
-app = create_app()
+# (retrain worker procesi se pokreću sa "spawn" i importuju ovaj modul kao
+# __mp_main__ - oni ne smiju ponovo dizati cijeli sistem)
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,61 @@
+"""Re-score stored (processed) sessions with the current models.
+
+Results go to PredictionReplays tagged with the model version; progress is
+checkpointed per chunk, so re-running the same command resumes.
+
+Usage:
+    python scripts/replay_sessions.py [--replay-id ID] [--chunk-size 1000]
+                                      [--from-id N] [--to-id N] [--max-rows N]
+"""
+import sys
+import os
+import argparse
+
+# Ensure the parent directory is on sys.path so package imports work
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from infrastructure.ml.classifier import FatigueClassifier
+from infrastructure.ml.risk_classifier import RiskClassifier
+from application.services.scoring_service import FatigueScoringService
+from application.services.replay_service import ReplayService, DEFAULT_REPLAY_CHUNK_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replay-id", default=None, help="resume/name a replay (default: replay-<model version>)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_REPLAY_CHUNK_SIZE)
+    parser.add_argument("--from-id", type=int, default=None)
+    parser.add_argument("--to-id", type=int, default=None)
+    parser.add_argument("--max-rows", type=int, default=None)
+    args = parser.parse_args()
+
+    scoring = FatigueScoringService(
+        FatigueClassifier.load(),
+        exploration_rate=0.0,
+        risk_classifier=RiskClassifier.load(),
+    )
+    service = ReplayService(scoring, chunk_size=args.chunk_size)
+    print(f"Model version: {scoring.model_version()}")
+
+    def progress(report):
+        print(f"   chunk {report.chunks}: last Id={report.last_session_id}/{report.to_id}, "
+              f"{report.rows_this_run} rows, {report.rows_per_sec:.0f} rows/s")
+
+    try:
+        report = service.run(
+            replay_id=args.replay_id,
+            from_id=args.from_id,
+            to_id=args.to_id,
+            max_rows=args.max_rows,
+            progress=progress,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted — re-run the same command to resume from the last checkpoint.")
+        return
+    print(report.summary())
+    if report.error:
+        print(f"Error: {report.error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,7 @@ if __name__ == "__main__":
     print()
     
     # Kreiraj classifier i treniraj
-    classifier = FatigueClassifier()
+    classifier = FatigueClassifier.empty()
     mae, rmse, r2 = classifier.train_from_csv("data/Workout_Routine_Dirty.csv")
     
     print("\n" + "="*70)
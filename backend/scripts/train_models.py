@@ -1,58 +1,121 @@
-"""Train RiskClassifier and FatigueClassifier from CSV (if available).
+"""Train the fatigue MLP, injury LR and risk LR from CSV in parallel.
+
+The CSV is parsed once into a shared feature frame; the three models are then
+fitted concurrently in worker processes and installed/saved in this process.
 
 Usage:
-    python scripts/train_models.py [path/to/Workout_Routine_Dirty.csv]
+    python scripts/train_models.py [path/to/Workout_Routine_Dirty.csv] [--workers N] [--player-load]
+
+--player-load trains the fatigue MLP with the per-player rolling load features
+(ACWR, monotony, strain) into fatigue_model.load.joblib, the model used when
+FATIGUE_PLAYER_LOAD=1.
 """
 import sys
 import os
+import time
+import argparse
 
 # Ensure the parent directory is on sys.path so package imports work
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from infrastructure.ml.risk_classifier import RiskClassifier
-from infrastructure.ml.classifier import FatigueClassifier
-from infrastructure.ml.preprocessing import normalize_position, normalize_activity, distance_to_km
+from infrastructure.ml.classifier import FatigueClassifier, encode_feature_frame, player_load_model_file
+from infrastructure.ml.retrain_executor import RetrainExecutor
+from infrastructure.ml.training_data import (
+    load_csv_feature_frame,
+    injury_training_set,
+    risk_training_set,
+)
 
 
 def main():
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "data", "Workout_Routine_Dirty.csv")
-    if not os.path.isabs(csv_path):
-        csv_path = os.path.abspath(csv_path)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_path", nargs="?", default=os.path.join(base_dir, "data", "Workout_Routine_Dirty.csv"))
+    parser.add_argument("--workers", type=int, default=3, help="worker processes (0 = train sequentially in-process)")
+    parser.add_argument("--player-load", action="store_true",
+                        help="add per-player rolling load features to the fatigue MLP (separate model file)")
+    args = parser.parse_args()
 
+    csv_path = os.path.abspath(args.csv_path)
     if not os.path.exists(csv_path):
         print(f"CSV not found: {csv_path} — nothing to train.")
         return
 
-    # Load CSV first so we can create proxy targets if needed and pass
-    # a prepared CSV to the RiskClassifier.
-    import pandas as pd
-    df = pd.read_csv(csv_path)
-
-    # Create proxy fatigue if missing so RiskClassifier can be trained
-    if "Fatigue" not in df.columns and "FatigueScore" not in df.columns:
-        print("No explicit fatigue column found — creating proxy fatigue target for risk training.")
-        df['Sleep_Duration'] = pd.to_numeric(df.get('Sleep_Duration', 7)).fillna(7)
-        df['Stress'] = pd.to_numeric(df.get('Stress', 5)).fillna(5)
-        df['RPE'] = pd.to_numeric(df.get('RPE', 5)).fillna(5)
-        df['Soreness'] = pd.to_numeric(df.get('Soreness', 5)).fillna(5)
-        proxy = ((10 - df['Sleep_Duration']) * 5) + (df['Stress'] * 5) + (df['RPE'] * 3) + (df['Soreness'] * 2)
-        df['ProxyFatigue'] = proxy.clip(lower=0, upper=100)
-        # save a temporary CSV for risk training
-        tmp_path = os.path.join(base_dir, "data", "Workout_Routine_Dirty_with_proxy.csv")
-        df.to_csv(tmp_path, index=False)
-        rc_csv_path = tmp_path
+    pipeline_started = time.perf_counter()
+
+    # 1. Parse CSV once - every model derives its X/y from this frame
+    started = time.perf_counter()
+    frame = load_csv_feature_frame(csv_path)
+    parse_seconds = time.perf_counter() - started
+    print(f"Parsed {len(frame)} rows in {parse_seconds:.2f}s (fatigue target: {frame.attrs['fatigue_column']})")
+    if frame.attrs["fatigue_is_proxy"]:
+        print("No explicit fatigue column found — using proxy fatigue target for fatigue/risk training.")
+
+    X_fatigue = encode_feature_frame(frame, player_load=args.player_load)
+    y_fatigue = frame["fatigue"].to_numpy(dtype=float)
+    X_injury, y_injury = injury_training_set(frame)
+    X_risk, y_risk = risk_training_set(frame)
+
+    jobs = {
+        "fatigue_mlp": ("fatigue_csv", (X_fatigue, y_fatigue)),
+        "risk_lr": ("risk", (X_risk, y_risk)),
+    }
+    if y_injury.nunique() > 1:
+        jobs["injury_lr"] = ("injury", (X_injury, y_injury))
+    else:
+        print("Injury target has a single class — skipping injury model.")
+
+    # 2. Fit all models concurrently (one process per model)
+    # This script has no other threads, so forking workers is safe and avoids
+    # re-importing sklearn in every worker
+    executor = RetrainExecutor(max_workers=max(args.workers, 1), inline=args.workers == 0, start_method="fork")
+    print(f"Training {', '.join(jobs)} with {executor.max_workers if not executor.inline else 0} worker process(es)...")
+    started = time.perf_counter()
+    futures = {}
+    wall_clock = {}
+    for name, (kind, job_args) in jobs.items():
+        futures[name] = executor.submit(kind, *job_args)
+        # Recorded when the fit itself finishes, not when its result is collected below
+        futures[name].add_done_callback(
+            lambda _, name=name: wall_clock.setdefault(name, time.perf_counter() - started)
+        )
+
+    bundles = {}
+    for name, future in futures.items():
+        try:
+            bundles[name] = executor.load_bundle(future.result())
+        except Exception as e:
+            print(f"❌ {name} training failed: {e}")
+    fit_seconds = time.perf_counter() - started
+    executor.shutdown()
+
+    # 3. Install and persist in this process
+    if args.player_load:
+        fc = FatigueClassifier.empty(player_load_model_file("fatigue_model.joblib"), player_load=True)
     else:
-        rc_csv_path = csv_path
+        fc = FatigueClassifier.empty()
+    rc = RiskClassifier.empty()
+    if "fatigue_mlp" in bundles:
+        bundles["fatigue_mlp"]["metrics"]["target_column"] = frame.attrs["fatigue_column"]
+        fc.install_csv_bundle(bundles["fatigue_mlp"])
+    if "injury_lr" in bundles:
+        fc.install_injury_bundle(bundles["injury_lr"])
+    if "risk_lr" in bundles:
+        rc.install_bundle(bundles["risk_lr"])
 
-    print("Training RiskClassifier...")
-    rc = RiskClassifier()
-    rc.train_from_csv(rc_csv_path)
+    print("\nPer-model timings:")
+    print(f"   {'model':<12} {'fit (s)':>9} {'done at (s)':>12}")
+    for name, bundle in bundles.items():
+        print(f"   {name:<12} {bundle.get('fit_seconds', 0.0):>9.2f} {wall_clock[name]:>12.2f}")
+    sequential = sum(bundle.get("fit_seconds", 0.0) for bundle in bundles.values())
+    print(f"   parse CSV: {parse_seconds:.2f}s, parallel fit wall-clock: {fit_seconds:.2f}s "
+          f"(sum of fits: {sequential:.2f}s), total: {time.perf_counter() - pipeline_started:.2f}s")
 
-    print("Attempting to train FatigueClassifier from CSV...")
-    fc = FatigueClassifier()
-    fc.train_from_csv(csv_path)
-    print("Fatigue model training complete and saved.")
+    if "fatigue_mlp" in bundles:
+        metrics = bundles["fatigue_mlp"]["metrics"]
+        print(f"Fatigue MLP: MAE={metrics['mae']:.2f}, RMSE={metrics['rmse']:.2f}, R²={metrics['r2']:.3f}")
+    print("Model training complete and saved.")
 
 
 if __name__ == '__main__':
@@ -6,8 +6,8 @@ from infrastructure.ml.classifier import FatigueClassifier
 from infrastructure.ml.risk_classifier import RiskClassifier
 
 if __name__ == '__main__':
-    fc = FatigueClassifier()
-    rc = RiskClassifier(auto_train=False)
+    fc = FatigueClassifier.load()
+    rc = RiskClassifier()
 
     features = ['midfielder', 'practice', 7.0, 5.0, 8.0, 20, 4.0, 5.0, 0]
     fatigue, confidence = fc.predict(features)
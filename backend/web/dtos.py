@@ -1,6 +1,6 @@
 # backend/web/dtos.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Literal
 
 class SessionRequest(BaseModel):
     """DTO za novu trening sesiju - UPDATED sa novim optional fields"""
@@ -15,6 +15,9 @@ class SessionRequest(BaseModel):
     soreness: Optional[int] = Field(None, ge=1, le=10, description="Bol u mišićima 1-10")
     rpe: Optional[int] = Field(None, ge=1, le=10, description="Rate of Perceived Exertion 1-10")
     injury_illness: Optional[bool] = Field(None, description="Prethodna povreda/bolest")
+    priority: Optional[Literal["live", "normal", "backfill"]] = Field(
+        None, description="Lane u redu (default: live za game, normal za practice)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -49,6 +52,14 @@ class FeedbackRequest(BaseModel):
             }
         }
 
+class ReplayRequest(BaseModel):
+    """DTO za pokretanje replay-a historijskih sesija"""
+    replay_id: Optional[str] = Field(None, max_length=64, description="Postojeći ID nastavlja replay; default: replay-<verzija modela>")
+    chunk_size: int = Field(1000, ge=1, le=50000, description="Broj sesija po chunk-u")
+    from_id: Optional[int] = Field(None, ge=0, description="Početni Id (isključivo)")
+    to_id: Optional[int] = Field(None, ge=0, description="Zadnji Id (uključivo); default: MAX(Id) na startu")
+    max_rows: Optional[int] = Field(None, ge=1, description="Stani nakon N sesija (nastavlja se kasnije)")
+
 class QueueResponse(BaseModel):
     """Odgovor nakon stavljanja u queue"""
     status: str
@@ -70,6 +81,27 @@ class PredictionResultResponse(BaseModel):
     error: Optional[str] = None
     injury_prob: Optional[float] = None
 
+class ScoreResponse(BaseModel):
+    """Odgovor POST /score - predikcija odmah, upis u bazu naknadno"""
+    status: str
+    request_id: str
+    predicted_action: str
+    fatigue_score: float
+    risk_level: str
+    confidence: float
+    injury_prob: Optional[float] = None
+    requires_review: bool
+    model_version: str
+    batch_size: int
+    processing_time_ms: float
+    timestamp: str
+
+class ScoreLookupResponse(BaseModel):
+    """Id sesije za POST /score zahtjev (kad je upisan)"""
+    request_id: str
+    status: str
+    session_id: Optional[int] = None
+
 class AgentStatusResponse(BaseModel):
     """Status agenta"""
     is_running: bool
@@ -82,6 +114,15 @@ class AgentStatusResponse(BaseModel):
     review_needed_count: Optional[int] = None
     retrain_count: Optional[int] = None
     gold_threshold: Optional[int] = None
+    lanes: Optional[dict] = None
+    write_buffer: Optional[dict] = None
+    prediction_cache: Optional[dict] = None
+    lease_reaper: Optional[dict] = None
+    scoring_loop: Optional[dict] = None
+    inline_scoring: Optional[dict] = None
+    player_load: Optional[dict] = None
+    cluster: Optional[dict] = None
+    latency: Optional[dict] = None
 
 
 class MLModelsResponse(BaseModel):
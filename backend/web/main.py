@@ -12,11 +12,17 @@ ODGOVORNOSTI SAMO:
 - NE kreira ML model (to radi infrastructure)  
 - NE kreira servise (to radi bootstrap)
 - NE pokreće agente direktno (to radi lifespan)
+
+Enqueue-only mod (FATIGUE_ENQUEUE_ONLY=1): container nema agent manager ni
+modele - /predict, /predictions i /feedback rade preko baze, a sesije boduju
+zasebni ``python -m backend.worker`` procesi.
 """
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
+import time
 from datetime import datetime
 from .dtos import (
     SessionRequest,
@@ -25,10 +31,13 @@ from .dtos import (
     PredictionResultResponse,
     AgentStatusResponse,
     MLModelsResponse,
+    ReplayRequest,
+    ScoreResponse,
+    ScoreLookupResponse,
 )
 from infrastructure.ml.metrics_store import load_metrics
 from domain.entities import TrainingSession
-from infrastructure.database import save_feedback, get_session_status, get_connection
+from infrastructure.database import save_feedback, get_session_status
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +58,10 @@ def create_fastapi_app(system_container):
         try:
             # Agent manager je već kreiran u bootstrap-u!
             agent_manager = system_container.get_agent_manager()
+            if agent_manager is None:
+                logger.info("📥 Enqueue-only mod: agenti rade u worker procesima")
+                yield
+                return
             await agent_manager.start_agents()
             
             logger.info("✅ Agenti pokrenuti")
@@ -92,9 +105,29 @@ def create_fastapi_app(system_container):
         """Dependency za agent manager"""
         return container.get_agent_manager()
     
-    def get_queue_service(agent_manager = Depends(get_agent_manager)):
-        """Dependency za queue service"""
-        return agent_manager.get_queue_service()
+    def get_queue_service(container = Depends(get_container)):
+        """Dependency za queue service (radi i u enqueue-only modu)"""
+        return container.get_queue_service()
+    
+    def get_inline_scorer(agent_manager = Depends(get_agent_manager)):
+        """Dependency za inline scorer (None u enqueue-only modu)"""
+        return agent_manager.get_inline_scorer() if agent_manager else None
+    
+    def to_training_session(session: SessionRequest) -> TrainingSession:
+        """SessionRequest DTO -> domain entitet"""
+        return TrainingSession.create_new(
+            player_name=session.player_name,
+            position=session.position,
+            activity_type=session.activity_type,
+            sleep_hours=session.sleep_hours,
+            stress_level=session.stress_level,
+            distance_km=session.distance_km,
+            sprint_count=session.sprint_count,
+            soreness=session.soreness,
+            rpe=session.rpe,
+            injury_illness=session.injury_illness,
+            priority=session.priority
+        )
     
     # ===== API ENDPOINTS =====
     @app.post("/predict", response_model=QueueResponse)
@@ -108,28 +141,18 @@ def create_fastapi_app(system_container):
         
         try:
             # Kreiranje domain entiteta
-            training_session = TrainingSession.create_new(
-                player_name=session.player_name,
-                position=session.position,
-                activity_type=session.activity_type,
-                sleep_hours=session.sleep_hours,
-                stress_level=session.stress_level,
-                distance_km=session.distance_km,
-                sprint_count=session.sprint_count,
-                soreness=session.soreness,
-                rpe=session.rpe,
-                injury_illness=session.injury_illness
-            )
+            training_session = to_training_session(session)
             
             # Stavi u queue - queue_service je injektovan!
             saved_session = queue_service.enqueue(training_session)
             
-            logger.info(f"📥 Sesija #{saved_session.id} ({saved_session.player_name}) stavljena u queue")
+            logger.info("📥 Sesija #%s (%s) stavljena u queue", saved_session.id, saved_session.player_name,
+                        extra={"event": "api.predict", "session_id": saved_session.id})
             
             return QueueResponse(
                 status="queued",
                 session_id=saved_session.id,
-                message=f"Session for {saved_session.player_name} queued for processing",
+                message=f"Session for {saved_session.player_name} queued for processing ({saved_session.priority.value} lane)",
                 timestamp=datetime.now().isoformat(),
                 estimated_wait_time_ms=100.0
             )
@@ -140,6 +163,59 @@ def create_fastapi_app(system_container):
             logger.error(f"❌ Greška u /predict: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @app.post("/score", response_model=ScoreResponse)
+    async def score(
+        session: SessionRequest,
+        inline_scorer = Depends(get_inline_scorer)
+    ):
+        """Boduj sesiju ODMAH (bez reda) - odluka za trenera tokom treninga/utakmice"""
+        if not inline_scorer:
+            raise HTTPException(status_code=503, detail="Modeli nisu učitani u ovom procesu (enqueue-only)")
+        
+        started = time.perf_counter()
+        try:
+            training_session = to_training_session(session)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        
+        try:
+            result = await inline_scorer.score(training_session)
+        except Exception as e:
+            logger.error(f"❌ Greška u /score: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        prediction = result.prediction
+        return ScoreResponse(
+            status="scored",
+            request_id=result.request_id,
+            predicted_action=prediction.action.value,
+            fatigue_score=prediction.fatigue_score,
+            risk_level=prediction.risk_level.value,
+            confidence=prediction.confidence,
+            injury_prob=prediction.injury_prob,
+            requires_review=prediction.requires_review,
+            model_version=result.model_version,
+            batch_size=result.batch_size,
+            processing_time_ms=(time.perf_counter() - started) * 1000.0,
+            timestamp=datetime.now().isoformat()
+        )
+    
+    @app.get("/score/{request_id}", response_model=ScoreLookupResponse)
+    async def get_score(request_id: str, queue_service = Depends(get_queue_service)):
+        """Id sesije za POST /score rezultat (za feedback); 'pending' dok upis ne završi"""
+        if not queue_service:
+            raise HTTPException(status_code=503, detail="Queue service not available")
+        try:
+            session_id = queue_service.find_by_request_id(request_id)
+        except Exception as e:
+            logger.error(f"❌ Greška: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        return ScoreLookupResponse(
+            request_id=request_id,
+            status="persisted" if session_id is not None else "pending",
+            session_id=session_id
+        )
+    
     @app.get("/predictions/{session_id}", response_model=PredictionResultResponse)
     async def get_prediction_result(session_id: int):
         """Dohvati rezultat predikcije"""
@@ -167,6 +243,13 @@ def create_fastapi_app(system_container):
                     processed_at=session_status['timestamp'].isoformat() if session_status['timestamp'] else None
                 )
 
+            if session_status['status'] == 'dead_letter':
+                return PredictionResultResponse(
+                    session_id=session_id,
+                    status='dead_letter',
+                    error="Scoring failed repeatedly (lease expired too many times)"
+                )
+
             return PredictionResultResponse(
                 session_id=session_id,
                 status=session_status['status'],
@@ -207,10 +290,76 @@ def create_fastapi_app(system_container):
             logger.error(f"❌ Greška: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @app.post("/admin/replay")
+    async def start_replay(req: ReplayRequest, agent_manager = Depends(get_agent_manager)):
+        """Ponovo boduj processed sesije trenutnim modelom (u pozadini, sa checkpoint-om)"""
+        if not agent_manager:
+            raise HTTPException(status_code=503, detail="Agent manager not available")
+        try:
+            replay_id = agent_manager.start_replay(
+                replay_id=req.replay_id,
+                chunk_size=req.chunk_size,
+                from_id=req.from_id,
+                to_id=req.to_id,
+                max_rows=req.max_rows
+            )
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {
+            "ok": True,
+            "replay_id": replay_id,
+            "status_url": f"/admin/replay/{replay_id}"
+        }
+    
+    @app.post("/admin/profile")
+    async def profile_agents(
+        seconds: float = Query(30.0, gt=0, le=300, description="Trajanje uzorkovanja"),
+        interval_ms: float = Query(5.0, ge=0.5, le=1000, description="Razmak između uzoraka"),
+        scope: str = Query("agents", pattern="^(agents|all)$", description="agents = samo agent petlje, all = svi threadovi"),
+        format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+        lines: bool = Query(False, description="Broj linije u imenu frame-a"),
+        agent_manager = Depends(get_agent_manager)
+    ):
+        """Sampling profiler nad agent petljama; vraća collapsed stack-ove (flamegraph.pl / speedscope)"""
+        if not agent_manager:
+            raise HTTPException(status_code=503, detail="Agent manager not available")
+        try:
+            report = await agent_manager.profile(
+                seconds,
+                interval=interval_ms / 1000.0,
+                agents_only=(scope == "agents"),
+                line_numbers=lines
+            )
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if format == "json":
+            return report.to_dict()
+        return PlainTextResponse(report.collapsed(), headers={
+            "X-Profile-Samples": str(report.samples),
+            "X-Profile-Matched-Samples": str(report.matched_samples),
+            "X-Profile-Duration-Seconds": f"{report.duration_s:.3f}",
+        })
+    
+    @app.get("/admin/replay/{replay_id}")
+    async def get_replay(replay_id: str, agent_manager = Depends(get_agent_manager)):
+        """Napredak replay-a (checkpoint + rows/sec tekućeg pokretanja)"""
+        if not agent_manager:
+            raise HTTPException(status_code=503, detail="Agent manager not available")
+        try:
+            status = agent_manager.get_replay_status(replay_id)
+        except Exception as e:
+            logger.error(f"❌ Greška: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        if not status:
+            raise HTTPException(status_code=404, detail="Replay not found")
+        return status
+    
     @app.get("/ml/models", response_model=MLModelsResponse)
     async def get_ml_models(container = Depends(get_container)):
         """Pregled algoritama, feature-a i evaluacionih metrika."""
         classifier = container.get_classifier()
+        if classifier is None:
+            raise HTTPException(status_code=503, detail="Modeli nisu učitani u ovom procesu (enqueue-only)")
         agent_manager = container.get_agent_manager()
         risk_classifier = getattr(agent_manager, "risk_classifier", None)
 
@@ -241,29 +390,56 @@ def create_fastapi_app(system_container):
             evaluation_metrics=load_metrics(),
         )
 
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics(agent_manager = Depends(get_agent_manager)):
+        """Prometheus scrape endpoint - latencije po fazi SENSE→THINK→ACT→LEARN"""
+        if not agent_manager:
+            raise HTTPException(status_code=503, detail="Agent manager nije inicijalizovan")
+        return PlainTextResponse(
+            agent_manager.get_metrics_text(),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    @app.get("/agent/cluster")
+    async def get_cluster_status(container = Depends(get_container)):
+        """Agregirani status svih API/agent procesa (FATIGUE_CLUSTER=1) - lider, workeri, brojači"""
+        agent_manager = container.get_agent_manager()
+        if not agent_manager and not container.cluster_view:
+            raise HTTPException(status_code=503, detail="Agent manager nije inicijalizovan")
+        try:
+            if not agent_manager:
+                # Enqueue-only: heartbeat-ovi worker procesa iz baze
+                status = container.cluster_view.cluster_status()
+                status["cluster_mode"] = True
+                status["this_worker"] = None
+                return status
+            return agent_manager.get_cluster_status()
+        except Exception as e:
+            logger.error(f"❌ Greška: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
     @app.get("/agent/status", response_model=AgentStatusResponse)
-    async def get_agent_status(agent_manager = Depends(get_agent_manager)):
+    async def get_agent_status(agent_manager = Depends(get_agent_manager),
+                               queue_service = Depends(get_queue_service)):
         """Dohvati status agenata sa LEARN metrikama"""
+        # Dohvati queue size iz baze
+        queue_size = 0
+        try:
+            if queue_service:
+                queue_size = queue_service.queued_count()
+        except Exception:
+            queue_size = 0
+        
         if not agent_manager:
+            # Enqueue-only mod: agenti (i njihove metrike) su u worker procesima
             return AgentStatusResponse(
                 is_running=False,
                 processed_count=0,
                 avg_processing_time_ms=0,
-                queue_size=0
+                queue_size=queue_size
             )
         
         try:
-            # Dohvati queue size iz baze
-            queue_size = 0
-            try:
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM TrainingSessions WHERE Status = 'queued'")
-                queue_size = cursor.fetchone()[0]
-                conn.close()
-            except:
-                queue_size = 0
-            
             # Dohvati status preko agent manager-a (INJEKTOVAN!)
             status = agent_manager.get_status()
             
@@ -282,7 +458,17 @@ def create_fastapi_app(system_container):
                 review_needed_count=scoring_status.get("review_needed_count", 0),
                 # Retrain metrike
                 retrain_count=retrain_status.get("retrain_count", 0),
-                gold_threshold=retrain_status.get("gold_threshold", 0)
+                gold_threshold=retrain_status.get("gold_threshold", 0),
+                # Queue metrike
+                lanes=status.get("lanes"),
+                write_buffer=scoring_status.get("write_buffer"),
+                prediction_cache=scoring_status.get("prediction_cache"),
+                lease_reaper=status.get("lease_reaper"),
+                scoring_loop=status.get("scoring_loop"),
+                inline_scoring=status.get("inline_scoring"),
+                player_load=status.get("player_load"),
+                cluster=status.get("cluster"),
+                latency=scoring_status.get("latency")
             )
             
         except Exception as e:
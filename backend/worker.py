@@ -0,0 +1,88 @@
+# backend/worker.py
+"""
+WORKER - samostalni proces za agente (scoring + retrain), bez HTTP-a.
+
+Web proces u enqueue-only modu (FATIGUE_ENQUEUE_ONLY=1) samo upisuje sesije u
+red; boduju ih i retrain rade worker procesi. HTTP kapacitet i kapacitet
+scoring-a se tako skaliraju odvojeno, a nalet API saobraćaja ne dijeli proces
+(ni GIL) sa inferencom modela.
+
+Container se gradi istim InfrastructureSystemInit-om kao i web proces, pa
+worker koristi iste servise, runnere i AgentManager petlje. Po defaultu radi
+u cluster modu: više workera dijeli red, retrain radi samo lider, a
+``GET /agent/cluster`` na web procesu čita njihove heartbeat-ove.
+
+Usage (iz korijena repozitorija ili iz backend/):
+    python -m backend.worker [--no-cluster]
+    python -m worker [--no-cluster]
+"""
+import sys
+import os
+import argparse
+import asyncio
+import logging
+import signal
+
+# Importi su relativni na backend/ (kao kod main.py), i kad se pokreće kao backend.worker
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bootstrap import SYSTEM_CONFIG, env_flag
+from core.logging_setup import configure_logging_from_env
+from infrastructure.system_init import InfrastructureSystemInit
+
+logger = logging.getLogger("worker")
+
+
+async def run_worker(agent_manager):
+    """Pokreni agent petlje i čekaj SIGINT/SIGTERM; zatim ih uredno zaustavi"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: SIGINT stiže kao KeyboardInterrupt (vidi main)
+            pass
+
+    await agent_manager.start_agents()
+    logger.info("✅ Worker radi - Ctrl+C za zaustavljanje")
+    try:
+        await stop.wait()
+    finally:
+        logger.info("👋 WORKER: Zaustavljanje agenata...")
+        await agent_manager.stop_agents()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agent worker (scoring + retrain) bez HTTP servera")
+    parser.add_argument("--no-cluster", action="store_true",
+                        help="bez leader election-a i heartbeat-a (samo jedan worker nad bazom)")
+    args = parser.parse_args(argv)
+
+    configure_logging_from_env()
+    cluster_mode = not args.no_cluster and env_flag("FATIGUE_CLUSTER", default=True)
+
+    logger.info("=" * 70)
+    logger.info(f"🛠️  WORKER: Pokrećem agente (cluster mod: {'da' if cluster_mode else 'ne'})...")
+    logger.info("=" * 70)
+
+    container = InfrastructureSystemInit().initialize_system(
+        **SYSTEM_CONFIG,
+        cluster_mode=cluster_mode,
+        inference_batching=env_flag("FATIGUE_INFERENCE_BATCHING"),
+        player_load=env_flag("FATIGUE_PLAYER_LOAD")
+    )
+    if not container or not container.get_agent_manager():
+        logger.error("❌ Worker se nije uspio inicijalizovati!")
+        return 1
+
+    try:
+        asyncio.run(run_worker(container.get_agent_manager()))
+    except KeyboardInterrupt:
+        logger.info("👋 WORKER: Prekinut")
+    return 0
+
+
+# Retrain worker procesi se pokreću sa "spawn" i importuju ovaj modul kao __mp_main__
+if __name__ == "__main__":
+    sys.exit(main())